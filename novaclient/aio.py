@@ -0,0 +1,138 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Asyncio interface to the OpenStack Compute API.
+
+Every manager of the wrapped client is exposed through an awaitable proxy:
+calling ``nova.servers.list()`` returns an ``asyncio.Future`` instead of
+blocking the caller. The calls themselves still go through the regular
+``Manager`` code paths (``_list``, ``_get``, ``_create``, ``_action``...), so
+microversion headers, request ids and ``exceptions.from_response`` mapping
+behave exactly the same as for the synchronous client.
+
+The HTTP layer (``requests``/``keystoneauth1``) is blocking, so requests are
+dispatched to a bounded executor shared by the whole client. The number of
+requests in flight is controlled by ``max_workers`` rather than by the number
+of threads the caller creates.
+"""
+
+import functools
+import inspect
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+from concurrent import futures
+
+from novaclient import base
+from novaclient import client
+from novaclient import exceptions
+from novaclient.i18n import _
+
+DEFAULT_MAX_WORKERS = 10
+
+
+class AsyncManager(object):
+    """Awaitable proxy for a :class:`novaclient.base.Manager`.
+
+    Public and private methods of the wrapped manager are returned as
+    callables producing ``asyncio.Future`` objects. Any other attribute is
+    returned as is.
+    """
+
+    def __init__(self, async_client, manager):
+        self._async_client = async_client
+        self._manager = manager
+
+    def __repr__(self):
+        return "<AsyncManager %s>" % self._manager.__class__.__name__
+
+    def __getattr__(self, name):
+        attr = getattr(self._manager, name)
+        if not inspect.ismethod(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return self._async_client.submit(attr, *args, **kwargs)
+        return call
+
+
+class AsyncClient(object):
+    """Asyncio wrapper around a synchronous compute client.
+
+    :param client: ``novaclient.v2.client.Client`` instance to wrap
+    :param max_workers: maximum number of requests in flight at once
+    :param loop: event loop used to schedule calls. Defaults to the loop
+                 returned by ``asyncio.get_event_loop()`` at call time.
+    """
+
+    def __init__(self, client, max_workers=None, loop=None):
+        if asyncio is None:
+            raise exceptions.UnsupportedVersion(
+                _("The asyncio interface requires Python 3.4 or newer."))
+        self.client = client
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self._loop = loop
+        self._executor = futures.ThreadPoolExecutor(self.max_workers)
+        self._managers = {}
+
+    def __repr__(self):
+        return "<AsyncClient max_workers=%s>" % self.max_workers
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not isinstance(attr, base.Manager):
+            return attr
+        manager = self._managers.get(name)
+        if manager is None or manager._manager is not attr:
+            manager = AsyncManager(self, attr)
+            self._managers[name] = manager
+        return manager
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, tb):
+        self.close()
+
+    def submit(self, func, *args, **kwargs):
+        """Schedule ``func(*args, **kwargs)`` and return an awaitable."""
+        loop = self._loop or asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor,
+                                    functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        """Wait for in-flight requests and release the executor."""
+        self._executor.shutdown(wait=True)
+
+
+def Client(version, *args, **kwargs):
+    """Initialize an asyncio client object based on given version.
+
+    Accepts the same arguments as :func:`novaclient.client.Client` plus
+    ``max_workers`` and ``loop`` which are passed to :class:`AsyncClient`.
+    Since the requests are sent from several threads, the client is created
+    with ``thread_safe=True`` unless told otherwise::
+
+        >>> from novaclient import aio
+        >>> nova = aio.Client(VERSION, session=sess, max_workers=100)
+        >>> servers = await nova.servers.list()
+    """
+    max_workers = kwargs.pop('max_workers', None)
+    loop = kwargs.pop('loop', None)
+    kwargs.setdefault('thread_safe', True)
+    return AsyncClient(client.Client(version, *args, **kwargs),
+                       max_workers=max_workers, loop=loop)
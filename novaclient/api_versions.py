@@ -12,14 +12,18 @@
 #    under the License.
 
 import functools
+import json
 import logging
 import os
 import pkgutil
 import re
-import traceback
+import sys
+import threading
+import time
 import warnings
 
 from oslo_utils import strutils
+import six
 
 import novaclient
 from novaclient import exceptions
@@ -37,6 +41,12 @@ SERVICE_TYPE = "compute"
 DEPRECATED_VERSIONS = {"1.1": "2"}
 
 _SUBSTITUTIONS = {}
+# Versioned method to call, keyed by (name, APIVersion).
+_DISPATCH = {}
+# Major versions of the client packages, discovered on first use.
+_AVAILABLE_MAJOR_VERSIONS = None
+
+DEFAULT_VERSION_CACHE_TTL = 24 * 60 * 60
 
 _type_error_msg = _("'%(other)s' should be an instance of '%(cls)s'")
 
@@ -47,9 +57,16 @@ class APIVersion(object):
     This class provides convenience methods for manipulation
     and comparison of version numbers that we need to do to
     implement microversions.
+
+    Instances are immutable and hashable, and are interned: creating a
+    version from the same string twice returns the same object.
     """
 
-    def __init__(self, version_str=None):
+    __slots__ = ('ver_major', 'ver_minor', '_key')
+
+    _interned = {}
+
+    def __new__(cls, version_str=None):
         """Create an API version object.
 
         :param version_str: String representation of APIVersionRequest.
@@ -58,26 +75,55 @@ class APIVersion(object):
                             to create Null APIVersionRequest, which is
                             equal to 0.0
         """
-        self.ver_major = 0
-        self.ver_minor = 0
+        try:
+            return cls._interned[(cls, version_str)]
+        except (KeyError, TypeError):
+            pass
+
+        ver_major = 0
+        ver_minor = 0
 
         if version_str is not None:
             match = re.match(r"^([1-9]\d*)\.([1-9]\d*|0|latest)$", version_str)
             if match:
-                self.ver_major = int(match.group(1))
+                ver_major = int(match.group(1))
                 if match.group(2) == "latest":
                     # NOTE(andreykurilin): Infinity allows to easily determine
                     # latest version and doesn't require any additional checks
                     # in comparison methods.
-                    self.ver_minor = float("inf")
+                    ver_minor = float("inf")
                 else:
-                    self.ver_minor = int(match.group(2))
+                    ver_minor = int(match.group(2))
             else:
                 msg = _("Invalid format of client version '%s'. "
                         "Expected format 'X.Y', where X is a major part and Y "
                         "is a minor part of version.") % version_str
                 raise exceptions.UnsupportedVersion(msg)
 
+        self = super(APIVersion, cls).__new__(cls)
+        object.__setattr__(self, 'ver_major', ver_major)
+        object.__setattr__(self, 'ver_minor', ver_minor)
+        object.__setattr__(self, '_key', (ver_major, ver_minor))
+        return cls._interned.setdefault((cls, version_str), self)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(_("APIVersion objects are immutable."))
+
+    def __delattr__(self, name):
+        raise AttributeError(_("APIVersion objects are immutable."))
+
+    def __reduce__(self):
+        return self.__class__, (None if self.is_null() else self.get_string(),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __hash__(self):
+        return hash(self._key)
+
     def __str__(self):
         """Debug/Logging representation of object."""
         if self.is_latest():
@@ -92,7 +138,7 @@ class APIVersion(object):
             return "<APIVersion: %s>" % self.get_string()
 
     def is_null(self):
-        return self.ver_major == 0 and self.ver_minor == 0
+        return self._key == (0, 0)
 
     def is_latest(self):
         return self.ver_minor == float("inf")
@@ -102,33 +148,30 @@ class APIVersion(object):
             raise TypeError(_type_error_msg % {"other": other,
                                                "cls": self.__class__})
 
-        return ((self.ver_major, self.ver_minor) <
-                (other.ver_major, other.ver_minor))
+        return self._key < other._key
 
     def __eq__(self, other):
         if not isinstance(other, APIVersion):
             raise TypeError(_type_error_msg % {"other": other,
                                                "cls": self.__class__})
 
-        return ((self.ver_major, self.ver_minor) ==
-                (other.ver_major, other.ver_minor))
+        return self._key == other._key
 
     def __gt__(self, other):
         if not isinstance(other, APIVersion):
             raise TypeError(_type_error_msg % {"other": other,
                                                "cls": self.__class__})
 
-        return ((self.ver_major, self.ver_minor) >
-                (other.ver_major, other.ver_minor))
+        return self._key > other._key
 
     def __le__(self, other):
-        return self < other or self == other
+        return not self > other
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __ge__(self, other):
-        return self > other or self == other
+        return not self < other
 
     def matches(self, min_version, max_version):
         """Matches the version object.
@@ -197,14 +240,17 @@ class VersionedMethod(object):
 
 
 def get_available_major_versions():
-    # NOTE(andreykurilin): available clients version should not be
-    # hardcoded, so let's discover them.
-    matcher = re.compile(r"v[0-9]*$")
-    submodules = pkgutil.iter_modules([os.path.dirname(__file__)])
-    available_versions = [name[1:] for loader, name, ispkg in submodules
-                          if matcher.search(name)]
+    global _AVAILABLE_MAJOR_VERSIONS
+    if _AVAILABLE_MAJOR_VERSIONS is None:
+        # NOTE(andreykurilin): available clients version should not be
+        # hardcoded, so let's discover them.
+        matcher = re.compile(r"v[0-9]*$")
+        submodules = pkgutil.iter_modules([os.path.dirname(__file__)])
+        _AVAILABLE_MAJOR_VERSIONS = [name[1:]
+                                     for loader, name, ispkg in submodules
+                                     if matcher.search(name)]
 
-    return available_versions
+    return list(_AVAILABLE_MAJOR_VERSIONS)
 
 
 def check_major_version(api_version):
@@ -247,7 +293,167 @@ def get_api_version(version_string):
     return api_version
 
 
-def _get_server_version_range(client):
+class VersionCache(object):
+    """Cache of the microversion ranges supported by compute endpoints.
+
+    It is used by :func:`discover_version` to avoid requesting the version
+    of the endpoint each time a client is built. The ranges are kept per
+    endpoint URL, or, for a legacy ``HTTPClient`` finding its endpoint in the
+    service catalog, per auth URL, region, endpoint type and service, which
+    are known before it authenticates. A range
+    older than ``ttl`` is still returned, and refreshed in a background
+    thread for the next lookups when the client is ``thread_safe``. Since a
+    stale range may no longer match the server, the range of an endpoint
+    should be invalidated when it rejects a microversion.
+
+    :param ttl: time after which a range is refreshed, in seconds
+    :param path: JSON file persisting the ranges between processes (optional)
+    """
+
+    def __init__(self, ttl=DEFAULT_VERSION_CACHE_TTL, path=None):
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._refreshing = set()
+
+    def __repr__(self):
+        return "<VersionCache ttl=%s>" % self.ttl
+
+    @staticmethod
+    def _key(client):
+        http_client = client.client
+        get_endpoint = getattr(http_client, 'get_endpoint', None)
+        auth_url = getattr(http_client, 'auth_url', None)
+        if get_endpoint is not None:
+            endpoint = get_endpoint()
+        elif http_client.bypass_url or not auth_url:
+            endpoint = http_client.bypass_url or http_client.management_url
+        else:
+            # NOTE: the endpoint is unknown until the HTTPClient
+            # authenticates, the range is kept under what selects it in the
+            # service catalog instead, so that it is found before.
+            return ' '.join(i or '' for i in (
+                auth_url.rstrip('/'), http_client.region_name,
+                http_client.endpoint_type, http_client.service_type,
+                http_client.service_name))
+        if isinstance(endpoint, six.string_types):
+            return endpoint.rstrip('/')
+
+    @staticmethod
+    def _dump_version(version):
+        return None if version.is_null() else version.get_string()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if self.path:
+            try:
+                with open(self.path) as f:
+                    entries = json.load(f)
+            except (IOError, ValueError):
+                return
+            if isinstance(entries, dict):
+                self._entries = entries
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = "%s.%s.tmp" % (self.path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError):
+            # NOTE: the cache is only an optimization, don't fail if it
+            # can't be written.
+            pass
+
+    def get(self, client):
+        """Return the cached range of the endpoint of a client.
+
+        :returns: tuple of the minimum and maximum versions and of whether
+                  the range is stale, None if the range isn't cached
+        """
+        key = self._key(client)
+        if key is None:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            return (APIVersion(entry['min_version']),
+                    APIVersion(entry['max_version']),
+                    time.time() - float(entry['time']) > self.ttl)
+        except (KeyError, TypeError, ValueError,
+                exceptions.UnsupportedVersion):
+            # NOTE: a malformed entry is handled like a missing one.
+            return None
+
+    def set(self, client, min_version, max_version):
+        """Cache the range of the endpoint of a client."""
+        key = self._key(client)
+        if key is None:
+            return
+        with self._lock:
+            self._load()
+            self._entries[key] = {
+                'time': time.time(),
+                'min_version': self._dump_version(min_version),
+                'max_version': self._dump_version(max_version)}
+            self._save()
+
+    def refresh(self, client):
+        """Request the range of the endpoint of a client in the background.
+
+        A client which isn't ``thread_safe`` can't send the request while it
+        is used by the caller, the range is requested before returning in
+        that case.
+
+        :returns: the thread doing the request, None if the range is already
+                  being refreshed or was refreshed by the calling thread
+        """
+        key = self._key(client)
+        with self._lock:
+            if key is None or key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+        if not _thread_safe(client):
+            self._refresh(client, key)
+            return None
+        thread = threading.Thread(target=self._refresh, args=(client, key))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _refresh(self, client, key):
+        try:
+            self.set(client, *_request_server_version_range(client))
+        except Exception:
+            # NOTE: the stale range is kept, the refresh will be tried again
+            # on the next lookup.
+            LOG.debug("Unable to refresh the version of %s", key,
+                      exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, client=None):
+        """Drop the range of the endpoint of a client, or all of them."""
+        key = None if client is None else self._key(client)
+        with self._lock:
+            self._load()
+            if client is None:
+                self._entries.clear()
+            elif self._entries.pop(key, None) is None:
+                return
+            self._save()
+
+
+def _request_server_version_range(client):
     version = client.versions.get_current()
 
     if not hasattr(version, 'version') or not version.version:
@@ -256,7 +462,27 @@ def _get_server_version_range(client):
     return APIVersion(version.min_version), APIVersion(version.version)
 
 
-def discover_version(client, requested_version):
+def _thread_safe(client):
+    return getattr(client.client, 'thread_safe', False)
+
+
+def _get_server_version_range(client, cache=None):
+    if cache is not None:
+        cached = cache.get(client)
+        if cached is not None:
+            min_version, max_version, stale = cached
+            if not stale:
+                return min_version, max_version
+            if _thread_safe(client):
+                cache.refresh(client)
+                return min_version, max_version
+    min_version, max_version = _request_server_version_range(client)
+    if cache is not None:
+        cache.set(client, min_version, max_version)
+    return min_version, max_version
+
+
+def discover_version(client, requested_version, cache=None):
     """Discover most recent version supported by API and client.
 
     Checks ``requested_version`` and returns the most recent version
@@ -264,11 +490,29 @@ def discover_version(client, requested_version):
 
     :param client: client object
     :param requested_version: requested version represented by APIVersion obj
+    :param cache: :class:`VersionCache` used to avoid requesting the version
+                  of the server each time (optional)
     :returns: APIVersion
     """
     server_start_version, server_end_version = _get_server_version_range(
-        client)
+        client, cache)
+    try:
+        return _select_version(requested_version, server_start_version,
+                               server_end_version)
+    except exceptions.UnsupportedVersion:
+        if cache is None:
+            raise
+    # NOTE: the cached range may predate an upgrade of the server, check
+    # the version again with the current range.
+    cache.invalidate(client)
+    server_start_version, server_end_version = _get_server_version_range(
+        client, cache)
+    return _select_version(requested_version, server_start_version,
+                           server_end_version)
 
+
+def _select_version(requested_version, server_start_version,
+                    server_end_version):
     if (not requested_version.is_latest() and
             requested_version != APIVersion('2.0')):
         if server_start_version.is_null() and server_end_version.is_null():
@@ -344,23 +588,48 @@ def check_headers(response, api_version):
 def _add_substitution(versioned_method):
     _SUBSTITUTIONS.setdefault(versioned_method.name, [])
     _SUBSTITUTIONS[versioned_method.name].append(versioned_method)
+    _DISPATCH.clear()
 
 
 def _get_function_name(func):
-    # NOTE(andreykurilin): Based on the facts:
-    #  - Python 2 does not have __qualname__ property as Python 3 has;
-    #  - we cannot use im_class here, since we need to obtain name of
-    #    function in `wraps` decorator during class initialization
-    #    ("im_class" property does not exist at that moment)
-    #  we need to write own logic to obtain the full function name which
-    #  include module name, owner name(optional) and just function name.
-    filename, _lineno, _name, line = traceback.extract_stack()[-4]
-    module, _file_extension = os.path.splitext(filename)
-    module = module.replace("/", ".")
-    if module.endswith(func.__module__):
-        return "%s.[%s].%s" % (func.__module__, line, func.__name__)
-    else:
-        return "%s.%s" % (func.__module__, func.__name__)
+    """Return the name under which the versions of ``func`` are registered.
+
+    Functions with the same module and qualified name (e.g. the versions of
+    one method of a class) share a name, methods of different classes don't.
+    """
+    qualname = getattr(func, "__qualname__", None)
+    if qualname is None:
+        # NOTE(andreykurilin): Python 2 does not have __qualname__ and
+        #   im_class doesn't exist yet while the class body is executed, so
+        #   use the name of the code block defining the function instead:
+        #   the class name for methods, "<module>" for functions.
+        frame = sys._getframe(1)
+        while frame.f_globals.get("__name__") == __name__:
+            frame = frame.f_back
+        owner = frame.f_code.co_name
+        qualname = "%s.%s" % (owner, func.__name__)
+    qualname = qualname.replace("<locals>.", "").replace("<module>.", "")
+    return "%s.%s" % (func.__module__, qualname)
+
+
+def _dispatch(name, api_version):
+    """Return the function implementing ``name`` for ``api_version``.
+
+    The result of the lookup is cached, so each (method, version) pair is
+    resolved once.
+    """
+    if api_version is None:
+        # NOTE: like a null version, all the versions are candidates.
+        api_version = APIVersion()
+    key = (name, api_version)
+    try:
+        return _DISPATCH[key]
+    except KeyError:
+        pass
+    methods = get_substitutions(name, api_version)
+    func = methods[-1].func if methods else None
+    _DISPATCH[key] = func
+    return func
 
 
 def get_substitutions(func_name, api_version=None):
@@ -394,12 +663,12 @@ def wraps(start_version, end_version=None):
 
         @functools.wraps(func)
         def substitution(obj, *args, **kwargs):
-            methods = get_substitutions(name, obj.api_version)
+            method = _dispatch(name, obj.api_version)
 
-            if not methods:
+            if method is None:
                 raise exceptions.VersionNotFoundForAPIMethod(
                     obj.api_version.get_string(), name)
-            return methods[-1].func(obj, *args, **kwargs)
+            return method(obj, *args, **kwargs)
 
         # Let's share "arguments" with original method and substitution to
         # allow put cliutils.arg and wraps decorators in any order
@@ -408,10 +677,10 @@ def wraps(start_version, end_version=None):
         substitution.arguments = func.arguments
 
         # NOTE(andreykurilin): The way to obtain function's name in Python 2
-        #   bases on traceback(see _get_function_name for details). Since the
-        #   right versioned method method is used in several places, one object
-        #   can have different names. Let's generate name of function one time
-        #   and use __id__ property in all other places.
+        #   bases on the calling frame (see _get_function_name for details).
+        #   Since the right versioned method method is used in several places,
+        #   one object can have different names. Let's generate name of
+        #   function one time and use __id__ property in all other places.
         substitution.__id__ = name
 
         return substitution
@@ -431,9 +700,10 @@ def deprecated_after(version):
     decorator = wraps('2.0', version)
 
     def wrapper(fn):
+        decorated = decorator(fn)
+
         @functools.wraps(fn)
         def wrapped(*a, **k):
-            decorated = decorator(fn)
             if hasattr(fn, '__module__'):
                 mod = fn.__module__
             else:
@@ -22,10 +22,13 @@ Base utilities to build API operation managers and objects on top of.
 import abc
 import contextlib
 import copy
-import hashlib
+import functools
+import json
 import os
 import threading
+import time
 
+from concurrent import futures
 from oslo_utils import reflection
 from oslo_utils import strutils
 from requests import Response
@@ -47,6 +50,19 @@ def getid(obj):
         return obj
 
 
+def _fields_set(fields):
+    """Return the keys to keep for a ``fields`` argument, or None."""
+    if fields is None:
+        return None
+    return frozenset(fields) | frozenset(['id'])
+
+
+def _select(info, fields):
+    if fields is None or not isinstance(info, dict):
+        return info
+    return dict((k, v) for k, v in six.iteritems(info) if k in fields)
+
+
 # TODO(aababilov): call run_hooks() in HookableMixin's child classes
 class HookableMixin(object):
     """Mixin so classes can register and run hooks."""
@@ -119,10 +135,20 @@ class Resource(RequestIdMixin):
     """Base class for OpenStack resources (tenant, user, etc.).
 
     This is pretty much just a bag for attributes.
+
+    The attributes are stored both in ``_info`` and in the instance
+    ``__dict__``. When ``COMPACT`` is set on a resource class (or on
+    ``Resource`` for all of them), they are only stored in ``_info``, which
+    attribute access is served from, reducing the memory used by large
+    listings.
     """
 
     HUMAN_ID = False
     NAME_ATTR = 'name'
+    COMPACT = False
+    _hydration_group = None
+
+    __slots__ = ('manager', '_info', '_loaded', 'x_openstack_request_ids')
 
     def __init__(self, manager, info, loaded=False, resp=None):
         """Populate and bind to a manager.
@@ -140,8 +166,11 @@ class Resource(RequestIdMixin):
         self.append_request_ids(resp)
 
     def __repr__(self):
+        keys = set(self.__dict__)
+        if self.COMPACT:
+            keys.update(k for k in self._info if not hasattr(type(self), k))
         reprkeys = sorted(k
-                          for k in self.__dict__.keys()
+                          for k in keys
                           if k[0] != '_' and
                           k not in ['manager', 'x_openstack_request_ids'])
         info = ", ".join("%s=%s" % (k, getattr(self, k)) for k in reprkeys)
@@ -162,7 +191,16 @@ class Resource(RequestIdMixin):
         return None
 
     def _add_details(self, info):
+        compact = self.COMPACT
+        # Instance attributes can't shadow _info while the resource is
+        # created, and looking for them would allocate its __dict__.
+        creating = info is self._info
         for (k, v) in six.iteritems(info):
+            if (compact and not hasattr(type(self), k) and
+                    (creating or k not in self.__dict__)):
+                # Nothing shadows the key, __getattr__ reads it from _info.
+                self._info[k] = v
+                continue
             try:
                 setattr(self, k, v)
                 self._info[k] = v
@@ -171,6 +209,11 @@ class Resource(RequestIdMixin):
                 pass
 
     def __getattr__(self, k):
+        if k in Resource.__slots__:
+            # Not set yet, e.g. while the resource is being copied.
+            raise AttributeError(k)
+        if self.COMPACT and k in self._info:
+            return self._info[k]
         if k not in self.__dict__:
             # NOTE(bcwaldon): disallow lazy-loading if already loaded once
             if not self.is_loaded():
@@ -187,6 +230,11 @@ class Resource(RequestIdMixin):
         Some clients, such as novaclient have the option to lazy load the
         details, details which can be loaded with this function.
         """
+        if self._hydration_group is not None:
+            self._hydration_group.load()
+            if self.is_loaded():
+                return
+
         # set_loaded() first ... so if we have to bail, we know we tried.
         self.set_loaded(True)
         if not hasattr(self.manager, 'get'):
@@ -222,6 +270,520 @@ class Resource(RequestIdMixin):
         return copy.deepcopy(self._info)
 
 
+class _HydrationGroup(object):
+    """Lazy loads the details of a group of resources at once.
+
+    :param resources: resources to load
+    :param loader: callable taking the resources and returning an iterable
+                   of detailed resources, which are matched by ID
+    """
+
+    def __init__(self, resources, loader):
+        self._resources = resources
+        self._loader = loader
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._resources is None:
+                return
+            resources, self._resources = self._resources, None
+            details = dict((getid(new), new)
+                           for new in self._loader(resources) if new)
+            for resource in resources:
+                resource._hydration_group = None
+                new = details.get(getid(resource))
+                # NOTE: resources missing from the details stay unloaded, so
+                # that they are fetched (or fail) one by one as before.
+                if new is not None:
+                    resource._add_details(new._info)
+                    resource.append_request_ids(new.request_ids)
+                    resource.set_loaded(True)
+
+
+class ResourceIndex(object):
+    """Index of the IDs, names and human IDs of resources.
+
+    It is used by :func:`novaclient.utils.find_resource` to resolve names
+    without listing the resources each time. The index is kept per manager
+    and per find arguments (e.g. ``all_tenants``), filled by a single
+    listing, and invalidated when the client creates, updates or deletes a
+    resource of the manager.
+
+    :param ttl: time after which the entries of a manager expire, in seconds
+    :param path: JSON file persisting the index between processes (optional)
+    """
+
+    def __init__(self, ttl=300, path=None):
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def __repr__(self):
+        return "<ResourceIndex ttl=%s>" % self.ttl
+
+    @staticmethod
+    def _key(manager, find_args):
+        args = ",".join("%s=%s" % arg for arg in sorted(find_args.items()))
+        return "%s:%s" % (manager.__class__.__name__, args)
+
+    @staticmethod
+    def _row(resource):
+        return [getid(resource),
+                getattr(resource, resource.NAME_ATTR, None),
+                resource.human_id]
+
+    @staticmethod
+    def _match(rows, name_or_id, complete):
+        name_or_id = six.text_type(name_or_id)
+        for field in (0, 1, 2):
+            matches = [i for i, row in enumerate(rows)
+                       if row[field] is not None and
+                       six.text_type(row[field]) == name_or_id]
+            # NOTE: names are unique only if every resource is known
+            if matches or not complete:
+                return matches
+        return []
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if self.path:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (IOError, ValueError):
+                pass
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = "%s.%s.tmp" % (self.path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError):
+            # NOTE: the index is only an optimization, don't fail if it
+            # can't be written.
+            pass
+
+    def _get_entry(self, key):
+        self._load()
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry['time'] > self.ttl:
+            return None
+        return entry
+
+    def find(self, manager, name_or_id, find_args):
+        """Return the indexed resources matching a name or an ID.
+
+        The resources returned are not loaded: only their ID and name are
+        set, their details are fetched when another attribute is accessed.
+
+        :returns: list of matching resources, None if unknown to the index
+        """
+        with self._lock:
+            entry = self._get_entry(self._key(manager, find_args))
+            if entry is None:
+                return None
+            rows = entry['resources']
+            matches = self._match(rows, name_or_id, entry['complete'])
+        if not matches and not entry['complete']:
+            return None
+        resources = []
+        for i in matches:
+            info = {'id': rows[i][0]}
+            if rows[i][1] is not None:
+                info[manager.resource_class.NAME_ATTR] = rows[i][1]
+            resources.append(manager.resource_class(manager, info))
+        return resources
+
+    def add(self, manager, resource, find_args):
+        """Index a single resource, e.g. after getting it by ID."""
+        key = self._key(manager, find_args)
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                entry = self._entries[key] = {'time': time.time(),
+                                              'complete': False,
+                                              'resources': []}
+            row = self._row(resource)
+            if row not in entry['resources']:
+                entry['resources'].append(row)
+                self._save()
+
+    def refresh(self, manager, name_or_id, find_args):
+        """Index all the resources of a manager with a single listing.
+
+        :returns: list of listed resources matching a name or an ID
+        """
+        listing = manager.findall(**find_args)
+        rows = [self._row(resource) for resource in listing]
+        with self._lock:
+            self._load()
+            self._entries[self._key(manager, find_args)] = {
+                'time': time.time(), 'complete': True, 'resources': rows}
+            self._save()
+        return [listing[i] for i in self._match(rows, name_or_id, True)]
+
+    def invalidate(self, manager=None):
+        """Drop the entries of a manager, or all of them."""
+        with self._lock:
+            self._load()
+            if manager is None:
+                self._entries.clear()
+            else:
+                prefix = "%s:" % manager.__class__.__name__
+                for key in list(self._entries):
+                    if key.startswith(prefix):
+                        del self._entries[key]
+            self._save()
+
+
+class CompletionCache(object):
+    """Store of the IDs and human IDs of resources used for bash completion.
+
+    Values are kept in a single indexed SQLite database shared by all the
+    clouds and users, which are told apart by ``scope``. Listings replace the
+    values of a resource type and creations add to them, without rewriting
+    the whole store.
+
+    When Python is built without the ``sqlite3`` module, values are written
+    to one file per resource type in a directory named after ``scope``, next
+    to ``path``, as in older releases.
+
+    :param path: path of the SQLite database
+    :param scope: identifier of the cloud and user the values belong to
+    """
+
+    # NOTE: protects the files of the fallback cache.
+    cache_lock = threading.RLock()
+
+    def __init__(self, path, scope=''):
+        self.path = path
+        self.scope = scope
+        self._initialized = False
+        try:
+            import sqlite3
+        except ImportError:
+            sqlite3 = None
+        self._sqlite3 = sqlite3
+
+    def __repr__(self):
+        return "<CompletionCache %s>" % self.path
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # NOTE: the completion cache is best effort, errors accessing the
+        # database are not reported.
+        sqlite3 = self._sqlite3
+        try:
+            conn = sqlite3.connect(self.path, timeout=5)
+        except sqlite3.Error:
+            yield None
+            return
+        try:
+            if not self._initialized:
+                with conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS completion ("
+                                 "scope TEXT, resource TEXT, type TEXT, "
+                                 "value TEXT, PRIMARY KEY "
+                                 "(scope, resource, type, value))")
+                    conn.execute("CREATE INDEX IF NOT EXISTS "
+                                 "completion_value ON completion (value)")
+                self._initialized = True
+        except sqlite3.Error:
+            # NOTE: e.g. a corrupt or locked database.
+            conn.close()
+            yield None
+            return
+        try:
+            with conn:
+                yield conn
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+
+    def _insert(self, conn, resource, cache_type, values):
+        conn.executemany(
+            "INSERT OR IGNORE INTO completion VALUES (?, ?, ?, ?)",
+            [(self.scope, resource, cache_type, six.text_type(value))
+             for value in values])
+
+    def _write_file(self, resource, cache_type, values, mode):
+        cache_dir = os.path.join(os.path.dirname(self.path),
+                                 self.scope or 'default')
+        filename = "%s-%s-cache" % (resource, cache_type.replace('_', '-'))
+        with self.cache_lock:
+            try:
+                if not os.path.isdir(cache_dir):
+                    os.makedirs(cache_dir, 0o755)
+                with open(os.path.join(cache_dir, filename), mode) as f:
+                    for value in values:
+                        f.write("%s\n" % value)
+            except (IOError, OSError):
+                # NOTE: typically a permission denied while attempting to
+                # write the cache file.
+                pass
+
+    def _complete_files(self, resource):
+        base_dir = os.path.dirname(self.path)
+        suffix = "-cache"
+        values = set()
+        with self.cache_lock:
+            try:
+                scopes = os.listdir(base_dir)
+            except OSError:
+                return values
+            for scope in scopes:
+                cache_dir = os.path.join(base_dir, scope)
+                if not os.path.isdir(cache_dir):
+                    continue
+                for filename in os.listdir(cache_dir):
+                    if not filename.endswith(suffix):
+                        continue
+                    if (resource is not None and
+                            not filename.startswith(resource + '-')):
+                        continue
+                    try:
+                        with open(os.path.join(cache_dir, filename)) as f:
+                            values.update(line.strip() for line in f)
+                    except (IOError, OSError):
+                        pass
+        values.discard('')
+        return values
+
+    def add(self, resource, cache_type, values):
+        """Add values of a resource type, e.g. after a creation."""
+        if self._sqlite3 is None:
+            self._write_file(resource, cache_type, values, "a")
+            return
+        with self._connect() as conn:
+            if conn is not None:
+                self._insert(conn, resource, cache_type, values)
+
+    def replace(self, resource, cache_type, values):
+        """Replace all the values of a resource type, e.g. after a listing."""
+        if self._sqlite3 is None:
+            self._write_file(resource, cache_type, values, "w")
+            return
+        with self._connect() as conn:
+            if conn is not None:
+                conn.execute("DELETE FROM completion WHERE scope = ? AND "
+                             "resource = ? AND type = ?",
+                             (self.scope, resource, cache_type))
+                self._insert(conn, resource, cache_type, values)
+
+    def complete(self, prefix='', resource=None):
+        """Return the values starting with ``prefix``, from every scope."""
+        if self._sqlite3 is None:
+            return sorted(value for value in self._complete_files(resource)
+                          if value.startswith(prefix))
+        query = ("SELECT DISTINCT value FROM completion WHERE value >= ? AND "
+                 "substr(value, 1, ?) = ?")
+        params = [prefix, len(prefix), prefix]
+        if resource is not None:
+            query += " AND resource = ?"
+            params.append(resource)
+        values = []
+        with self._connect() as conn:
+            if conn is not None:
+                values = sorted(row[0] for row in
+                                conn.execute(query + " ORDER BY value",
+                                             params))
+        return values
+
+
+class BulkResult(RequestIdMixin):
+    """Outcome of an action applied to a single resource by `Manager.bulk`.
+
+    :ivar resource: the resource (or ID) the action was applied to
+    :ivar result: value returned by the action, None if it failed
+    :ivar error: exception raised by the action, None if it succeeded
+    """
+
+    def __init__(self, resource, result=None, error=None):
+        self.resource = resource
+        self.result = result
+        self.error = error
+        self.request_ids_setup()
+        if isinstance(result, RequestIdMixin):
+            self.append_request_ids(result.request_ids)
+        elif getattr(error, 'request_id', None):
+            self.append_request_ids(error.request_id)
+
+    def __repr__(self):
+        status = "failed" if self.error is not None else "ok"
+        return "<BulkResult %s: %s>" % (getid(self.resource), status)
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+
+class PageIterator(RequestIdMixin):
+    """Iterator over the resources of a listing fetched page by page.
+
+    Only the page being consumed and the next one are held in memory. Unless
+    ``prefetch`` is False, the next page is requested in the background while
+    the caller consumes the current one. The first page is fetched when the
+    iterator is created, so errors are raised by the call creating it.
+
+    :param list_page: callable taking ``marker`` and ``limit`` keyword
+                      arguments and returning a page of resources as a
+                      `ListWithMeta`
+    :param marker: ID of the resource after which the listing starts
+    :param limit: maximum number of resources to return, None (or -1) to
+                  return all of them
+    :param page_size: number of resources requested per page. By default the
+                      maximum page size of the server is used.
+    :param prefetch: whether the next page is fetched in the background
+    :param paginated: False if the listing does not support markers, in which
+                      case a single page is fetched
+    """
+
+    def __init__(self, list_page, marker=None, limit=None, page_size=None,
+                 prefetch=True, paginated=True):
+        self.request_ids_setup()
+        self._list_page = list_page
+        self.limit = None if limit == -1 else limit
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.paginated = paginated
+        first_page = self._fetch(marker, self.limit)
+        self.append_request_ids(getattr(first_page, 'request_ids', None))
+        self._iter = self._iterate(first_page)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iter)
+
+    next = __next__
+
+    def close(self):
+        """Stop the iteration and wait for a pending page request."""
+        self._iter.close()
+
+    def _fetch(self, marker, remaining):
+        if not self.paginated:
+            return self._list_page()
+        limit = self.page_size
+        if remaining is not None:
+            limit = min(limit, remaining) if limit else remaining
+        return self._list_page(marker=marker, limit=limit)
+
+    def _iterate(self, page):
+        executor = futures.ThreadPoolExecutor(1) if self.prefetch else None
+        remaining = self.limit
+        try:
+            while True:
+                self.append_request_ids(getattr(page, 'request_ids', None))
+                if remaining is not None:
+                    page = page[:remaining]
+                    remaining -= len(page)
+                last = (not page or not self.paginated or remaining == 0 or
+                        (self.page_size and len(page) < self.page_size))
+                next_page = None
+                if not last:
+                    marker = page[-1].id
+                    if executor:
+                        next_page = executor.submit(self._fetch, marker,
+                                                    remaining)
+                for item in page:
+                    yield item
+                if last:
+                    return
+                if next_page is not None:
+                    page = next_page.result()
+                else:
+                    page = self._fetch(marker, remaining)
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+
+class ResourceStream(RequestIdMixin):
+    """Iterator over the resources of a listing, built as they are received.
+
+    The response body is parsed incrementally, so the whole listing is never
+    held in memory and the first resources are returned before the last ones
+    are received. The request is sent when the stream is created, so errors
+    are raised by the call creating it.
+
+    :param manager: `Manager` of the resources
+    :param url: URL of the listing
+    :param response_key: key of the list of resources in the response
+    :param obj_class: class of the resources, the ``resource_class`` of the
+                      manager by default
+    :param next_url: callable taking the last resource of a response and
+                     returning the URL of the next listing, or None to stop
+                     (optional)
+    :param fields: attributes to keep in the resources, besides ``id``. The
+                   other ones are skipped without being decoded (optional).
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, manager, url, response_key, obj_class=None,
+                 next_url=None, fields=None):
+        self.request_ids_setup()
+        self.manager = manager
+        self.response_key = response_key
+        self.obj_class = obj_class or manager.resource_class
+        self.fields = _fields_set(fields)
+        self._next_url = next_url
+        self._iter = self._iterate(self._get(url))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iter)
+
+    next = __next__
+
+    def close(self):
+        """Stop the iteration and release the connection."""
+        self._iter.close()
+
+    def _get(self, url):
+        resp, body = self.manager.api.client.get(url, stream=True)
+        self.append_request_ids(resp)
+        return resp, body
+
+    def _iterate(self, response):
+        while response:
+            resp, body = response
+            response = last = None
+            if body is not None:
+                # The client doesn't support streaming and parsed the body.
+                items = body[self.response_key]
+            else:
+                items = utils.iter_json_list(
+                    resp.iter_content(self.chunk_size), self.response_key,
+                    fields=self.fields)
+            try:
+                for item in items:
+                    if item:
+                        last = self.obj_class(self.manager,
+                                              _select(item, self.fields),
+                                              loaded=True)
+                        yield last
+            finally:
+                if body is None:
+                    resp.close()
+            url = None
+            if self._next_url and last is not None:
+                url = self._next_url(last)
+            if url:
+                response = self._get(url)
+
+
 class Manager(HookableMixin):
     """Manager for API service.
 
@@ -229,6 +791,8 @@ class Manager(HookableMixin):
     etc.) and provide CRUD operations for them.
     """
     resource_class = None
+    # NOTE: deprecated, the completion cache isn't protected by this lock
+    # anymore. It's kept for the callers which still hold it.
     cache_lock = threading.RLock()
 
     def __init__(self, api):
@@ -242,7 +806,12 @@ class Manager(HookableMixin):
     def api_version(self):
         return self.api.api_version
 
-    def _list(self, url, response_key, obj_class=None, body=None):
+    def _list(self, url, response_key, obj_class=None, body=None,
+              stream=False, fields=None):
+        if stream and not body:
+            return ResourceStream(self, url, response_key, obj_class,
+                                  fields=fields)
+
         if body:
             resp, body = self.api.client.post(url, body=body)
         else:
@@ -260,30 +829,81 @@ class Manager(HookableMixin):
             except KeyError:
                 pass
 
-        with self.completion_cache('human_id', obj_class, mode="w"):
-            with self.completion_cache('uuid', obj_class, mode="w"):
-                items = [obj_class(self, res, loaded=True)
-                         for res in data if res]
-                return ListWithMeta(items, resp)
+        fields = _fields_set(fields)
+        items = [obj_class(self, _select(res, fields), loaded=True)
+                 for res in data if res]
+        self._write_completion_cache(obj_class, items, replace=True)
+        return ListWithMeta(items, resp)
+
+    def bulk(self, action, resources, max_workers=10, **kwargs):
+        """Apply an action to many resources concurrently.
+
+        :param action: name of a manager method taking the resource as first
+                       argument (e.g. ``'delete'``, ``'stop'``, ``'reboot'``)
+                       or a callable taking a resource
+        :param resources: resources (or their IDs) to act on
+        :param max_workers: maximum number of concurrent requests
+        :param kwargs: extra keyword arguments passed to the action
+        :returns: `ListWithMeta` of `BulkResult` in the order of
+                  ``resources``, carrying the request ids of all calls
+        """
+        if not callable(action):
+            action = getattr(self, action)
+        func = functools.partial(action, **kwargs) if kwargs else action
+
+        results = ListWithMeta([], None)
+        for resource, result, error in utils.run_concurrently(
+                func, resources, max_workers):
+            bulk_result = BulkResult(resource, result, error)
+            results.append(bulk_result)
+            results.append_request_ids(bulk_result.request_ids)
+        return results
 
     @contextlib.contextmanager
     def alternate_service_type(self, default, allowed_types=()):
-        original_service_type = self.api.client.service_type
+        http_client = self.api.client
+        original_service_type = http_client.service_type
         if original_service_type in allowed_types:
             yield
+        elif hasattr(http_client, 'override_service_type'):
+            # NOTE: the other threads sharing the client keep their service
+            # type.
+            with http_client.override_service_type(default):
+                yield
         else:
-            self.api.client.service_type = default
+            http_client.service_type = default
             try:
                 yield
             finally:
-                self.api.client.service_type = original_service_type
+                http_client.service_type = original_service_type
+
+    def _write_completion_cache(self, obj_class, items, replace=False):
+        cache = getattr(self.api, 'completion_cache', None)
+        if cache is None:
+            return
+        uuids = []
+        human_ids = []
+        for item in items:
+            # NOTE: only look at the attributes returned by the server, to
+            # not lazy load resources.
+            info = getattr(item, '_info', {})
+            if info.get('id') is not None:
+                uuids.append(info['id'])
+            if obj_class.HUMAN_ID and info.get(obj_class.NAME_ATTR):
+                human_ids.append(strutils.to_slug(info[obj_class.NAME_ATTR]))
+        resource = obj_class.__name__.lower()
+        write = cache.replace if replace else cache.add
+        write(resource, 'uuid', uuids)
+        write(resource, 'human_id', human_ids)
 
     @contextlib.contextmanager
     def completion_cache(self, cache_type, obj_class, mode):
         """The completion cache for bash autocompletion.
 
         The completion cache store items that can be used for bash
-        autocompletion, like UUIDs or human-friendly IDs.
+        autocompletion, like UUIDs or human-friendly IDs. Values are written
+        to the ``completion_cache`` of the client (see
+        :class:`CompletionCache`), which is only set by the shell.
 
         A resource listing will clear and repopulate the cache.
 
@@ -292,55 +912,15 @@ class Manager(HookableMixin):
         Delete is not handled because listings are assumed to be performed
         often enough to keep the cache reasonably up-to-date.
         """
-        # NOTE(wryan): This lock protects read and write access to the
-        # completion caches
-        with self.cache_lock:
-            base_dir = utils.env('NOVACLIENT_UUID_CACHE_DIR',
-                                 default="~/.novaclient")
-
-            # NOTE(sirp): Keep separate UUID caches for each username +
-            # endpoint pair
-            username = utils.env('OS_USERNAME', 'NOVA_USERNAME')
-            url = utils.env('OS_URL', 'NOVA_URL')
-            uniqifier = hashlib.md5(username.encode('utf-8') +
-                                    url.encode('utf-8')).hexdigest()
-
-            cache_dir = os.path.expanduser(os.path.join(base_dir, uniqifier))
-
-            try:
-                os.makedirs(cache_dir, 0o755)
-            except OSError:
-                # NOTE(kiall): This is typically either permission denied while
-                #              attempting to create the directory, or the
-                #              directory already exists. Either way, don't
-                #              fail.
-                pass
-
-            resource = obj_class.__name__.lower()
-            filename = "%s-%s-cache" % (resource, cache_type.replace('_', '-'))
-            path = os.path.join(cache_dir, filename)
-
-            cache_attr = "_%s_cache" % cache_type
-
-            try:
-                setattr(self, cache_attr, open(path, mode))
-            except IOError:
-                # NOTE(kiall): This is typically a permission denied while
-                #              attempting to write the cache file.
-                pass
-
-            try:
-                yield
-            finally:
-                cache = getattr(self, cache_attr, None)
-                if cache:
-                    cache.close()
-                    delattr(self, cache_attr)
+        cache = getattr(self.api, 'completion_cache', None)
+        if cache is not None and mode == "w":
+            cache.replace(obj_class.__name__.lower(), cache_type, [])
+        yield
 
     def write_to_completion_cache(self, cache_type, val):
-        cache = getattr(self, "_%s_cache" % cache_type, None)
-        if cache:
-            cache.write("%s\n" % val)
+        cache = getattr(self.api, 'completion_cache', None)
+        if cache is not None:
+            cache.add(self.resource_class.__name__.lower(), cache_type, [val])
 
     def _get(self, url, response_key):
         resp, body = self.api.client.get(url)
@@ -351,23 +931,31 @@ class Manager(HookableMixin):
         return self.resource_class(self, content, loaded=True,
                                    resp=resp)
 
+    def _invalidate_index(self):
+        index = getattr(self.api, 'resource_index', None)
+        if index is not None:
+            index.invalidate(self)
+
     def _create(self, url, body, response_key, return_raw=False, **kwargs):
         self.run_hooks('modify_body_for_create', body, **kwargs)
         resp, body = self.api.client.post(url, body=body)
+        self._invalidate_index()
         if return_raw:
             return self.convert_into_with_meta(body[response_key], resp)
 
-        with self.completion_cache('human_id', self.resource_class, mode="a"):
-            with self.completion_cache('uuid', self.resource_class, mode="a"):
-                return self.resource_class(self, body[response_key], resp=resp)
+        resource = self.resource_class(self, body[response_key], resp=resp)
+        self._write_completion_cache(self.resource_class, [resource])
+        return resource
 
     def _delete(self, url):
         resp, body = self.api.client.delete(url)
+        self._invalidate_index()
         return self.convert_into_with_meta(body, resp)
 
     def _update(self, url, body, response_key=None, **kwargs):
         self.run_hooks('modify_body_for_update', body, **kwargs)
         resp, body = self.api.client.put(url, body=body)
+        self._invalidate_index()
         if body:
             if response_key:
                 return self.resource_class(self, body[response_key], resp=resp)
@@ -398,6 +986,24 @@ class Manager(HookableMixin):
 class ManagerWithFind(Manager):
     """Like a `Manager`, but with additional `find()`/`findall()` methods."""
 
+    # Attributes which findall() passes as search options to list() when it
+    # supports them, so that the server narrows the listing. The server may
+    # ignore some of them (e.g. admin-only filters), so they are compared
+    # again on the client side.
+    search_opts_filters = ('all_tenants', 'deleted')
+
+    # Search options which are not compared on the client side, because the
+    # resources don't have them as attributes or hold them differently.
+    search_opts_unchecked = ('all_tenants', 'deleted')
+
+    # Attributes of the resources compared with search options named
+    # differently.
+    search_opts_attributes = {}
+
+    # Maximum number of concurrent requests made by findall() to get the
+    # details of resources listed without details.
+    findall_max_workers = 10
+
     @abc.abstractmethod
     def list(self):
         pass
@@ -418,6 +1024,7 @@ class ManagerWithFind(Manager):
     def findall(self, **kwargs):
         """Find all items with attributes matching ``**kwargs``."""
         found = ListWithMeta([], None)
+        fields = kwargs.pop('fields', None)
         searches = kwargs.items()
 
         detailed = True
@@ -445,37 +1052,62 @@ class ManagerWithFind(Manager):
             # volumes does not support regex while servers does. So when
             # doing findall on servers some client side filtering is still
             # needed.
+            search_opts = {}
             if "human_id" in kwargs:
-                list_kwargs['search_opts'] = {"name": kwargs["human_id"]}
+                search_opts["name"] = kwargs["human_id"]
             elif "name" in kwargs:
-                list_kwargs['search_opts'] = {"name": kwargs["name"]}
+                search_opts["name"] = kwargs["name"]
             elif "display_name" in kwargs:
-                list_kwargs['search_opts'] = {"name": kwargs["display_name"]}
-            if "all_tenants" in kwargs:
-                all_tenants = kwargs['all_tenants']
-                list_kwargs['search_opts']['all_tenants'] = all_tenants
-                searches = [(k, v) for k, v in searches if k != 'all_tenants']
-            if "deleted" in kwargs:
-                deleted = kwargs['deleted']
-                list_kwargs['search_opts']['deleted'] = deleted
-                searches = [(k, v) for k, v in searches if k != 'deleted']
+                search_opts["name"] = kwargs["display_name"]
+            # NOTE: values which are not scalars (e.g. the flavor dict of a
+            # server) can't be passed as search options, compare them on the
+            # client side instead.
+            pushed = [attr for attr in self.search_opts_filters
+                      if attr in kwargs and
+                      not isinstance(kwargs[attr], (dict, list, tuple))]
+            for attr in pushed:
+                search_opts[attr] = getid(kwargs[attr])
+            searches = [(self.search_opts_attributes.get(k, k), v)
+                        for k, v in searches
+                        if k not in pushed or
+                        k not in self.search_opts_unchecked]
+            list_kwargs['search_opts'] = search_opts
+            if 'detailed' in list_kwargs:
+                # NOTE: the name is filtered by the server as well, so the
+                # detailed listing only returns the candidates. This saves
+                # a request per match compared to getting them one by one.
+                detailed = list_kwargs['detailed'] = True
+
+        if fields is not None and 'fields' in list_argspec:
+            # NOTE: keep the attributes compared on the client side too.
+            fields = set(fields) | set(k for k, v in searches)
+            if 'human_id' in fields:
+                fields.add(self.resource_class.NAME_ATTR)
+            list_kwargs['fields'] = fields
 
         listing = self.list(**list_kwargs)
         found.append_request_ids(listing.request_ids)
 
+        matches = []
         for obj in listing:
             try:
                 if all(getattr(obj, attr) == value
                         for (attr, value) in searches):
-                    if detailed:
-                        found.append(obj)
-                    else:
-                        detail = self.get(obj.id)
-                        found.append(detail)
-                        found.append_request_ids(detail.request_ids)
+                    matches.append(obj)
             except AttributeError:
                 continue
 
+        if detailed:
+            found.extend(matches)
+            return found
+
+        for obj, detail, error in utils.run_concurrently(
+                lambda obj: self.get(obj.id), matches,
+                self.findall_max_workers):
+            if error is not None:
+                raise error
+            found.append(detail)
+            found.append_request_ids(detail.request_ids)
         return found
 
 
@@ -523,6 +1155,37 @@ class ListWithMeta(list, RequestIdMixin):
         self.request_ids_setup()
         self.append_request_ids(resp)
 
+    def enable_hydration(self, loader=None, max_workers=10):
+        """Lazy load the details of all the resources of the list at once.
+
+        Accessing a missing attribute of any resource of the list loads the
+        details of every resource of the list, instead of issuing one request
+        per resource.
+
+        :param loader: callable taking the resources and returning their
+                       detailed version, e.g. a detailed listing. By default
+                       the resources are fetched concurrently with
+                       ``manager.get``.
+        :param max_workers: maximum number of concurrent requests made by the
+                            default loader
+        :returns: the list itself
+        """
+        if loader is None:
+            def loader(resources):
+                for resource, result, error in utils.run_concurrently(
+                        lambda r: r.manager.get(r.id), resources,
+                        max_workers):
+                    if error is None:
+                        yield result
+
+        resources = [r for r in self
+                     if isinstance(r, Resource) and r.manager is not None]
+        group = _HydrationGroup(resources, loader)
+        for resource in resources:
+            resource._hydration_group = group
+            resource.set_loaded(False)
+        return self
+
 
 class DictWithMeta(dict, RequestIdMixin):
     def __init__(self, values, resp):
@@ -20,23 +20,31 @@
 OpenStack Client interface. Handles the REST calls and responses.
 """
 
+import contextlib
 import copy
 import functools
 import glob
 import hashlib
 import imp
+import inspect
 import itertools
 import logging
 import os
 import pkgutil
+import random
 import re
+import sys
+import threading
+import time
 import warnings
+import weakref
 
 from keystoneauth1 import adapter
 from keystoneauth1 import session
+from oslo_utils import encodeutils
 from oslo_utils import importutils
 from oslo_utils import netutils
-import pkg_resources
+from oslo_utils import timeutils
 import requests
 
 try:
@@ -44,7 +52,11 @@ try:
 except ImportError:
     import simplejson as json
 
+import six
 from six.moves.urllib import parse
+import urllib3
+from urllib3 import connectionpool
+from urllib3 import poolmanager
 
 from novaclient import api_versions
 from novaclient import exceptions
@@ -59,18 +71,398 @@ from novaclient import utils
 # remove the whole function
 extensions_ignored_name = ["__init__"]
 
+# (fingerprint, extensions) discovered in this process, keyed like the
+# entries of the cache file of discover_extensions.
+_DISCOVERED_EXTENSIONS = {}
 
-class _ClientConnectionPool(object):
+# Tokens expiring within TOKEN_REFRESH_WINDOW seconds are replaced in the
+# background, tokens expiring within TOKEN_EXPIRY_WINDOW seconds are replaced
+# before sending the request.
+TOKEN_REFRESH_WINDOW = 300
+TOKEN_EXPIRY_WINDOW = 120
+
+orjson = importutils.try_import('orjson')
+ujson = importutils.try_import('ujson')
+
+
+def _json_loads(data):
+    if isinstance(data, six.binary_type):
+        data = encodeutils.safe_decode(data, 'utf-8')
+    return json.loads(data)
+
+
+class JSONCodec(object):
+    """Serialize request bodies and parse response bodies as JSON.
+
+    Responses are parsed from their raw bytes rather than from their text,
+    which requests may have to guess the encoding of. ``orjson`` or
+    ``ujson`` are used to parse them when installed.
+
+    :param loads: callable parsing JSON from bytes or text (optional)
+    :param dumps: callable serializing an object to JSON (optional)
+    """
+
+    def __init__(self, loads=None, dumps=None):
+        if loads is None:
+            loads = (orjson and orjson.loads) or (ujson and ujson.loads)
+        self.loads = loads or _json_loads
+        self.dumps = dumps or json.dumps
+
+    def encode(self, obj):
+        """Serialize ``obj`` to JSON."""
+        return self.dumps(obj)
+
+    def decode(self, data):
+        """Parse JSON bytes or text, returning None when they are empty.
+
+        :raises ValueError: if ``data`` isn't valid JSON
+        """
+        if not data:
+            return None
+        return self.loads(data)
 
-    def __init__(self):
-        self._adapters = {}
+
+# NOTE: the pool stats hook into private methods of urllib3, which are
+# checked for here. They are only collected when requests uses this urllib3
+# (rather than a vendored copy), from 1.21.1 to 2.x.
+_POOL_STATS_SUPPORTED = (
+    getattr(requests.adapters, 'PoolManager', None) is urllib3.PoolManager and
+    hasattr(poolmanager, 'pool_classes_by_scheme') and
+    all(hasattr(connectionpool.HTTPConnectionPool, name)
+        for name in ('_get_conn', '_put_conn', '_new_conn')))
+
+
+class _StatsPoolMixin(object):
+    """urllib3 connection pool reporting to a :class:`ConnectionPool`."""
+
+    def __init__(self, *args, **kwargs):
+        self._owner = kwargs.pop('owner')
+        super(_StatsPoolMixin, self).__init__(*args, **kwargs)
+
+    def _get_conn(self, timeout=None):
+        # NOTE: the queue holds a None placeholder for each connection not
+        # opened yet, so it's only empty when all of them are in use.
+        if self.block and self.pool is not None and self.pool.empty():
+            self._owner._count('waits')
+        conn = super(_StatsPoolMixin, self)._get_conn(timeout=timeout)
+        idle_timeout = self._owner.idle_timeout
+        idle_since = getattr(conn, '_novaclient_idle_since', None)
+        if (conn.sock is not None and idle_timeout is not None and
+                idle_since is not None and
+                time.time() - idle_since >= idle_timeout):
+            conn.close()
+        self._owner._count('hits' if conn.sock is not None
+                           else 'new_connections')
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._novaclient_idle_since = time.time()
+        super(_StatsPoolMixin, self)._put_conn(conn)
+
+
+class _HTTPConnectionPool(_StatsPoolMixin, connectionpool.HTTPConnectionPool):
+    pass
+
+
+class _HTTPSConnectionPool(_StatsPoolMixin,
+                           connectionpool.HTTPSConnectionPool):
+    pass
+
+
+class _PoolAdapter(session.TCPKeepAliveAdapter):
+    """HTTP adapter opening the connections of a :class:`ConnectionPool`."""
+
+    def __init__(self, owner):
+        self._owner = owner
+        super(_PoolAdapter, self).__init__(
+            pool_connections=owner.pool_connections,
+            pool_maxsize=owner.pool_maxsize,
+            pool_block=owner.block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._owner.keepalive:
+            super(_PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        else:
+            requests.adapters.HTTPAdapter.init_poolmanager(self, *args,
+                                                           **kwargs)
+        if not _POOL_STATS_SUPPORTED:
+            return
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': functools.partial(_HTTPConnectionPool, owner=self._owner),
+            'https': functools.partial(_HTTPSConnectionPool,
+                                       owner=self._owner),
+        }
+
+
+class ConnectionPool(object):
+    """Pool of HTTP connections reused by the requests of a client.
+
+    A single pool can be shared by several clients and threads. It's used by
+    clients authenticating with a keystoneauth session as well as by the
+    clients created with ``connection_pool=True``. All the requests go
+    through a single HTTP adapter, the limits below apply to all of them.
+
+    :param pool_connections: Number of hosts whose connections are kept
+    :param pool_maxsize: Maximum number of connections kept per host
+    :param block: Wait for a connection to be released when
+                  ``pool_maxsize`` connections to the host are in use,
+                  instead of opening one which is closed after the request
+    :param keepalive: Enable TCP keep-alive on the connections
+    :param idle_timeout: Open a new connection instead of reusing one unused
+                         for this number of seconds. None reuses connections
+                         until the server closes them.
+    """
+
+    STATS = ('hits', 'new_connections', 'waits')
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, block=False,
+                 keepalive=True, idle_timeout=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.block = block
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self._adapter = None
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(self.STATS, 0)
+
+    def __repr__(self):
+        return ("<ConnectionPool pool_connections=%s pool_maxsize=%s>"
+                % (self.pool_connections, self.pool_maxsize))
 
     def get(self, url):
-        """Store and reuse HTTP adapters per Service URL."""
-        if url not in self._adapters:
-            self._adapters[url] = session.TCPKeepAliveAdapter()
+        """Return the HTTP adapter of the pool, shared by all the URLs."""
+        if self._adapter is None:
+            with self._lock:
+                if self._adapter is None:
+                    self._adapter = _PoolAdapter(self)
+        return self._adapter
+
+    def mount(self, requests_session):
+        """Send all the HTTP(S) requests of a ``requests.Session`` here."""
+        for prefix in ('https://', 'http://'):
+            requests_session.mount(prefix, self.get(prefix))
+
+    def get_stats(self):
+        """Return the number of connections reused (``hits``), opened
+        (``new_connections``) and waited for (``waits``).
+
+        The stats stay at 0 with urllib3 versions which can't report them.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self.STATS, 0)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
 
-        return self._adapters[url]
+
+class _RequestState(object):
+    """Session and last request of an HTTPClient."""
+
+    def __init__(self):
+        self.session = None
+        self.current_url = None
+        self.last_request_id = None
+
+
+class _ThreadRequestState(threading.local, _RequestState):
+    """Session and last request of an HTTPClient, per thread."""
+
+
+class _ServiceTypeMixin(object):
+    """Service type of a client, which a thread can override for itself.
+
+    :meth:`override_service_type` lets managers send a few requests to
+    another service (e.g. the image API) without changing the service type
+    seen by the other threads sharing the client.
+    """
+
+    @property
+    def service_type(self):
+        overrides = self.__dict__.get('_service_type_overrides')
+        service_type = getattr(overrides, 'service_type', None)
+        if service_type is not None:
+            return service_type
+        return self.__dict__.get('_service_type')
+
+    @service_type.setter
+    def service_type(self, value):
+        self.__dict__['_service_type'] = value
+
+    @contextlib.contextmanager
+    def override_service_type(self, service_type):
+        """Use another service type in the calling thread."""
+        overrides = self.__dict__.setdefault('_service_type_overrides',
+                                             threading.local())
+        previous = getattr(overrides, 'service_type', None)
+        overrides.service_type = service_type
+        try:
+            yield
+        finally:
+            overrides.service_type = previous
+
+
+class RetryPolicy(object):
+    """Retry policy for requests rejected because of rate limits or outages.
+
+    Requests failing with one of ``status_codes`` are retried with an
+    exponential backoff and random jitter. The delay requested by the server
+    through ``Retry-After`` (or ``retryAfter`` in the fault body) is honored
+    when it is longer than the computed backoff.
+
+    :param max_retries: Maximum number of retries of a single request
+    :param backoff: Delay before the first retry, in seconds. It is doubled
+                    for each following retry.
+    :param max_backoff: Upper bound of the computed backoff, in seconds
+    :param jitter: Ratio of the backoff randomly added or removed, in [0, 1]
+    :param deadline: Maximum time spent on a request including all retries,
+                     in seconds. None disables the deadline.
+    :param methods: HTTP methods which are safe to retry
+    :param status_codes: HTTP status codes which trigger a retry
+    """
+
+    DEFAULT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+    DEFAULT_STATUS_CODES = (413, 429, 503)
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30,
+                 jitter=0.2, deadline=None, methods=DEFAULT_METHODS,
+                 status_codes=DEFAULT_STATUS_CODES):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.methods = frozenset(m.upper() for m in methods)
+        self.status_codes = frozenset(status_codes)
+
+    def get_delay(self, method, status_code, attempt, elapsed,
+                  retry_after=None):
+        """Return the time to wait before retrying, None to give up.
+
+        :param method: HTTP method of the failed request
+        :param status_code: HTTP status code of the failed request
+        :param attempt: number of retries already done for the request
+        :param elapsed: time spent on the request so far, in seconds
+        :param retry_after: Retry-After value sent by the server
+        """
+        if (attempt >= self.max_retries or
+                method.upper() not in self.methods or
+                status_code not in self.status_codes):
+            return None
+
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        delay += delay * self.jitter * random.uniform(-1, 1)
+        try:
+            delay = max(delay, float(retry_after or 0))
+        except ValueError:
+            # NOTE: Retry-After may also be a HTTP-date, which Nova never
+            # sends. Fall back to the computed backoff.
+            pass
+
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        return delay
+
+
+class _TokenBucket(object):
+    """Token bucket refilled with ``value`` tokens every ``period`` seconds.
+
+    Tokens are reserved rather than waited for: a caller taking a token from
+    an empty bucket gets the time to wait for its turn, so concurrent callers
+    are spread over time without holding the lock while sleeping.
+    """
+
+    def __init__(self, value, period, tokens=None, clock=time.time):
+        self.capacity = float(value)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity if tokens is None else float(tokens)
+        self._clock = clock
+        self._updated = clock()
+
+    def reserve(self):
+        now = self._clock()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0
+        return -self.tokens / self.rate
+
+
+class RateLimiter(object):
+    """Client-side limiter applying the rate limits of the deployment.
+
+    Each rate limit (as returned by ``LimitsManager.get().rate``) gets a
+    token bucket matching requests by HTTP verb and by the limit regex
+    applied to the request path and query string, like Nova does. The
+    limiter is thread-safe, so a single instance can be shared by several
+    clients, threads and asyncio tasks dispatched through
+    :mod:`novaclient.aio`.
+
+    :param rate_limits: iterable of objects with ``verb``, ``regex``,
+                        ``value``, ``unit`` and ``remain`` attributes, such
+                        as :class:`novaclient.v2.limits.RateLimit`
+    :param clock: function returning the current time, in seconds
+    """
+
+    UNITS = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400}
+
+    def __init__(self, rate_limits, clock=time.time):
+        self._lock = threading.Lock()
+        self._rules = []
+        for limit in rate_limits:
+            period = self.UNITS.get(str(limit.unit).upper())
+            if not period or not limit.value:
+                continue
+            bucket = _TokenBucket(limit.value, period,
+                                  tokens=getattr(limit, 'remain', None),
+                                  clock=clock)
+            self._rules.append((limit.verb.upper(), re.compile(limit.regex),
+                                bucket))
+
+    def __repr__(self):
+        return "<RateLimiter rules=%s>" % len(self._rules)
+
+    def reserve(self, method, url):
+        """Take a token for a request, return the time to wait before it.
+
+        :param method: HTTP method of the request
+        :param url: URL of the request, relative to the compute endpoint
+        """
+        method = method.upper()
+        with self._lock:
+            return max([bucket.reserve()
+                        for verb, regex, bucket in self._rules
+                        if verb == method and regex.match(url)] or [0])
+
+
+def _throttle(limiter, logger, times, timings, method, url):
+    if limiter is None:
+        return
+    delay = limiter.reserve(method, url)
+    if delay <= 0:
+        return
+    logger.debug("Throttling %(method)s %(url)s for %(delay).2f seconds",
+                 {'method': method, 'url': url, 'delay': delay})
+    with utils.record_time(times, timings, method, url, '(throttled)'):
+        time.sleep(delay)
+
+
+def _sleep_before_retry(logger, times, timings, method, url, attempt, delay):
+    logger.debug("Retrying %(method)s %(url)s in %(delay).2f seconds "
+                 "(retry %(attempt)s)",
+                 {'method': method, 'url': url, 'delay': delay,
+                  'attempt': attempt})
+    with utils.record_time(times, timings, method, url,
+                           '(retry %s backoff)' % attempt):
+        time.sleep(delay)
 
 
 def _log_request_id(logger, resp, service_name):
@@ -85,13 +477,16 @@ def _log_request_id(logger, resp, service_name):
                       'response_request_id': request_id})
 
 
-class SessionClient(adapter.LegacyJsonAdapter):
+class SessionClient(_ServiceTypeMixin, adapter.LegacyJsonAdapter):
 
     def __init__(self, *args, **kwargs):
         self.times = []
         self.timings = kwargs.pop('timings', False)
         self.api_version = kwargs.pop('api_version', None)
         self.api_version = self.api_version or api_versions.APIVersion()
+        self.retry_policy = kwargs.pop('retry_policy', None)
+        self.rate_limiter = kwargs.pop('rate_limiter', None)
+        self.json_codec = kwargs.pop('json_codec', None) or JSONCodec()
         super(SessionClient, self).__init__(*args, **kwargs)
 
     def request(self, url, method, **kwargs):
@@ -100,11 +495,32 @@ class SessionClient(adapter.LegacyJsonAdapter):
         # NOTE(jamielennox): The standard call raises errors from
         # keystoneauth1, where we need to raise the novaclient errors.
         raise_exc = kwargs.pop('raise_exc', True)
-        with utils.record_time(self.times, self.timings, method, url):
-            resp, body = super(SessionClient, self).request(url,
-                                                            method,
-                                                            raise_exc=False,
-                                                            **kwargs)
+        kwargs["headers"].setdefault('Accept', 'application/json')
+        if 'body' in kwargs:
+            kwargs["headers"]['Content-Type'] = 'application/json'
+            kwargs['data'] = self.json_codec.encode(kwargs.pop('body'))
+        logger = self.logger or logging.getLogger(__name__)
+        start = time.time()
+        attempt = 0
+        while True:
+            _throttle(self.rate_limiter, logger, self.times, self.timings,
+                      method, url)
+            with utils.record_time(self.times, self.timings, method, url):
+                # The body is parsed with the json_codec rather than by
+                # LegacyJsonAdapter.
+                resp = adapter.Adapter.request(
+                    self, url, method, raise_exc=False, **kwargs)
+                body = self._decode_body(resp, kwargs.get('stream'))
+            if not self.retry_policy or resp.status_code < 400:
+                break
+            delay = self.retry_policy.get_delay(
+                method, resp.status_code, attempt, time.time() - start,
+                exceptions.get_retry_after(resp, body))
+            if delay is None:
+                break
+            attempt += 1
+            _sleep_before_retry(logger, self.times, self.timings, method, url,
+                                attempt, delay)
 
         # if service name is None then use service_type for logging
         service = self.service_name or self.service_type
@@ -118,6 +534,15 @@ class SessionClient(adapter.LegacyJsonAdapter):
 
         return resp, body
 
+    def _decode_body(self, resp, stream=False):
+        if stream and resp.status_code < 400:
+            # The caller reads the body from the response.
+            return None
+        try:
+            return self.json_codec.decode(resp.content)
+        except ValueError:
+            return None
+
     def get_timings(self):
         return self.times
 
@@ -146,8 +571,17 @@ def _original_only(f):
     return wrapper
 
 
-class HTTPClient(object):
+class HTTPClient(_ServiceTypeMixin):
+    """HTTP client of the compute API, authenticating with keystone v2.0.
+
+    With ``thread_safe``, the client can be shared by several threads: each
+    thread gets its own HTTP session and ``last_request_id``, and the
+    authentication is done once for all of them.
+    """
+
     USER_AGENT = 'python-novaclient'
+    thread_safe = False
+    _sessions_opened = False
 
     def __init__(self, user, password, projectid=None, auth_url=None,
                  insecure=False, timeout=None, proxy_tenant_id=None,
@@ -159,7 +593,8 @@ class HTTPClient(object):
                  http_log_debug=False, auth_token=None,
                  cacert=None, tenant_id=None, user_id=None,
                  connection_pool=False, api_version=None,
-                 logger=None):
+                 logger=None, retry_policy=None, rate_limiter=None,
+                 json_codec=None, thread_safe=False):
         self.user = user
         self.user_id = user_id
         self.password = password
@@ -167,8 +602,12 @@ class HTTPClient(object):
         self.tenant_id = tenant_id
         self.api_version = api_version or api_versions.APIVersion()
 
-        self._connection_pool = (_ClientConnectionPool()
-                                 if connection_pool else None)
+        if isinstance(connection_pool, bool):
+            connection_pool = ConnectionPool() if connection_pool else None
+        self._connection_pool = connection_pool
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.json_codec = json_codec or JSONCodec()
 
         # This will be called by #_get_password if self.password is None.
         # EG if a password can only be obtained by prompting the user, but a
@@ -196,6 +635,8 @@ class HTTPClient(object):
 
         self.management_url = self.bypass_url or None
         self.auth_token = auth_token
+        # Expiry of auth_token, when known from the service catalog.
+        self.token_expires = None
         self.proxy_token = proxy_token
         self.proxy_tenant_id = proxy_tenant_id
         self.keyring_saver = None
@@ -209,8 +650,12 @@ class HTTPClient(object):
             else:
                 self.verify_cert = True
 
-        self._session = None
-        self._current_url = None
+        self.thread_safe = thread_safe
+        self._state = (_ThreadRequestState() if thread_safe
+                       else _RequestState())
+        # Sessions opened by the threads, in thread-safe mode
+        self._thread_sessions = weakref.WeakSet()
+        self._thread_sessions_lock = threading.Lock()
         self._logger = logger or logging.getLogger(__name__)
 
         if (self.http_log_debug and logger is None and
@@ -229,7 +674,38 @@ class HTTPClient(object):
 
         self.service_catalog = None
         self.services_url = {}
-        self.last_request_id = None
+        self._auth_lock = threading.Lock()
+        self._refresh_thread = None
+
+    def _get_state(self):
+        state = self.__dict__.get('_state')
+        if state is None:
+            state = self.__dict__.setdefault('_state', _RequestState())
+        return state
+
+    @property
+    def _session(self):
+        return self._get_state().session
+
+    @_session.setter
+    def _session(self, value):
+        self._get_state().session = value
+
+    @property
+    def _current_url(self):
+        return self._get_state().current_url
+
+    @_current_url.setter
+    def _current_url(self, value):
+        self._get_state().current_url = value
+
+    @property
+    def last_request_id(self):
+        return self._get_state().last_request_id
+
+    @last_request_id.setter
+    def last_request_id(self, value):
+        self._get_state().last_request_id = value
 
     def use_token_cache(self, use_it):
         self.os_cache = use_it
@@ -238,6 +714,7 @@ class HTTPClient(object):
         """Forget all of our authentication information."""
         self.management_url = None
         self.auth_token = None
+        self.token_expires = None
 
     def set_management_url(self, url):
         self.management_url = url
@@ -306,18 +783,20 @@ class HTTPClient(object):
             string_parts.append(header)
 
         if 'data' in kwargs:
-            data = json.loads(kwargs['data'])
+            data = self.json_codec.decode(kwargs['data'])
             self._redact(data, ['auth', 'passwordCredentials', 'password'])
-            string_parts.append(" -d '%s'" % json.dumps(data))
+            string_parts.append(" -d '%s'" %
+                                encodeutils.safe_decode(
+                                    self.json_codec.encode(data)))
         self._logger.debug("REQ: %s" % "".join(string_parts))
 
     def http_log_resp(self, resp):
         if not self.http_log_debug:
             return
 
-        if resp.text and resp.status_code != 400:
+        if resp.content and resp.status_code != 400:
             try:
-                body = json.loads(resp.text)
+                body = self.json_codec.decode(resp.content)
                 self._redact(body, ['access', 'token', 'id'])
             except ValueError:
                 body = None
@@ -327,7 +806,8 @@ class HTTPClient(object):
         self._logger.debug("RESP: [%(status)s] %(headers)s\nRESP BODY: "
                            "%(text)s\n", {'status': resp.status_code,
                                           'headers': resp.headers,
-                                          'text': json.dumps(body)})
+                                          'text': encodeutils.safe_decode(
+                                              self.json_codec.encode(body))})
 
         # if service name is None then use service_type for logging
         service = self.service_name or self.service_type
@@ -335,12 +815,31 @@ class HTTPClient(object):
 
     def open_session(self):
         if not self._connection_pool:
-            self._session = requests.Session()
+            self._session = self._open_thread_session()
+            # NOTE: in thread-safe mode, the other threads open their own
+            # session on their first request.
+            self._sessions_opened = True
 
     def close_session(self):
-        if self._session and not self._connection_pool:
+        self._sessions_opened = False
+        if self._connection_pool:
+            return
+        if self.thread_safe:
+            with self._thread_sessions_lock:
+                sessions = list(self._thread_sessions)
+                self._thread_sessions.clear()
+            for http_session in sessions:
+                http_session.close()
+        elif self._session:
             self._session.close()
-            self._session = None
+        self._session = None
+
+    def _open_thread_session(self):
+        http_session = requests.Session()
+        if self.thread_safe:
+            with self._thread_sessions_lock:
+                self._thread_sessions.add(http_session)
+        return http_session
 
     def _get_session(self, url):
         if self._connection_pool:
@@ -348,9 +847,9 @@ class HTTPClient(object):
             scheme, netloc, path, query, frag = magic_tuple
             service_url = '%s://%s' % (scheme, netloc)
             if self._current_url != service_url:
-                # Invalidate Session object in case the url is somehow changed
-                if self._session:
-                    self._session.close()
+                # Invalidate Session object in case the url is somehow changed.
+                # NOTE: it isn't closed, which would close the connections
+                # of the pool, shared with the other sessions.
                 self._current_url = service_url
                 self._logger.debug(
                     "New session created for: (%s)" % service_url)
@@ -358,6 +857,17 @@ class HTTPClient(object):
                 self._session.mount(service_url,
                                     self._connection_pool.get(service_url))
             return self._session
+        elif self.thread_safe:
+            # NOTE: the session of the thread may have been closed by
+            # close_session() in another thread.
+            http_session = self._session
+            if (http_session is not None and
+                    http_session in self._thread_sessions):
+                return http_session
+            self._session = None
+            if self._sessions_opened:
+                self._session = self._open_thread_session()
+                return self._session
         elif self._session:
             return self._session
 
@@ -367,7 +877,7 @@ class HTTPClient(object):
         kwargs['headers']['Accept'] = 'application/json'
         if 'body' in kwargs:
             kwargs['headers']['Content-Type'] = 'application/json'
-            kwargs['data'] = json.dumps(kwargs.pop('body'))
+            kwargs['data'] = self.json_codec.encode(kwargs.pop('body'))
         api_versions.update_headers(kwargs["headers"], self.api_version)
         if self.timeout is not None:
             kwargs.setdefault('timeout', self.timeout)
@@ -391,7 +901,10 @@ class HTTPClient(object):
 
         self.http_log_resp(resp)
 
-        if resp.text:
+        if kwargs.get('stream') and resp.status_code < 400:
+            # The caller reads the body from the response.
+            body = None
+        elif resp.content:
             # TODO(dtroyer): verify the note below in a requests context
             # NOTE(alaski): Because force_exceptions_to_status_code=True
             # httplib2 returns a connection refused event as a 400 response.
@@ -403,7 +916,7 @@ class HTTPClient(object):
                         'actively refused' in resp.text):
                     raise exceptions.ConnectionRefused(resp.text)
             try:
-                body = json.loads(resp.text)
+                body = self.json_codec.decode(resp.content)
             except ValueError:
                 body = None
         else:
@@ -421,9 +934,126 @@ class HTTPClient(object):
             resp, body = self.request(url, method, **kwargs)
         return resp, body
 
+    def _retry_request(self, url, method, path=None, **kwargs):
+        # NOTE: path is the URL relative to the endpoint, which is what the
+        # rate limits of the deployment are matched against.
+        start = time.time()
+        attempt = 0
+        while True:
+            _throttle(self.rate_limiter, self._logger, self.times,
+                      self.timings, method, path or url)
+            try:
+                return self._time_request(url, method, **kwargs)
+            except exceptions.ClientException as e:
+                if not self.retry_policy:
+                    raise
+                delay = self.retry_policy.get_delay(
+                    method, e.code, attempt, time.time() - start,
+                    getattr(e, 'retry_after', None))
+                if delay is None:
+                    raise
+            attempt += 1
+            _sleep_before_retry(self._logger, self.times, self.timings,
+                                method, url, attempt, delay)
+
+    def _can_refresh_token(self):
+        # NOTE: a token obtained from another token keeps its expiry, and
+        # a password can't be prompted for in the background. Only keystone
+        # v2.0 tokens expire.
+        return bool(self.token_expires and self.password and
+                    not self.proxy_token and self.version == "v2.0")
+
+    def _check_token_expiry(self):
+        """Replace the token before it expires.
+
+        When the token enters ``TOKEN_REFRESH_WINDOW`` it is replaced before
+        the request is sent. With ``thread_safe``, it is replaced by a
+        background thread while requests keep using it, unless it is still
+        there within ``TOKEN_EXPIRY_WINDOW``.
+        """
+        expires = self.token_expires
+        if (not self._can_refresh_token() or
+                not timeutils.is_soon(expires, TOKEN_REFRESH_WINDOW)):
+            return
+        if (not self.thread_safe or
+                timeutils.is_soon(expires, TOKEN_EXPIRY_WINDOW)):
+            # NOTE: without thread_safe, the client can't change while
+            # another request is being sent.
+            self._refresh_token(expires)
+            return
+        thread = self._refresh_thread
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=self._refresh_token,
+                                      args=(expires, True))
+            thread.daemon = True
+            self._refresh_thread = thread
+            thread.start()
+
+    def _refresh_token(self, expires, background=False):
+        """Get a new token, unless another thread already did.
+
+        In the background, the token is got by a copy of the client with its
+        own session and timings, and replaces the current one only once it
+        is known.
+        """
+        with self._auth_lock:
+            if self.token_expires != expires:
+                return
+            refresher = self
+            if background:
+                refresher = copy.copy(self)
+                refresher.__dict__['_state'] = _RequestState()
+                refresher.thread_safe = False
+                refresher.times = []
+            try:
+                auth_url = refresher.auth_url
+                while auth_url:
+                    auth_url = refresher._v2_auth(auth_url, use_token=False)
+            except Exception:
+                # NOTE: the current token is kept, a request failing with it
+                # authenticates again.
+                self._logger.debug("Unable to refresh the auth token",
+                                   exc_info=True)
+                return
+            if refresher is not self:
+                self.auth_url = refresher.auth_url
+                self.service_catalog = refresher.service_catalog
+                self.tenant_id = refresher.tenant_id
+                self.management_url = refresher.management_url
+                self.auth_token = refresher.auth_token
+                self.token_expires = refresher.token_expires
+            self.keyring_saved = False
+            self._save_keys()
+
+    def _authenticate_once(self):
+        """Authenticate, unless another thread already did meanwhile."""
+        with self._auth_lock:
+            if not self.management_url:
+                self.authenticate()
+
+    def _reauthenticate(self, failed_token):
+        """Replace a token rejected by the server.
+
+        Threads getting a 401 at the same time authenticate only once.
+        """
+        with self._auth_lock:
+            if self.auth_token and self.auth_token != failed_token:
+                return
+            # first discard auth token, to avoid the possibly expired
+            # token being re-used in the re-authentication attempt. The
+            # management URL is kept for the requests of other threads.
+            self.auth_token = None
+            self.token_expires = None
+            # overwrite bad token
+            self.keyring_saved = False
+            self.authenticate()
+
     def _cs_request(self, url, method, **kwargs):
         if not self.management_url:
-            self.authenticate()
+            self._authenticate_once()
+        else:
+            self._check_token_expiry()
+        path = url
         if url is None:
             # To get API version information, it is necessary to GET
             # a nova endpoint directly without "v2/<tenant-id>".
@@ -445,18 +1075,15 @@ class HTTPClient(object):
             if self.projectid:
                 kwargs['headers']['X-Auth-Project-Id'] = self.projectid
 
-            resp, body = self._time_request(url, method, **kwargs)
+            resp, body = self._retry_request(url, method, path=path,
+                                             **kwargs)
             return resp, body
         except exceptions.Unauthorized as e:
             try:
-                # first discard auth token, to avoid the possibly expired
-                # token being re-used in the re-authentication attempt
-                self.unauthenticate()
-                # overwrite bad token
-                self.keyring_saved = False
-                self.authenticate()
+                self._reauthenticate(kwargs['headers']['X-Auth-Token'])
                 kwargs['headers']['X-Auth-Token'] = self.auth_token
-                resp, body = self._time_request(url, method, **kwargs)
+                resp, body = self._retry_request(url, method, path=path,
+                                                 **kwargs)
                 return resp, body
             except exceptions.Unauthorized:
                 raise e
@@ -508,8 +1135,14 @@ class HTTPClient(object):
                 if extract_token:
                     self.auth_token = self.service_catalog.get_token()
                     self.tenant_id = self.service_catalog.get_tenant_id()
-
-                self.management_url = self.get_service_url(self.service_type)
+                    expires = self.service_catalog.get_token_expires()
+                    self.token_expires = (timeutils.parse_isotime(expires)
+                                          if expires else None)
+
+                management_url = self.get_service_url(self.service_type)
+                # NOTE: the token may be refreshed while other threads send
+                # requests, they must not see the catalog URL meanwhile.
+                self.management_url = self.bypass_url or management_url
                 return None
             except exceptions.AmbiguousEndpoints:
                 print(_("Found more than one valid endpoint. Use a more "
@@ -593,6 +1226,7 @@ class HTTPClient(object):
                 # with the endpoints any more, we need to replace
                 # our service account token with the user token.
                 self.auth_token = self.proxy_token
+                self.token_expires = None
         else:
             try:
                 while auth_url:
@@ -617,9 +1251,13 @@ class HTTPClient(object):
         if (self.keyring_saver and self.os_cache and not self.keyring_saved and
                 self.auth_token and self.management_url and
                 self.tenant_id):
+            expires_at = None
+            if self.service_catalog:
+                expires_at = self.service_catalog.get_token_expires()
             self.keyring_saver.save(self.auth_token,
                                     self.management_url,
-                                    self.tenant_id)
+                                    self.tenant_id,
+                                    expires_at=expires_at)
             # Don't save it again
             self.keyring_saved = True
 
@@ -646,9 +1284,9 @@ class HTTPClient(object):
         else:
             raise exceptions.from_response(resp, body, url)
 
-    def _v2_auth(self, url):
+    def _v2_auth(self, url, use_token=True):
         """Authenticate against a v2.0 auth service."""
-        if self.auth_token:
+        if self.auth_token and use_token:
             body = {"auth": {
                     "token": {"id": self.auth_token}}}
         elif self.user_id:
@@ -694,10 +1332,16 @@ def _construct_http_client(username=None, password=None, project_id=None,
                            auth_token=None, cacert=None, tenant_id=None,
                            user_id=None, connection_pool=False, session=None,
                            auth=None, user_agent='python-novaclient',
-                           interface=None, api_version=None, **kwargs):
+                           interface=None, api_version=None,
+                           retry_policy=None, rate_limiter=None,
+                           json_codec=None, thread_safe=False, **kwargs):
     # TODO(mordred): If not session, just make a Session, then return
     # SessionClient always
     if session:
+        if connection_pool and not isinstance(connection_pool, bool):
+            # NOTE: keystoneauth sessions pool their connections already,
+            # only a tuned ConnectionPool replaces their adapters.
+            connection_pool.mount(getattr(session, 'session', session))
         return SessionClient(session=session,
                              auth=auth,
                              interface=interface or endpoint_type,
@@ -707,6 +1351,9 @@ def _construct_http_client(username=None, password=None, project_id=None,
                              user_agent=user_agent,
                              timings=timings,
                              api_version=api_version,
+                             retry_policy=retry_policy,
+                             rate_limiter=rate_limiter,
+                             json_codec=json_codec,
                              **kwargs)
     else:
         # FIXME(jamielennox): username and password are now optional. Need
@@ -735,27 +1382,142 @@ def _construct_http_client(username=None, password=None, project_id=None,
                           cacert=cacert,
                           connection_pool=connection_pool,
                           api_version=api_version,
-                          logger=logger)
+                          logger=logger,
+                          retry_policy=retry_policy,
+                          rate_limiter=rate_limiter,
+                          json_codec=json_codec,
+                          thread_safe=thread_safe)
 
 
-def discover_extensions(version, only_contrib=False):
+def discover_extensions(version, only_contrib=False, cache_path=None):
     """Returns the list of extensions, which can be discovered by python path,
     contrib path and by entry-point 'novaclient.extension'.
 
+    The extensions are discovered once per process, as long as the
+    directories of ``sys.path`` don't change.
+
     :param version: api version
     :type version: str or novaclient.api_versions.APIVersion
     :param only_contrib: search only in contrib directory or not
     :type only_contrib: bool
+    :param cache_path: JSON file recording the extensions found, to skip
+                       the discovery in next processes (optional). The
+                       modules of the extensions read from it are only
+                       imported when they are used.
     """
     if not isinstance(version, api_versions.APIVersion):
         version = api_versions.get_api_version(version)
-    if only_contrib:
-        chain = _discover_via_contrib_path(version)
-    else:
-        chain = itertools.chain(_discover_via_python_path(),
-                                _discover_via_contrib_path(version),
-                                _discover_via_entry_points())
-    return [ext.Extension(name, module) for name, module in chain]
+    key = "v%s%s" % (version.ver_major, "-contrib" if only_contrib else "")
+    fingerprint = _extensions_fingerprint(version)
+
+    cached = _DISCOVERED_EXTENSIONS.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return list(cached[1])
+
+    extensions = None
+    if cache_path:
+        extensions = _read_extensions_cache(cache_path, key, fingerprint)
+    if extensions is None:
+        if only_contrib:
+            chain = ((name, module, 'file') for name, module
+                     in _discover_via_contrib_path(version))
+        else:
+            chain = itertools.chain(
+                ((name, module, 'module') for name, module
+                 in _discover_via_python_path()),
+                ((name, module, 'file') for name, module
+                 in _discover_via_contrib_path(version)),
+                ((name, module, 'module') for name, module
+                 in _discover_via_entry_points()))
+        found = [(ext.Extension(name, module), module, kind)
+                 for name, module, kind in chain]
+        extensions = [extension for extension, module, kind in found]
+        if cache_path:
+            _write_extensions_cache(cache_path, key, fingerprint, found)
+
+    _DISCOVERED_EXTENSIONS[key] = (fingerprint, extensions)
+    return list(extensions)
+
+
+def _extensions_fingerprint(version):
+    """Return a digest of the places where extensions are looked for.
+
+    Installing or removing a distribution changes the modification time of
+    the directory where it is installed, which is on ``sys.path``.
+    """
+    module_path = os.path.dirname(os.path.abspath(__file__))
+    paths = sys.path + [
+        os.path.join(module_path, "v%s" % version.ver_major, 'contrib')]
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append("%s:%r" % (path, os.stat(path or '.').st_mtime))
+        except OSError:
+            stamps.append(path)
+    return hashlib.sha1(
+        "\n".join(stamps).encode('utf-8', 'replace')).hexdigest()
+
+
+def _load_extension_module(kind, name, target):
+    if kind == 'file':
+        return imp.load_source(name, target)
+    return importutils.import_module(target)
+
+
+def _read_extensions_cache(path, key, fingerprint):
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(key)
+    except (IOError, ValueError, AttributeError):
+        return None
+    try:
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return None
+        extensions = []
+        for desc in entry['extensions']:
+            loader = functools.partial(_load_extension_module, desc['kind'],
+                                       desc['name'], desc['target'])
+            extensions.append(ext.Extension(
+                desc['name'], loader=loader, commands=desc['commands'],
+                has_hooks=desc['has_hooks'],
+                has_manager=desc['has_manager']))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        # NOTE: a malformed cache, e.g. written by another version, is a
+        # cache miss and gets rewritten after the discovery.
+        return None
+    return extensions
+
+
+def _write_extensions_cache(path, key, fingerprint, found):
+    descs = []
+    for extension, module, kind in found:
+        if not inspect.ismodule(module):
+            # NOTE: it can't be imported again without the discovery.
+            return
+        desc = extension.describe()
+        desc.update(name=extension.name, kind=kind,
+                    target=module.__file__ if kind == 'file'
+                    else module.__name__)
+        descs.append(desc)
+
+    data = {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (IOError, ValueError):
+        pass
+    if not isinstance(data, dict):
+        data = {}
+    data[key] = {'fingerprint': fingerprint, 'extensions': descs}
+    tmp_path = "%s.%s.tmp" % (path, os.getpid())
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        # NOTE: the cache is only an optimization, don't fail if it can't
+        # be written.
+        pass
 
 
 def _discover_via_python_path():
@@ -787,6 +1549,10 @@ def _discover_via_contrib_path(version):
 
 
 def _discover_via_entry_points():
+    # NOTE: importing pkg_resources scans all the installed distributions,
+    # only pay for it when entry points are needed.
+    import pkg_resources
+
     for ep in pkg_resources.iter_entry_points('novaclient.extension'):
         name = ep.name
         module = ep.load()
@@ -253,6 +253,21 @@ class InvalidUsage(RuntimeError):
     pass
 
 
+def get_retry_after(response, body):
+    """Return the raw Retry-After value of a response, None if missing.
+
+    The ``Retry-After`` header takes precedence over the ``retryAfter`` key
+    that Nova puts in the body of "overLimit" faults.
+    """
+    if response.headers and 'retry-after' in response.headers:
+        return response.headers.get('retry-after')
+    if hasattr(body, 'keys') and len(body) == 1:
+        error = body[list(body)[0]]
+        if hasattr(error, 'get'):
+            return error.get('retryAfter')
+    return None
+
+
 def from_response(response, body, url, method=None):
     """
     Return an instance of an ClientException or subclass
@@ -276,9 +291,10 @@ def from_response(response, body, url, method=None):
     if response.headers:
         kwargs['request_id'] = response.headers.get('x-compute-request-id')
 
-        if (issubclass(cls, RetryAfterException) and
-                'retry-after' in response.headers):
-            kwargs['retry_after'] = response.headers.get('retry-after')
+    if issubclass(cls, RetryAfterException):
+        retry_after = get_retry_after(response, body)
+        if retry_after is not None:
+            kwargs['retry_after'] = retry_after
 
     if body:
         message = "n/a"
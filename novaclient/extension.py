@@ -18,22 +18,80 @@ from novaclient import utils
 
 
 class Extension(base.HookableMixin):
-    """Extension descriptor."""
+    """Extension descriptor.
+
+    The module of the extension is either given, or imported by ``loader``
+    the first time it is needed. ``commands``, ``has_hooks`` and
+    ``has_manager`` describe a module which is not loaded yet, see
+    :meth:`describe`.
+    """
 
     SUPPORTED_HOOKS = ('__pre_parse_args__', '__post_parse_args__')
 
-    def __init__(self, name, module):
+    def __init__(self, name, module=None, loader=None, commands=None,
+                 has_hooks=False, has_manager=True):
         self.name = name
-        self.module = module
+        self._module = None
+        self._loader = loader
+        self._commands = commands
+        self._has_manager = has_manager
+        self._manager_class = None
+        if loader is None:
+            self._set_module(module)
+        elif has_hooks:
+            # NOTE: hooks are registered when the module is parsed, they
+            # can't wait for the module to be used.
+            self._set_module(loader())
+
+    def _set_module(self, module):
+        self._module = module
+        self._loader = None
         self._parse_extension_module()
 
     def _parse_extension_module(self):
-        self.manager_class = None
-        for attr_name, attr_value in self.module.__dict__.items():
+        self._manager_class = None
+        for attr_name, attr_value in self._module.__dict__.items():
             if attr_name in self.SUPPORTED_HOOKS:
                 self.add_hook(attr_name, attr_value)
             elif utils.safe_issubclass(attr_value, base.Manager):
-                self.manager_class = attr_value
+                self._manager_class = attr_value
+
+    @property
+    def loaded(self):
+        return self._loader is None
+
+    @property
+    def module(self):
+        if not self.loaded:
+            self._set_module(self._loader())
+        return self._module
+
+    @property
+    def manager_class(self):
+        if not self.loaded and not self._has_manager:
+            return None
+        self.module
+        return self._manager_class
+
+    @property
+    def commands(self):
+        """Names of the shell commands of the extension."""
+        if not self.loaded and self._commands is not None:
+            return list(self._commands)
+        return [attr[3:].replace('_', '-') for attr in dir(self.module)
+                if attr.startswith('do_')]
+
+    def describe(self):
+        """Return what is needed to recreate the extension without its module.
+
+        :returns: dict of the ``commands``, ``has_hooks`` and ``has_manager``
+                  arguments of the extension
+        """
+        module = self.module
+        return {'commands': self.commands,
+                'has_hooks': any(hasattr(module, hook)
+                                 for hook in self.SUPPORTED_HOOKS),
+                'has_manager': self.manager_class is not None}
 
     def __repr__(self):
         return "<Extension '%s'>" % self.name
@@ -31,6 +31,9 @@ class ServiceCatalog(object):
     def get_tenant_id(self):
         return self.catalog['access']['token']['tenant']['id']
 
+    def get_token_expires(self):
+        return self.catalog['access']['token'].get('expires')
+
     def url_for(self, attr=None, filter_value=None,
                 service_type=None, endpoint_type='publicURL',
                 service_name=None, volume_service_name=None):
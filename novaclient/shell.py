@@ -20,32 +20,44 @@ Command-line interface to the OpenStack Nova API.
 
 from __future__ import print_function
 import argparse
+import contextlib
+import functools
 import getpass
+import hashlib
 import logging
+import os
 import sys
 
 from keystoneauth1 import loading
+from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
 from oslo_utils import importutils
 from oslo_utils import strutils
+from oslo_utils import timeutils
 import six
 
-HAS_KEYRING = False
-all_errors = ValueError
-try:
-    import keyring
-    HAS_KEYRING = True
-except ImportError:
-    pass
-
 import novaclient
 from novaclient import api_versions
+import novaclient.base
 from novaclient import client
 from novaclient import exceptions as exc
 import novaclient.extension
 from novaclient.i18n import _
 from novaclient import utils
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+HAS_KEYRING = False
+all_errors = ValueError
+try:
+    import keyring
+    HAS_KEYRING = True
+except ImportError:
+    pass
+
 DEFAULT_MAJOR_OS_COMPUTE_API_VERSION = "2.0"
 # The default behaviour of nova client CLI is that CLI negotiates with server
 # to find out the most recent version between client and server, and
@@ -209,11 +221,21 @@ class DeprecatedAction(argparse.Action):
 
 
 class SecretsHelper(object):
+    """Token cache of the shell, stored in the keyring with ``--os-cache``.
+
+    The entry of the credentials is read from the keyring once and kept for
+    the life of the helper. It holds either the token, management URL and
+    tenant ID of the legacy HTTPClient, or the auth state of the keystone
+    plugin of a session, along with the expiry of the token: a token close
+    to its expiry is ignored so that the shell authenticates again.
+    """
+
     def __init__(self, args, client):
         self.args = args
         self.client = client
         self.key = None
         self._password = None
+        self._entry = None
 
     def _validate_string(self, text):
         if text is None or len(text) == 0:
@@ -223,16 +245,26 @@ class SecretsHelper(object):
     def _make_key(self):
         if self.key is not None:
             return self.key
-        keys = [
-            self.client.auth_url,
-            self.client.projectid,
-            self.client.user,
-            self.client.region_name,
-            self.client.endpoint_type,
-            self.client.service_type,
-            self.client.service_name,
-            self.client.volume_service_name,
-        ]
+        if self.client is None or isinstance(self.client,
+                                             client.SessionClient):
+            # NOTE: the auth state of a session doesn't depend on the
+            # endpoint used, only on the credentials.
+            keys = [getattr(self.args, name, None) for name in (
+                'os_auth_url', 'os_project_id', 'os_project_name',
+                'os_project_domain_id', 'os_project_domain_name',
+                'os_user_id', 'os_username', 'os_user_domain_id',
+                'os_user_domain_name')] + ['session']
+        else:
+            keys = [
+                self.client.auth_url,
+                self.client.projectid,
+                self.client.user,
+                self.client.region_name,
+                self.client.endpoint_type,
+                self.client.service_type,
+                self.client.service_name,
+                self.client.volume_service_name,
+            ]
         for (index, key) in enumerate(keys):
             if key is None:
                 keys[index] = '?'
@@ -259,7 +291,74 @@ class SecretsHelper(object):
                 pass
         return pw
 
-    def save(self, auth_token, management_url, tenant_id):
+    @staticmethod
+    def _expires_soon(entry):
+        expires_at = entry.get('expires_at')
+        if not expires_at:
+            return False
+        return timeutils.is_soon(timeutils.parse_isotime(expires_at),
+                                 client.TOKEN_EXPIRY_WINDOW)
+
+    def _read_keyring(self):
+        entry = {}
+        try:
+            block = keyring.get_password('novaclient_auth', self._make_key())
+            if block and block.startswith('{'):
+                entry = jsonutils.loads(block)
+            elif block:
+                # NOTE: entries saved by older releases.
+                token, management_url, tenant_id = block.split('|', 2)
+                entry = {'auth_token': token,
+                         'management_url': management_url,
+                         'tenant_id': tenant_id}
+        except all_errors:
+            pass
+        return entry
+
+    @contextlib.contextmanager
+    def _lock(self):
+        """Serialize the updates of the keyring between nova processes."""
+        lock_file = None
+        if fcntl is not None:
+            try:
+                lock_file = open(os.path.join(
+                    OpenStackComputeShell._get_cache_dir(), 'auth.lock'), 'a')
+            except IOError:
+                pass
+        if lock_file is None:
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _get_entry(self):
+        if not HAS_KEYRING or not self.args.os_cache:
+            return {}
+        if self._entry is None:
+            self._entry = self._read_keyring()
+        if self._expires_soon(self._entry):
+            return {}
+        return self._entry
+
+    def _save_entry(self, entry):
+        with self._lock():
+            # NOTE: another process may have authenticated meanwhile, keep
+            # its token if it lasts longer.
+            current = self._read_keyring()
+            if (current.get('expires_at') and entry.get('expires_at') and
+                    timeutils.parse_isotime(current['expires_at']) >
+                    timeutils.parse_isotime(entry['expires_at'])):
+                self._entry = current
+                return
+            keyring.set_password("novaclient_auth", self._make_key(),
+                                 jsonutils.dumps(entry))
+            self._entry = entry
+
+    def save(self, auth_token, management_url, tenant_id, expires_at=None):
         if not HAS_KEYRING or not self.args.os_cache:
             return
         if (auth_token == self.auth_token and
@@ -269,10 +368,32 @@ class SecretsHelper(object):
         if not all([management_url, auth_token, tenant_id]):
             raise ValueError(_("Unable to save empty management url/auth "
                                "token"))
-        value = "|".join([str(auth_token),
-                          str(management_url),
-                          str(tenant_id)])
-        keyring.set_password("novaclient_auth", self._make_key(), value)
+        self._save_entry({'auth_token': str(auth_token),
+                          'management_url': str(management_url),
+                          'tenant_id': str(tenant_id),
+                          'expires_at': expires_at})
+
+    def restore_auth_state(self, auth):
+        """Install the cached auth state in a keystone auth plugin.
+
+        :returns: whether a cached auth state was installed
+        """
+        auth_state = self._get_entry().get('auth_state')
+        if not auth_state or not hasattr(auth, 'set_auth_state'):
+            return False
+        auth.set_auth_state(auth_state)
+        return True
+
+    def save_auth_state(self, auth):
+        """Cache the auth state of a keystone auth plugin."""
+        if (not HAS_KEYRING or not self.args.os_cache or
+                not hasattr(auth, 'get_auth_state')):
+            return
+        auth_state = auth.get_auth_state()
+        if not auth_state or auth_state == self._get_entry().get('auth_state'):
+            return
+        self._save_entry({'auth_state': auth_state,
+                          'expires_at': auth.auth_ref.expires.isoformat()})
 
     @property
     def password(self):
@@ -294,46 +415,15 @@ class SecretsHelper(object):
 
     @property
     def management_url(self):
-        if not HAS_KEYRING or not self.args.os_cache:
-            return None
-        management_url = None
-        try:
-            block = keyring.get_password('novaclient_auth', self._make_key())
-            if block:
-                _token, management_url, _tenant_id = block.split('|', 2)
-        except all_errors:
-            pass
-        return management_url
+        return self._get_entry().get('management_url')
 
     @property
     def auth_token(self):
-        # Now is where it gets complicated since we
-        # want to look into the keyring module, if it
-        # exists and see if anything was provided in that
-        # file that we can use.
-        if not HAS_KEYRING or not self.args.os_cache:
-            return None
-        token = None
-        try:
-            block = keyring.get_password('novaclient_auth', self._make_key())
-            if block:
-                token, _management_url, _tenant_id = block.split('|', 2)
-        except all_errors:
-            pass
-        return token
+        return self._get_entry().get('auth_token')
 
     @property
     def tenant_id(self):
-        if not HAS_KEYRING or not self.args.os_cache:
-            return None
-        tenant_id = None
-        try:
-            block = keyring.get_password('novaclient_auth', self._make_key())
-            if block:
-                _token, _management_url, tenant_id = block.split('|', 2)
-        except all_errors:
-            pass
-        return tenant_id
+        return self._get_entry().get('tenant_id')
 
 
 class NovaClientArgumentParser(argparse.ArgumentParser):
@@ -375,6 +465,74 @@ class NovaClientArgumentParser(argparse.ArgumentParser):
         return option_tuples
 
 
+class _LazySubcommands(dict):
+    """Parsers of the subcommands, built when they are first looked up.
+
+    Building the parser of every subcommand, with all its arguments, is
+    most of the startup time of the shell while a single one is used. Only
+    the name and help of the commands are registered upfront, which is
+    enough for the main help, validating the name of the subcommand and
+    completion.
+
+    :param subparsers: the subparsers action of the main parser
+    """
+
+    def __init__(self, subparsers):
+        super(_LazySubcommands, self).__init__()
+        self._subparsers = subparsers
+        self._commands = {}
+
+    def add_command(self, name, help, callback, build):
+        """Register a subcommand.
+
+        :param name: name of the subcommand
+        :param help: help shown in the list of subcommands
+        :param callback: function implementing the subcommand, None if
+                         it is not known until the parser is built
+        :param build: callable adding the parser of the subcommand
+        """
+        if name not in self._commands:
+            if six.PY2:
+                choice = self._subparsers._ChoicesPseudoAction(name, help)
+            else:
+                choice = self._subparsers._ChoicesPseudoAction(name, (), help)
+            self._subparsers._choices_actions.append(choice)
+        self.pop(name, None)
+        self._commands[name] = (callback, build)
+
+    def callbacks(self):
+        """Return the functions implementing the registered subcommands."""
+        return [callback for callback, build in self._commands.values()
+                if callback is not None]
+
+    def __missing__(self, name):
+        callback, build = self._commands[name]
+        # NOTE: argparse refuses to add a parser which already exists, so
+        # the subcommand has to be forgotten while it is built.
+        del self._commands[name]
+        try:
+            return build()
+        finally:
+            self._commands[name] = (callback, build)
+
+    def __contains__(self, name):
+        return (super(_LazySubcommands, self).__contains__(name) or
+                name in self._commands)
+
+    def __iter__(self):
+        for name in self._commands:
+            yield name
+        for name in super(_LazySubcommands, self).__iter__():
+            if name not in self._commands:
+                yield name
+
+    def __len__(self):
+        return len(set(self))
+
+    def keys(self):
+        return list(self)
+
+
 class OpenStackComputeShell(object):
     times = []
 
@@ -447,6 +605,39 @@ class OpenStackComputeShell(object):
             action='store_true',
             help=_("Print call timing info."))
 
+        parser.add_argument(
+            '--parallel',
+            metavar='<count>',
+            type=int,
+            default=utils.env('NOVACLIENT_PARALLEL', default='1'),
+            help=_("Maximum number of concurrent requests for commands "
+                   "acting on several resources at once (e.g. delete, "
+                   "start, stop, reboot). Defaults to "
+                   "env[NOVACLIENT_PARALLEL] or 1."))
+
+        parser.add_argument(
+            '--resolve-cache-ttl',
+            metavar='<seconds>',
+            type=int,
+            default=utils.env('NOVACLIENT_RESOLVE_CACHE_TTL', default='0'),
+            help=_("Keep the names of the resources resolved by commands in "
+                   "an index on disk for this number of seconds, so that "
+                   "resolving them again doesn't need any request. Defaults "
+                   "to env[NOVACLIENT_RESOLVE_CACHE_TTL] or 0 (disabled)."))
+
+        parser.add_argument(
+            '--version-cache-ttl',
+            metavar='<seconds>',
+            type=int,
+            default=utils.env(
+                'NOVACLIENT_VERSION_CACHE_TTL',
+                default=str(api_versions.DEFAULT_VERSION_CACHE_TTL)),
+            help=_("Keep the microversion range of the server on disk for "
+                   "this number of seconds, so that the version of the "
+                   "server isn't requested on each run. Defaults to "
+                   "env[NOVACLIENT_VERSION_CACHE_TTL] or 86400, 0 disables "
+                   "the cache."))
+
         parser.add_argument(
             '--os-region-name',
             metavar='<region-name>',
@@ -508,17 +699,34 @@ class OpenStackComputeShell(object):
     def get_subcommand_parser(self, version, do_help=False, argv=None):
         parser = self.get_base_parser(argv)
 
-        self.subcommands = {}
         subparsers = parser.add_subparsers(metavar='<subcommand>')
+        # NOTE: only the parsers of the subcommands which are used are built,
+        # see _LazySubcommands.
+        self._version = version
+        self.subcommands = _LazySubcommands(subparsers)
+        subparsers._name_parser_map = subparsers.choices = self.subcommands
 
         actions_module = importutils.import_module(
             "novaclient.v%s.shell" % version.ver_major)
 
-        self._find_actions(subparsers, actions_module, version, do_help)
-        self._find_actions(subparsers, self, version, do_help)
+        self._find_actions(subparsers, actions_module, version, do_help,
+                           lazy=True)
+        self._find_actions(subparsers, self, version, do_help, lazy=True)
 
+        # NOTE: help and completion need all the commands with their help
+        # and arguments, other subcommands only need the module of the
+        # extension providing them.
+        load_extensions = do_help or 'bash-completion' in (argv or ())
         for extension in self.extensions:
-            self._find_actions(subparsers, extension.module, version, do_help)
+            if extension.loaded or load_extensions:
+                self._find_actions(subparsers, extension.module, version,
+                                   do_help, lazy=True)
+                continue
+            for command in extension.commands:
+                self.subcommands.add_command(
+                    command, '', None, functools.partial(
+                        self._add_extension_subparser, subparsers, extension,
+                        command, version, do_help))
 
         self._add_bash_completion_subparser(subparsers)
 
@@ -533,7 +741,12 @@ class OpenStackComputeShell(object):
         self.subcommands['bash_completion'] = subparser
         subparser.set_defaults(func=self.do_bash_completion)
 
-    def _find_actions(self, subparsers, actions_module, version, do_help):
+    def _find_commands(self, actions_module, version, do_help):
+        """Yield (command, callback, description) for ``actions_module``.
+
+        Versioned commands are resolved for ``version``, commands which are
+        not available in this version are skipped.
+        """
         msg = _(" (Supported by API versions '%(start)s' - '%(end)s')")
         for attr in (a for a in dir(actions_module) if a.startswith('do_')):
             # I prefer to be hyphen-separated instead of underscores.
@@ -561,42 +774,75 @@ class OpenStackComputeShell(object):
                 desc = callback.__doc__ or desc
                 desc += additional_msg
 
-            action_help = desc.strip()
-            arguments = getattr(callback, 'arguments', [])
-
-            subparser = subparsers.add_parser(
-                command,
-                help=action_help,
-                description=desc,
-                add_help=False,
-                formatter_class=OpenStackHelpFormatter)
-            subparser.add_argument(
-                '-h', '--help',
-                action='help',
-                help=argparse.SUPPRESS,
-            )
-            self.subcommands[command] = subparser
-            for (args, kwargs) in arguments:
-                start_version = kwargs.get("start_version", None)
-                if start_version:
-                    start_version = api_versions.APIVersion(start_version)
-                    end_version = kwargs.get("end_version", None)
-                    if end_version:
-                        end_version = api_versions.APIVersion(end_version)
-                    else:
-                        end_version = api_versions.APIVersion(
-                            "%s.latest" % start_version.ver_major)
-                    if do_help:
-                        kwargs["help"] = kwargs.get("help", "") + (msg % {
-                            "start": start_version.get_string(),
-                            "end": end_version.get_string()})
-                    if not version.matches(start_version, end_version):
-                        continue
-                kw = kwargs.copy()
-                kw.pop("start_version", None)
-                kw.pop("end_version", None)
-                subparser.add_argument(*args, **kw)
-            subparser.set_defaults(func=callback)
+            yield command, callback, desc
+
+    def _find_actions(self, subparsers, actions_module, version, do_help,
+                      lazy=False):
+        for command, callback, desc in self._find_commands(
+                actions_module, version, do_help):
+            if lazy:
+                self.subcommands.add_command(
+                    command, desc.strip(), callback, functools.partial(
+                        self._add_subparser, subparsers, command, callback,
+                        desc, version, do_help, help_entry=False))
+            else:
+                self._add_subparser(subparsers, command, callback, desc,
+                                    version, do_help)
+
+    def _add_extension_subparser(self, subparsers, extension, command,
+                                 version, do_help):
+        for name, callback, desc in self._find_commands(
+                extension.module, version, do_help):
+            if name == command:
+                return self._add_subparser(subparsers, command, callback,
+                                           desc, version, do_help,
+                                           help_entry=False)
+        # NOTE: the command isn't available in this version.
+        raise KeyError(command)
+
+    def _get_arguments(self, callback, version, do_help):
+        """Return the (args, kwargs) of the arguments of ``callback``."""
+        msg = _(" (Supported by API versions '%(start)s' - '%(end)s')")
+        for (args, kwargs) in getattr(callback, 'arguments', []):
+            kw = kwargs.copy()
+            start_version = kw.pop("start_version", None)
+            end_version = kw.pop("end_version", None)
+            if start_version:
+                start_version = api_versions.APIVersion(start_version)
+                if end_version:
+                    end_version = api_versions.APIVersion(end_version)
+                else:
+                    end_version = api_versions.APIVersion(
+                        "%s.latest" % start_version.ver_major)
+                if do_help:
+                    kw["help"] = kw.get("help", "") + (msg % {
+                        "start": start_version.get_string(),
+                        "end": end_version.get_string()})
+                if not version.matches(start_version, end_version):
+                    continue
+            yield args, kw
+
+    def _add_subparser(self, subparsers, command, callback, desc, version,
+                       do_help, help_entry=True):
+        kwargs = {}
+        if help_entry:
+            kwargs['help'] = desc.strip()
+        subparser = subparsers.add_parser(
+            command,
+            description=desc,
+            add_help=False,
+            formatter_class=OpenStackHelpFormatter,
+            **kwargs)
+        subparser.add_argument(
+            '-h', '--help',
+            action='help',
+            help=argparse.SUPPRESS,
+        )
+        self.subcommands[command] = subparser
+        for (args, kw) in self._get_arguments(callback, version, do_help):
+            subparser.add_argument(*args, **kw)
+        subparser.set_defaults(func=callback)
+        return subparser
 
     def setup_debugging(self, debug):
         if not debug:
@@ -666,6 +912,7 @@ class OpenStackComputeShell(object):
 
         keystone_session = None
         keystone_auth = None
+        helper = None
 
         # We may have either, both or none of these.
         # If we have both, we don't need USERNAME, PASSWORD etc.
@@ -695,7 +942,7 @@ class OpenStackComputeShell(object):
 
         # Do not use Keystone session for cases with no session support.
         use_session = True
-        if bypass_url or os_cache or volume_service_name:
+        if bypass_url or volume_service_name:
             use_session = False
 
         # FIXME(usrleon): Here should be restrict for project id same as
@@ -729,6 +976,10 @@ class OpenStackComputeShell(object):
                         loading.load_session_from_argparse_arguments(args))
                     keystone_auth = (
                         loading.load_auth_from_argparse_arguments(args))
+                # NOTE: with a cached auth state, the session doesn't need
+                # to authenticate again.
+                helper = SecretsHelper(args, None)
+                helper.restore_auth_state(keystone_auth)
             else:
                 # set password for auth plugins
                 os_password = args.os_password
@@ -764,6 +1015,7 @@ class OpenStackComputeShell(object):
             session=keystone_session, auth=keystone_auth,
             logger=self.client_logger)
 
+        version_cache = None
         if not skip_auth:
             if not api_version.is_latest():
                 if api_version > api_versions.APIVersion("2.0"):
@@ -776,10 +1028,18 @@ class OpenStackComputeShell(object):
                                 "min": novaclient.API_MIN_VERSION.get_string(),
                                 "max": novaclient.API_MAX_VERSION.get_string()}
                         )
-            api_version = api_versions.discover_version(self.cs, api_version)
+            if args.version_cache_ttl > 0:
+                version_cache = api_versions.VersionCache(
+                    args.version_cache_ttl,
+                    path=os.path.join(self._get_cache_dir(), 'versions.json'))
+            api_version = api_versions.discover_version(
+                self.cs, api_version, cache=version_cache)
+        discovery_client = self.cs
 
         # build available subcommands based on version
-        self.extensions = client.discover_extensions(api_version)
+        self.extensions = client.discover_extensions(
+            api_version,
+            cache_path=os.path.join(self._get_cache_dir(), 'extensions.json'))
         self._run_extension_hooks('__pre_parse_args__')
 
         subcommand_parser = self.get_subcommand_parser(
@@ -827,10 +1087,29 @@ class OpenStackComputeShell(object):
             cacert=cacert, timeout=timeout,
             session=keystone_session, auth=keystone_auth)
 
+        cache_dir = self._get_cache_dir()
+        # NOTE: the names and IDs of resources depend on the endpoint as
+        # well, e.g. the flavors of two regions.
+        uniqifier = hashlib.md5(':'.join(
+            i or '' for i in (os_auth_url, os_username, os_user_id,
+                              os_project_name, os_project_id,
+                              os_region_name, endpoint_type, service_type,
+                              bypass_url)
+        ).encode('utf-8')).hexdigest()
+        self.cs.completion_cache = novaclient.base.CompletionCache(
+            os.path.join(cache_dir, 'completion-cache.sqlite'), uniqifier)
+        if args.resolve_cache_ttl > 0:
+            self.cs.enable_resource_index(
+                args.resolve_cache_ttl,
+                path=os.path.join(cache_dir, 'name-index-%s.json' % uniqifier))
+
         # Now check for the password/token of which pieces of the
         # identifying keyring key can come from the underlying client
         if must_auth:
-            helper = SecretsHelper(args, self.cs.client)
+            if helper is None:
+                helper = SecretsHelper(args, self.cs.client)
+            else:
+                helper.client = self.cs.client
             self.cs.client.keyring_saver = helper
 
             tenant_id = helper.tenant_id
@@ -863,11 +1142,33 @@ class OpenStackComputeShell(object):
         except exc.AuthorizationFailure:
             raise exc.CommandError(_("Unable to authorize user"))
 
-        args.func(self.cs, args)
+        try:
+            args.func(self.cs, args)
+        except (exc.NotAcceptable, exc.VersionNotFoundForAPIMethod):
+            # NOTE: the cached range of the server may be outdated, discover
+            # it again on the next run.
+            if version_cache is not None:
+                version_cache.invalidate(discovery_client)
+            raise
+        finally:
+            if helper is not None and keystone_auth is not None:
+                helper.save_auth_state(keystone_auth)
 
         if args.timings:
             self._dump_timings(self.times + self.cs.get_timings())
 
+    @staticmethod
+    def _get_cache_dir():
+        cache_dir = os.path.expanduser(
+            utils.env('NOVACLIENT_UUID_CACHE_DIR', default="~/.novaclient"))
+        try:
+            os.makedirs(cache_dir, 0o755)
+        except OSError:
+            # NOTE: the directory already exists or can't be created, the
+            # caches won't be persisted in the latter case.
+            pass
+        return cache_dir
+
     def _dump_timings(self, timings):
         class Tyme(object):
             def __init__(self, url, seconds):
@@ -890,12 +1191,12 @@ class OpenStackComputeShell(object):
         Prints all of the commands and options to stdout so that the
         nova.bash_completion script doesn't have to hard code them.
         """
-        commands = set()
-        options = set()
-        for sc_str, sc in self.subcommands.items():
-            commands.add(sc_str)
-            for option in sc._optionals._option_string_actions.keys():
-                options.add(option)
+        commands = set(self.subcommands)
+        options = set(['-h', '--help'])
+        for callback in self.subcommands.callbacks():
+            for args, kwargs in self._get_arguments(callback, self._version,
+                                                    False):
+                options.update(a for a in args if a.startswith('-'))
 
         commands.remove('bash-completion')
         commands.remove('bash_completion')
@@ -167,6 +167,11 @@ class Base(base.Fixture):
             json={"servers": []},
             headers=self.json_headers, complete_qs=True)
 
+        self.requests_mock.get(
+            self.url('detail', marker=self.server_9012["id"]),
+            json={"servers": []},
+            headers=self.json_headers, complete_qs=True)
+
         self.server_1235 = self.server_1234.copy()
         self.server_1235['id'] = 1235
         self.server_1235['status'] = 'error'
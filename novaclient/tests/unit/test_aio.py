@@ -0,0 +1,82 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import testtools
+
+from novaclient import aio
+from novaclient import api_versions
+from novaclient import exceptions
+from novaclient.tests.unit import utils
+from novaclient.tests.unit.v2 import fakes
+from novaclient.v2 import servers
+
+
+@testtools.skipIf(aio.asyncio is None, "asyncio is not available")
+class AsyncClientTest(utils.TestCase):
+
+    def setUp(self):
+        super(AsyncClientTest, self).setUp()
+        self.loop = aio.asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        self.nova = aio.AsyncClient(self.cs, max_workers=4, loop=self.loop)
+        self.addCleanup(self.nova.close)
+
+    def _run(self, *awaitables):
+        return self.loop.run_until_complete(
+            aio.asyncio.gather(*awaitables))
+
+    def test_manager_methods_are_awaitable(self):
+        future = self.nova.servers.list()
+        self.assertTrue(aio.asyncio.isfuture(future))
+        result, = self._run(future)
+        self.assertEqual(4, len(result))
+        self.assertIsInstance(result[0], servers.Server)
+        self.cs.assert_called('GET', '/servers/detail')
+
+    def test_concurrent_calls(self):
+        s1, s2, flavor = self._run(self.nova.servers.get(1234),
+                                   self.nova.servers.get(5678),
+                                   self.nova.flavors.get(1))
+        self.assertEqual(1234, s1.id)
+        self.assertEqual(5678, s2.id)
+        self.assertEqual(1, flavor.id)
+
+    def test_action(self):
+        ret, = self._run(self.nova.servers.stop(1234))
+        self.assert_request_id(ret, fakes.FAKE_REQUEST_ID_LIST)
+        self.cs.assert_called('POST', '/servers/1234/action',
+                              {'os-stop': None})
+
+    def test_version_errors_are_propagated(self):
+        future = self.nova.servers.get_mks_console(1234)
+        self.assertRaises(exceptions.VersionNotFoundForAPIMethod,
+                          self._run, future)
+
+    def test_non_manager_attributes(self):
+        self.assertEqual(self.cs.api_version, self.nova.api_version)
+        self.assertIs(self.cs.servers.resource_class,
+                      self.nova.servers.resource_class)
+        self.assertIs(self.nova.servers, self.nova.servers)
+
+    @mock.patch('novaclient.client.Client')
+    def test_factory(self, mock_client):
+        nova = aio.Client('2', session=mock.sentinel.session, max_workers=7,
+                          loop=self.loop)
+        self.addCleanup(nova.close)
+        mock_client.assert_called_once_with('2',
+                                            session=mock.sentinel.session,
+                                            thread_safe=True)
+        self.assertIs(mock_client.return_value, nova.client)
+        self.assertEqual(7, nova.max_workers)
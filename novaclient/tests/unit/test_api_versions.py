@@ -13,10 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import json
+import os
+import pickle
+import threading
+
+import fixtures
 import mock
 
 import novaclient
 from novaclient import api_versions
+import novaclient.client
 from novaclient import exceptions
 from novaclient.tests.unit import utils
 from novaclient import utils as nutils
@@ -124,6 +132,36 @@ class APIVersionTestCase(utils.TestCase):
         self.assertRaises(ValueError,
                           api_versions.APIVersion().get_string)
 
+    def test_interned(self):
+        self.assertIs(api_versions.APIVersion("2.10"),
+                      api_versions.APIVersion("2.10"))
+        self.assertIs(api_versions.APIVersion(),
+                      api_versions.APIVersion(None))
+        self.assertIsNot(api_versions.APIVersion("2.latest"),
+                         api_versions.APIVersion("2.10"))
+
+    def test_hashable(self):
+        versions = {api_versions.APIVersion("2.10"): 1,
+                    api_versions.APIVersion("2.latest"): 2,
+                    api_versions.APIVersion(): 3}
+        self.assertEqual(1, versions[api_versions.APIVersion("2.10")])
+        self.assertEqual(2, versions[api_versions.APIVersion("2.latest")])
+        self.assertEqual(3, versions[api_versions.APIVersion()])
+
+    def test_immutable(self):
+        v = api_versions.APIVersion("2.10")
+        self.assertRaises(AttributeError, setattr, v, "ver_minor", 11)
+        self.assertRaises(AttributeError, setattr, v, "foo", 11)
+        self.assertEqual(10, v.ver_minor)
+
+    def test_copy_and_pickle(self):
+        for v in (api_versions.APIVersion("2.10"),
+                  api_versions.APIVersion("2.latest"),
+                  api_versions.APIVersion()):
+            self.assertIs(v, copy.copy(v))
+            self.assertIs(v, copy.deepcopy(v))
+            self.assertIs(v, pickle.loads(pickle.dumps(v)))
+
 
 class UpdateHeadersTestCase(utils.TestCase):
     def test_api_version_is_null(self):
@@ -331,7 +369,8 @@ class WrapsTestCase(utils.TestCase):
         self.assertEqual(2, B().f())
 
     def test_generate_function_name(self):
-        expected_name = "novaclient.tests.unit.test_api_versions.fake_func"
+        expected_name = ("novaclient.tests.unit.test_api_versions."
+                         "WrapsTestCase.test_generate_function_name.fake_func")
 
         self.assertNotIn(expected_name, api_versions._SUBSTITUTIONS)
 
@@ -342,6 +381,43 @@ class WrapsTestCase(utils.TestCase):
         self.assertIn(expected_name, api_versions._SUBSTITUTIONS)
         self.assertEqual(expected_name, fake_func.__id__)
 
+    def test_dispatch_is_cached(self):
+        class A(object):
+            api_version = api_versions.APIVersion("777.1")
+
+            @api_versions.wraps("777.0", "777.1")
+            def f(self):
+                return 1
+
+            @api_versions.wraps("777.2")
+            def f(self):
+                return 2
+
+        a = A()
+        with mock.patch.object(api_versions, "get_substitutions",
+                               wraps=api_versions.get_substitutions) as m:
+            self.assertEqual(1, a.f())
+            self.assertEqual(1, a.f())
+            a.api_version = api_versions.APIVersion("777.3")
+            self.assertEqual(2, a.f())
+            self.assertEqual(2, a.f())
+        self.assertEqual(2, m.call_count)
+
+    def test_dispatch_cache_is_cleared_by_new_versions(self):
+        class A(object):
+            api_version = api_versions.APIVersion("777.3")
+
+            @api_versions.wraps("777.0")
+            def f(self):
+                return 1
+
+        self.assertEqual(1, A().f())
+        api_versions._add_substitution(api_versions.VersionedMethod(
+            A.f.__id__, api_versions.APIVersion("777.2"),
+            api_versions.APIVersion("777.latest"), lambda self: 2))
+
+        self.assertEqual(2, A().f())
+
 
 class DiscoverVersionTestCase(utils.TestCase):
     def setUp(self):
@@ -440,6 +516,137 @@ class DiscoverVersionTestCase(utils.TestCase):
                 api_versions.APIVersion('2.latest')).get_string())
 
 
+class VersionCacheTestCase(utils.TestCase):
+    def setUp(self):
+        super(VersionCacheTestCase, self).setUp()
+        self.client = mock.MagicMock()
+        self.client.client.get_endpoint.return_value = "http://nova/v2.1/"
+        self._set_server_versions("2.1", "2.7")
+
+    def _set_server_versions(self, min_version, max_version):
+        self.client.versions.get_current.return_value = mock.MagicMock(
+            min_version=min_version, version=max_version)
+
+    def test_discover_version_uses_cache(self):
+        cache = api_versions.VersionCache()
+        for i in range(2):
+            self.assertEqual(api_versions.APIVersion("2.7"),
+                             api_versions.discover_version(
+                                 self.client,
+                                 api_versions.APIVersion("2.latest"),
+                                 cache=cache))
+        self.client.versions.get_current.assert_called_once_with()
+
+    def test_cache_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'versions.json')
+        api_versions.VersionCache(path=path).set(
+            self.client, api_versions.APIVersion(),
+            api_versions.APIVersion("2.7"))
+        self.assertEqual(
+            (api_versions.APIVersion(), api_versions.APIVersion("2.7"),
+             False),
+            api_versions.VersionCache(path=path).get(self.client))
+
+    def test_malformed_cache_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'versions.json')
+        key = "http://nova/v2.1"
+        for content in ([key], {key: [1]}, {key: {'time': 0}},
+                        {key: {'time': 0, 'min_version': '2',
+                               'max_version': '2.7'}}):
+            with open(path, 'w') as f:
+                json.dump(content, f)
+            cache = api_versions.VersionCache(path=path)
+            self.assertIsNone(cache.get(self.client))
+            cache.set(self.client, api_versions.APIVersion("2.1"),
+                      api_versions.APIVersion("2.7"))
+            self.assertEqual(api_versions.APIVersion("2.7"),
+                             cache.get(self.client)[1])
+
+    def test_unknown_endpoint_is_not_cached(self):
+        cache = api_versions.VersionCache()
+        self.client.client = mock.MagicMock(spec=['management_url',
+                                                  'bypass_url'])
+        self.client.client.management_url = None
+        self.client.client.bypass_url = None
+        cache.set(self.client, api_versions.APIVersion("2.1"),
+                  api_versions.APIVersion("2.7"))
+        self.assertIsNone(cache.get(self.client))
+        self.assertIsNone(cache.refresh(self.client))
+
+    def _use_http_client(self, **kwargs):
+        self.client.client = novaclient.client.HTTPClient(
+            "user", "password", auth_url="http://keystone/v2.0/",
+            service_type="compute", **kwargs)
+
+    def test_unauthenticated_http_client(self):
+        cache = api_versions.VersionCache()
+        self._use_http_client(region_name="RegionOne")
+        cache.set(self.client, api_versions.APIVersion("2.1"),
+                  api_versions.APIVersion("2.7"))
+        self.client.client.management_url = "http://nova/v2.1"
+        self.assertEqual(api_versions.APIVersion("2.7"),
+                         cache.get(self.client)[1])
+        self._use_http_client(region_name="RegionTwo")
+        self.assertIsNone(cache.get(self.client))
+
+    def test_stale_range_of_thread_unsafe_client(self):
+        cache = api_versions.VersionCache(ttl=-1)
+        self._use_http_client()
+        cache.set(self.client, api_versions.APIVersion("2.1"),
+                  api_versions.APIVersion("2.5"))
+        with mock.patch.object(threading, 'Thread') as mock_thread:
+            self.assertEqual(api_versions.APIVersion("2.7"),
+                             api_versions.discover_version(
+                                 self.client,
+                                 api_versions.APIVersion("2.latest"),
+                                 cache=cache))
+            cache.set(self.client, api_versions.APIVersion("2.1"),
+                      api_versions.APIVersion("2.5"))
+            self.assertIsNone(cache.refresh(self.client))
+        self.assertFalse(mock_thread.called)
+        self.assertEqual(2, self.client.versions.get_current.call_count)
+        self.assertEqual(api_versions.APIVersion("2.7"),
+                         cache.get(self.client)[1])
+
+    def test_stale_range_is_refreshed(self):
+        cache = api_versions.VersionCache(ttl=-1)
+        cache.set(self.client, api_versions.APIVersion("2.1"),
+                  api_versions.APIVersion("2.5"))
+        with mock.patch.object(cache, 'refresh') as mock_refresh:
+            self.assertEqual(api_versions.APIVersion("2.5"),
+                             api_versions.discover_version(
+                                 self.client,
+                                 api_versions.APIVersion("2.latest"),
+                                 cache=cache))
+        mock_refresh.assert_called_once_with(self.client)
+        self.assertFalse(self.client.versions.get_current.called)
+
+        cache.refresh(self.client).join()
+        self.assertEqual(api_versions.APIVersion("2.7"),
+                         cache.get(self.client)[1])
+
+    def test_outdated_range_is_invalidated(self):
+        cache = api_versions.VersionCache()
+        cache.set(self.client, api_versions.APIVersion("2.1"),
+                  api_versions.APIVersion("2.5"))
+        self.assertEqual(api_versions.APIVersion("2.6"),
+                         api_versions.discover_version(
+                             self.client, api_versions.APIVersion("2.6"),
+                             cache=cache))
+        self.client.versions.get_current.assert_called_once_with()
+        self.assertEqual(api_versions.APIVersion("2.7"),
+                         cache.get(self.client)[1])
+
+    def test_invalidate(self):
+        cache = api_versions.VersionCache()
+        cache.set(self.client, api_versions.APIVersion("2.1"),
+                  api_versions.APIVersion("2.7"))
+        cache.invalidate(self.client)
+        self.assertIsNone(cache.get(self.client))
+
+
 class DecoratedAfterTestCase(utils.TestCase):
     def test_decorated_after(self):
 
@@ -11,6 +11,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
+import fixtures
+import mock
 from requests import Response
 import six
 
@@ -19,6 +23,7 @@ from novaclient import base
 from novaclient import exceptions
 from novaclient.tests.unit import utils
 from novaclient.tests.unit.v2 import fakes
+from novaclient import utils as novaclient_utils
 from novaclient.v2 import flavors
 
 
@@ -71,6 +76,31 @@ class BaseTest(utils.TestCase):
         r2 = base.Resource(None, {'name': 'joe', 'age': 12})
         self.assertEqual(r1, r2)
 
+    def test_findall_gets_details_concurrently(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        cs.flavors.findall_max_workers = 2
+        fl = cs.flavors.findall(name='256 MB Server')
+        self.assertEqual([1], [f.id for f in fl])
+        self.assertEqual([('GET', '/flavors', None),
+                          ('GET', '/flavors/1', None)],
+                         cs.client.callstack)
+
+    def test_findall_server_side_filters(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        sl = cs.servers.findall(name='sample-server', status='BUILD',
+                                image=fakes.FAKE_IMAGE_UUID_2)
+        cs.assert_called('GET', '/servers/detail?image=%s&name=sample-server&'
+                                'status=BUILD' % fakes.FAKE_IMAGE_UUID_2)
+        self.assertEqual([1234], [s.id for s in sl])
+        self.assertEqual(1, len(cs.client.callstack))
+
+    def test_findall_fields(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        sl = cs.servers.findall(fields=['name'], hostId='9e107d9d372bb6826bd'
+                                                        '81d3542a419d6')
+        self.assertEqual([5678, 9012, 9013], [s.id for s in sl])
+        self.assertEqual({'id', 'name', 'hostId'}, set(sl[0].to_dict()))
+
     def test_findall_invalid_attribute(self):
         cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
         # Make sure findall with an invalid attribute doesn't cause errors.
@@ -93,6 +123,400 @@ class BaseTest(utils.TestCase):
         self.assertEqual(fakes.FAKE_REQUEST_ID_LIST, r.request_ids)
 
 
+class CompactResourceTest(utils.TestCase):
+
+    def setUp(self):
+        super(CompactResourceTest, self).setUp()
+        self.useFixture(fixtures.MonkeyPatch(
+            'novaclient.v2.flavors.Flavor.COMPACT', True))
+        self.cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+
+    def test_attributes(self):
+        info = {'id': 1, 'name': 'Big Flavor', 'is_public': True}
+        f = flavors.Flavor(self.cs.flavors, info, loaded=True)
+        self.assertEqual({}, vars(f))
+        self.assertIs(info, f._info)
+        self.assertEqual('Big Flavor', f.name)
+        self.assertEqual('big-flavor', f.human_id)
+        self.assertEqual(info, f.to_dict())
+        self.assertEqual(flavors.Flavor(None, {'id': 1}), f)
+        self.assertRaises(AttributeError, getattr, f, 'blahblah')
+
+        f.name = 'renamed'
+        self.assertEqual('renamed', f.name)
+        self.assertEqual('Big Flavor', f._info['name'])
+
+    def test_repr(self):
+        class CompactResource(base.Resource):
+            COMPACT = True
+
+        r = CompactResource(None, dict(foo="bar", baz="spam"))
+        self.assertEqual({}, vars(r))
+        self.assertEqual("<CompactResource baz=spam, foo=bar>", repr(r))
+
+    def test_class_attributes_are_not_shadowed(self):
+        # "is_public" is a property of Flavor: os-flavor-access:is_public
+        f = flavors.Flavor(None, {'id': 1, 'os-flavor-access:is_public':
+                                  False, 'is_public': 'ignored'},
+                           loaded=True)
+        self.assertFalse(f.is_public)
+
+    def test_lazy_loading(self):
+        f = flavors.Flavor(self.cs.flavors, {'id': 1})
+        f.ram = 1
+        self.assertEqual('256 MB Server', f.name)
+        self.cs.assert_called('GET', '/flavors/1')
+        # loaded details override the attributes set before
+        self.assertEqual(256, f.ram)
+        self.assertEqual(256, f._info['ram'])
+        self.assertTrue(f.is_loaded())
+
+
+class BulkTest(utils.TestCase):
+
+    def setUp(self):
+        super(BulkTest, self).setUp()
+        self.cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+
+    def test_bulk_action_by_name(self):
+        results = self.cs.servers.bulk('stop', [1234, 5678], max_workers=2)
+        self.assertEqual([1234, 5678], [r.resource for r in results])
+        self.assertTrue(all(r.succeeded for r in results))
+        self.assert_request_id(results, fakes.FAKE_REQUEST_ID_LIST)
+        self.assertEqual(
+            [('POST', '/servers/1234/action', {'os-stop': None}),
+             ('POST', '/servers/5678/action', {'os-stop': None})],
+            sorted(self.cs.client.callstack))
+
+    def test_bulk_action_with_kwargs(self):
+        self.cs.servers.bulk('reboot', [1234], reboot_type='HARD')
+        self.cs.assert_called('POST', '/servers/1234/action',
+                              {'reboot': {'type': 'HARD'}})
+
+    def test_bulk_callable_with_kwargs(self):
+        action = mock.Mock(return_value=None)
+        self.cs.servers.bulk(action, [1234], reboot_type='HARD')
+        action.assert_called_once_with(1234, reboot_type='HARD')
+
+    def test_bulk_reports_errors(self):
+        error = exceptions.NotFound(404, request_id='req-1')
+
+        def action(server):
+            if server == 2:
+                raise error
+            return base.TupleWithMeta((), fakes.FAKE_REQUEST_ID)
+
+        results = self.cs.servers.bulk(action, [1, 2, 3])
+        self.assertEqual([True, False, True], [r.succeeded for r in results])
+        self.assertIs(error, results[1].error)
+        self.assertIsNone(results[1].result)
+        self.assertEqual(['req-1'], results[1].request_ids)
+        self.assert_request_id(results, [fakes.FAKE_REQUEST_ID, 'req-1'])
+
+
+class PageIteratorTest(utils.TestCase):
+
+    def setUp(self):
+        super(PageIteratorTest, self).setUp()
+        self.resources = [base.Resource(None, {'id': i}) for i in range(7)]
+        self.calls = []
+
+    def list_page(self, marker=None, limit=None):
+        self.calls.append((marker, limit))
+        start = 0 if marker is None else marker + 1
+        end = len(self.resources) if limit is None else start + limit
+        page = self.resources[start:end][:3]
+        return base.ListWithMeta(page, 'req-%s' % len(self.calls))
+
+    def test_iterate_all(self):
+        it = base.PageIterator(self.list_page)
+        self.assertEqual(self.resources, list(it))
+        self.assertEqual([(None, None), (2, None), (5, None), (6, None)],
+                         sorted(self.calls, key=lambda c: (c[0] or -1)))
+        self.assertEqual(['req-1', 'req-2', 'req-3', 'req-4'],
+                         it.request_ids)
+
+    def test_page_size(self):
+        it = base.PageIterator(self.list_page, page_size=3, prefetch=False)
+        self.assertEqual(self.resources, list(it))
+        # the last page is shorter than page_size, no empty page is fetched
+        self.assertEqual([(None, 3), (2, 3), (5, 3)], self.calls)
+
+    def test_marker_and_limit(self):
+        it = base.PageIterator(self.list_page, marker=0, limit=4,
+                               page_size=2, prefetch=False)
+        self.assertEqual(self.resources[1:5], list(it))
+        self.assertEqual([(0, 2), (2, 2)], self.calls)
+
+    def test_limit_is_requested(self):
+        it = base.PageIterator(self.list_page, limit=5, prefetch=False)
+        self.assertEqual(self.resources[:5], list(it))
+        self.assertEqual([(None, 5), (2, 2)], self.calls)
+
+    def test_first_page_is_fetched_eagerly(self):
+        it = base.PageIterator(self.list_page)
+        self.assertEqual([(None, None)], self.calls)
+        self.assertEqual(['req-1'], it.request_ids)
+        self.assertIs(self.resources[0], next(it))
+        it.close()
+        self.assertRaises(StopIteration, next, it)
+
+    def test_errors_are_raised_on_creation(self):
+        def list_page(marker=None, limit=None):
+            raise exceptions.NotFound(404)
+        self.assertRaises(exceptions.NotFound, base.PageIterator, list_page)
+
+    def test_not_paginated(self):
+        it = base.PageIterator(lambda: self.list_page(), limit=5,
+                               paginated=False)
+        self.assertEqual(self.resources[:3], list(it))
+        self.assertEqual([(None, None)], self.calls)
+
+
+class ResourceStreamTest(utils.TestCase):
+
+    def test_stream(self):
+        resp = mock.Mock(spec=Response)
+        resp.headers = {'x-openstack-request-id': 'req-1'}
+        resp.iter_content.return_value = [b'{"flavors": [{"id": 1}, ',
+                                          b'{"id": 2}]}']
+        cs = mock.Mock()
+        cs.client.get.return_value = resp, None
+        manager = flavors.FlavorManager(cs)
+        stream = manager._list('/flavors', 'flavors', stream=True)
+        cs.client.get.assert_called_once_with('/flavors', stream=True)
+        self.assertEqual(['req-1'], stream.request_ids)
+        items = list(stream)
+        self.assertEqual([1, 2], [f.id for f in items])
+        self.assertIsInstance(items[0], flavors.Flavor)
+        resp.close.assert_called_once_with()
+
+    def test_parsed_body(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        stream = cs.flavors._list('/flavors/detail', 'flavors', stream=True)
+        self.assertEqual([1, 4, 'aa1'], [f.id for f in stream])
+        cs.assert_called('GET', '/flavors/detail')
+
+    def test_next_url(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        urls = iter(['/flavors/detail?is_public=None', None])
+        next_url = mock.Mock(side_effect=lambda last: next(urls))
+        stream = base.ResourceStream(cs.flavors, '/flavors/detail',
+                                     'flavors', next_url=next_url)
+        self.assertEqual(7, len(list(stream)))
+        self.assertEqual(2, next_url.call_count)
+
+
+class HydrationTest(utils.TestCase):
+
+    def setUp(self):
+        super(HydrationTest, self).setUp()
+        self.cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+
+    def test_hydrate_with_detailed_listing(self):
+        sl = self.cs.servers.list(detailed=False, hydrate=True)
+        self.cs.assert_called('GET', '/servers')
+        self.assertEqual('ACTIVE', sl[1].status)
+        self.assertEqual(2, len(self.cs.client.callstack))
+        self.cs.assert_called('GET', '/servers/detail')
+        self.assertEqual('BUILD', sl[0].status)
+        self.assertTrue(all(s.is_loaded() for s in sl))
+        self.assertRaises(AttributeError, getattr, sl[0], 'missing')
+        self.assertEqual(2, len(self.cs.client.callstack))
+
+    def test_hydrate_concurrently(self):
+        sl = self.cs.servers.list(detailed=False).enable_hydration()
+        self.assertFalse(sl[0].is_loaded())
+        self.assertEqual('BUILD', sl[0].status)
+        self.assertEqual(
+            [('GET', '/servers/1234', None), ('GET', '/servers/5678', None)],
+            sorted(self.cs.client.callstack[1:]))
+        self.assertTrue(all(s.is_loaded() for s in sl))
+
+    def test_hydrate_missing_resource_is_loaded_alone(self):
+        sl = base.ListWithMeta(
+            [self.cs.servers.resource_class(self.cs.servers, {'id': i})
+             for i in (1234, 5678)], None)
+        sl.enable_hydration(lambda resources: [self.cs.servers.get(1234)])
+        self.assertEqual('BUILD', sl[0].status)
+        self.assertFalse(sl[1].is_loaded())
+        self.assertEqual('ACTIVE', sl[1].status)
+        self.assertEqual([('GET', '/servers/1234', None),
+                          ('GET', '/servers/5678', None)],
+                         self.cs.client.callstack)
+
+    def test_no_hydration_by_default(self):
+        sl = self.cs.servers.list(detailed=False)
+        self.assertRaises(AttributeError, getattr, sl[0], 'status')
+        self.assertEqual(1, len(self.cs.client.callstack))
+
+
+class ResourceIndexTest(utils.TestCase):
+
+    def setUp(self):
+        super(ResourceIndexTest, self).setUp()
+        self.cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        self.index = self.cs.enable_resource_index()
+
+    def _find(self, manager, name_or_id, **find_args):
+        return novaclient_utils.find_resource(manager, name_or_id,
+                                              **find_args)
+
+    def test_cold_resolution_lists_once(self):
+        server = self._find(self.cs.servers, 'sample-server')
+        self.assertEqual(1234, server.id)
+        self.assertTrue(server.is_loaded())
+        self.assertEqual([('GET', '/servers/detail', None)],
+                         self.cs.client.callstack)
+
+    def test_indexed_resolution_is_free(self):
+        self._find(self.cs.servers, 'sample-server')
+        server = self._find(self.cs.servers, 'sample-server2')
+        self.assertEqual(5678, server.id)
+        self.assertEqual('sample-server2', server.name)
+        self.assertIsInstance(server, self.cs.servers.resource_class)
+        self.assertEqual(1, len(self.cs.client.callstack))
+        # the details are loaded on demand
+        self.assertEqual('ACTIVE', server.status)
+        self.cs.assert_called('GET', '/servers/5678')
+
+    def test_find_args_are_indexed_separately(self):
+        self._find(self.cs.servers, 'sample-server')
+        self._find(self.cs.servers, 'sample-server', all_tenants=1)
+        self.assertEqual(2, len(self.cs.client.callstack))
+        self.cs.assert_called('GET', '/servers/detail?all_tenants=1')
+
+    def test_not_found(self):
+        self._find(self.cs.servers, 'sample-server')
+        self.assertRaises(exceptions.CommandError, self._find,
+                          self.cs.servers, 'missing')
+        # an unknown name triggers a new listing
+        self.assertEqual(
+            ('GET', '/servers/detail', None), self.cs.client.callstack[1])
+
+    def test_get_by_id_is_indexed(self):
+        flavor = self._find(self.cs.flavors, '1')
+        self.cs.assert_called('GET', '/flavors/1')
+        self.assertEqual(flavor.id, self._find(self.cs.flavors, '1').id)
+        self.assertEqual(1, len(self.cs.client.callstack))
+
+    def test_invalidated_on_delete(self):
+        self._find(self.cs.servers, 'sample-server')
+        self.cs.servers.delete(5678)
+        self._find(self.cs.servers, 'sample-server2')
+        self.assertEqual(('GET', '/servers/detail', None),
+                         self.cs.client.callstack[-1])
+
+    @mock.patch('time.time')
+    def test_ttl(self, mock_time):
+        mock_time.return_value = 0
+        self._find(self.cs.servers, 'sample-server')
+        mock_time.return_value = 301
+        self._find(self.cs.servers, 'sample-server')
+        self.assertEqual(2, len(self.cs.client.callstack))
+
+    def test_persisted(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'index.json')
+        self.cs.enable_resource_index(path=path)
+        self._find(self.cs.servers, 'sample-server')
+        self.assertTrue(os.path.exists(path))
+
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        cs.enable_resource_index(path=path)
+        self.assertEqual(5678, self._find(cs.servers, 'sample-server2').id)
+        self.assertEqual([], cs.client.callstack)
+
+    def test_ambiguous_name(self):
+        servers = [self.cs.servers.resource_class(
+            self.cs.servers, {'id': i, 'name': 'twin'}) for i in (1, 2)]
+        with mock.patch.object(self.cs.servers, 'findall',
+                               return_value=servers):
+            self.assertRaises(exceptions.CommandError, self._find,
+                              self.cs.servers, 'twin')
+        self.assertEqual(2, len(self.index.find(self.cs.servers, 'twin', {})))
+        self.assertEqual(1, self.index.find(self.cs.servers, '1', {})[0].id)
+
+
+class CompletionCacheTest(utils.TestCase):
+
+    def setUp(self):
+        super(CompletionCacheTest, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'completion.sqlite')
+        self.cache = base.CompletionCache(self.path, 'scope')
+
+    def test_replace_and_add(self):
+        self.cache.replace('server', 'uuid', ['abc', 'abd', 'bcd'])
+        self.cache.add('server', 'uuid', ['abe', 'abc'])
+        self.assertEqual(['abc', 'abd', 'abe', 'bcd'], self.cache.complete())
+        self.cache.replace('server', 'uuid', ['xyz'])
+        self.assertEqual(['xyz'], self.cache.complete())
+
+    def test_prefix(self):
+        self.cache.replace('server', 'uuid', ['abc', 'abd', 'bcd'])
+        self.cache.replace('flavor', 'uuid', ['ab'])
+        self.assertEqual(['abc', 'abd'],
+                         self.cache.complete('ab', resource='server'))
+        self.assertEqual(['ab', 'abc', 'abd'], self.cache.complete('ab'))
+        self.assertEqual([], self.cache.complete('c'))
+
+    def test_scopes(self):
+        other = base.CompletionCache(self.path, 'other')
+        self.cache.replace('server', 'uuid', ['abc'])
+        other.replace('server', 'uuid', ['abd'])
+        self.cache.replace('server', 'uuid', [])
+        self.assertEqual(['abd'], self.cache.complete())
+
+    def test_errors_are_ignored(self):
+        cache = base.CompletionCache(os.path.join(self.path, 'missing', 'db'))
+        cache.replace('server', 'uuid', ['abc'])
+        self.assertEqual([], cache.complete())
+
+    def test_corrupt_database(self):
+        with open(self.path, 'w') as f:
+            f.write('not a database' * 100)
+        self.cache.replace('server', 'uuid', ['abc'])
+        self.cache.add('server', 'uuid', ['abd'])
+        self.assertEqual([], self.cache.complete())
+
+    def test_written_by_managers(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        cs.completion_cache = self.cache
+        cs.servers.list()
+        self.assertEqual(['1234', '5678', '9012', '9013'],
+                         self.cache.complete('', resource='server')[:4])
+        self.assertEqual(['sample-server', 'sample-server2',
+                          'sample-server3', 'sample-server4'],
+                         self.cache.complete('sample'))
+        cs.flavors.create('flavorcreate', 512, 1, 10, 1234)
+        self.assertEqual(['1', '256-mb-server'],
+                         self.cache.complete(resource='flavor'))
+
+    @mock.patch.dict('sys.modules', sqlite3=None)
+    def test_without_sqlite(self):
+        cache = base.CompletionCache(self.path, 'scope')
+        other = base.CompletionCache(self.path, 'other')
+        cache.replace('server', 'uuid', ['abc', 'abd'])
+        cache.add('server', 'uuid', ['abe'])
+        other.replace('server', 'human_id', ['abf'])
+        other.replace('flavor', 'uuid', ['ab'])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(['abc', 'abd', 'abe', 'abf'],
+                         cache.complete('ab', resource='server'))
+        self.assertEqual(['ab', 'abc', 'abd', 'abe', 'abf'],
+                         cache.complete('ab'))
+        cache.replace('server', 'uuid', ['xyz'])
+        self.assertEqual(['abf', 'xyz'], cache.complete(resource='server'))
+
+    def test_disabled_by_default(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        self.assertIsNone(cs.completion_cache)
+        with mock.patch.object(base.CompletionCache, 'replace') as replace:
+            cs.servers.list()
+        self.assertFalse(replace.called)
+
+
 class ListWithMetaTest(utils.TestCase):
     def test_list_with_meta(self):
         resp = create_response_obj_with_header()
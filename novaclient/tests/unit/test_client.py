@@ -14,7 +14,10 @@
 #    under the License.
 
 
+import json
 import logging
+import os
+import sys
 
 import fixtures
 from keystoneauth1 import session
@@ -22,19 +25,23 @@ import mock
 
 import novaclient.api_versions
 import novaclient.client
+import novaclient.exceptions
 import novaclient.extension
 from novaclient.tests.unit import utils
+from novaclient.tests.unit.v2 import fakes
 import novaclient.v2.client
+from novaclient.v2.contrib import list_extensions
 
 
-class ClientConnectionPoolTest(utils.TestCase):
+class ConnectionPoolTest(utils.TestCase):
 
-    @mock.patch("keystoneauth1.session.TCPKeepAliveAdapter")
+    @mock.patch("novaclient.client._PoolAdapter")
     def test_get(self, mock_http_adapter):
-        mock_http_adapter.side_effect = lambda: mock.Mock()
-        pool = novaclient.client._ClientConnectionPool()
-        self.assertEqual(pool.get("abc"), pool.get("abc"))
-        self.assertNotEqual(pool.get("abc"), pool.get("def"))
+        mock_http_adapter.side_effect = lambda owner: mock.Mock()
+        pool = novaclient.client.ConnectionPool()
+        self.assertIs(pool.get("abc"), pool.get("abc"))
+        self.assertIs(pool.get("abc"), pool.get("def"))
+        mock_http_adapter.assert_called_once_with(pool)
 
 
 class ClientTest(utils.TestCase):
@@ -339,7 +346,7 @@ class ClientTest(utils.TestCase):
         self.assertEqual(fake_session, cs._get_session("http://example.com"))
 
     @mock.patch("novaclient.client.requests.Session")
-    @mock.patch("novaclient.client._ClientConnectionPool")
+    @mock.patch("novaclient.client.ConnectionPool")
     def test_get_session_connection_pool(self, mock_pool, mock_session):
         service_url = "http://service.example.com"
 
@@ -360,7 +367,7 @@ class ClientTest(utils.TestCase):
         cs = novaclient.client.HTTPClient("user", None, "", "")
         self.assertIsNone(cs._connection_pool)
 
-    @mock.patch("novaclient.client._ClientConnectionPool")
+    @mock.patch("novaclient.client.ConnectionPool")
     def test_init_with_proper_connection_pool(self, mock_pool):
         fake_pool = mock.Mock()
         mock_pool.return_value = fake_pool
@@ -438,6 +445,17 @@ class ClientTest(utils.TestCase):
                       ' "{SHA1}4fc49c6a671ce889078ff6b250f7066cf6d2ada2"}}}',
                       output)
 
+    def test_json_codec(self):
+        self.requests_mock.post('http://no.where', content=b'{"a": 1}')
+        codec = mock.Mock(wraps=novaclient.client.JSONCodec())
+        cs = novaclient.client.HTTPClient("user", None, "",
+                                          json_codec=codec)
+        resp, body = cs.request('http://no.where', 'POST', body={'b': 2})
+        self.assertEqual({'a': 1}, body)
+        codec.decode.assert_called_once_with(b'{"a": 1}')
+        codec.encode.assert_called_once_with({'b': 2})
+        self.assertEqual({'b': 2}, self.requests_mock.last_request.json())
+
     def test_timings(self):
         self.requests_mock.get('http://no.where')
 
@@ -468,6 +486,62 @@ class SessionClientTest(utils.TestCase):
         self.assertEqual(1, len(client.times))
         self.assertEqual('GET http://no.where', client.times[0][0])
 
+    @mock.patch('time.sleep')
+    def test_retry(self, mock_sleep):
+        self.requests_mock.get('http://no.where',
+                               [{'status_code': 503},
+                                {'status_code': 429,
+                                 'headers': {'retry-after': '2'}},
+                                {'status_code': 200}])
+        client = novaclient.client.SessionClient(
+            session=session.Session(), timings=True,
+            retry_policy=novaclient.client.RetryPolicy(backoff=1, jitter=0))
+        resp, body = client.request("http://no.where", 'GET')
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual([mock.call(1), mock.call(2)],
+                         mock_sleep.call_args_list)
+        self.assertEqual(5, len(client.times))
+        self.assertEqual('GET http://no.where (retry 2 backoff)',
+                         client.times[3][0])
+
+    @mock.patch('time.sleep')
+    def test_retry_gives_up(self, mock_sleep):
+        self.requests_mock.get('http://no.where', status_code=503)
+        client = novaclient.client.SessionClient(
+            session=session.Session(),
+            retry_policy=novaclient.client.RetryPolicy(max_retries=1))
+        self.assertRaises(novaclient.exceptions.ClientException,
+                          client.request, "http://no.where", 'GET')
+        self.assertEqual(1, mock_sleep.call_count)
+        self.assertEqual(2, self.requests_mock.call_count)
+
+    @mock.patch('time.sleep')
+    def test_rate_limiter(self, mock_sleep):
+        self.requests_mock.get('http://no.where')
+        limiter = mock.Mock()
+        limiter.reserve.side_effect = [0, 3]
+        client = novaclient.client.SessionClient(session=session.Session(),
+                                                 rate_limiter=limiter)
+        client.request("http://no.where", 'GET')
+        client.request("http://no.where", 'GET')
+        self.assertEqual([mock.call('GET', 'http://no.where')] * 2,
+                         limiter.reserve.call_args_list)
+        mock_sleep.assert_called_once_with(3)
+
+    def test_json_codec(self):
+        self.requests_mock.post('http://no.where', content=b'{"a": 1}')
+        codec = mock.Mock(wraps=novaclient.client.JSONCodec())
+        client = novaclient.client.SessionClient(session=session.Session(),
+                                                 json_codec=codec)
+        resp, body = client.request("http://no.where", 'POST',
+                                    body={'b': 2})
+        self.assertEqual({'a': 1}, body)
+        codec.decode.assert_called_once_with(b'{"a": 1}')
+        request = self.requests_mock.last_request
+        self.assertEqual({'b': 2}, request.json())
+        self.assertEqual('application/json', request.headers['Content-Type'])
+        self.assertEqual('application/json', request.headers['Accept'])
+
     @mock.patch.object(novaclient.client, '_log_request_id')
     def test_log_request_id(self, mock_log_request_id):
         self.requests_mock.get('http://no.where')
@@ -478,6 +552,35 @@ class SessionClientTest(utils.TestCase):
                                                     'compute')
 
 
+class JSONCodecTest(utils.TestCase):
+
+    def test_decode(self):
+        codec = novaclient.client.JSONCodec()
+        self.assertEqual({'a': [1, u'\u20ac']},
+                         codec.decode(b'{"a": [1, "\xe2\x82\xac"]}'))
+        self.assertEqual({'a': 1}, codec.decode(u'{"a": 1}'))
+        self.assertIsNone(codec.decode(b''))
+        self.assertRaises(ValueError, codec.decode, b'{"a"')
+        self.assertEqual('{"a": 1}', codec.encode({'a': 1}))
+
+    @mock.patch.object(novaclient.client, 'orjson', None)
+    @mock.patch.object(novaclient.client, 'ujson', None)
+    def test_decode_without_accelerated_parser(self):
+        codec = novaclient.client.JSONCodec()
+        self.assertEqual({'a': u'\u20ac'},
+                         codec.decode(b'{"a": "\xe2\x82\xac"}'))
+        self.assertRaises(ValueError, codec.decode, b'{"a"')
+
+    def test_custom_functions(self):
+        loads = mock.Mock()
+        dumps = mock.Mock()
+        codec = novaclient.client.JSONCodec(loads=loads, dumps=dumps)
+        self.assertEqual(loads.return_value, codec.decode(b'[]'))
+        self.assertEqual(dumps.return_value, codec.encode([]))
+        loads.assert_called_once_with(b'[]')
+        dumps.assert_called_once_with([])
+
+
 class DiscoverExtensionTest(utils.TestCase):
 
     @mock.patch("novaclient.client._discover_via_entry_points")
@@ -526,3 +629,84 @@ class DiscoverExtensionTest(utils.TestCase):
         self.assertFalse(mock_discover_via_python_path.called)
         self.assertFalse(mock_discover_via_entry_points.called)
         mock_extension.assert_called_once_with("name", "module")
+
+    @mock.patch("novaclient.client._discover_via_contrib_path")
+    @mock.patch("novaclient.extension.Extension")
+    def test_discover_once(self, mock_extension,
+                           mock_discover_via_contrib_path):
+        mock_discover_via_contrib_path.return_value = [("name", "module")]
+        version = novaclient.api_versions.APIVersion("2.0")
+
+        result = novaclient.client.discover_extensions(
+            version, only_contrib=True)
+        self.assertEqual(result, novaclient.client.discover_extensions(
+            version, only_contrib=True))
+        mock_discover_via_contrib_path.assert_called_once_with(version)
+
+        # New directories on sys.path are searched as well.
+        self.useFixture(fixtures.MonkeyPatch(
+            'sys.path', sys.path + [self.useFixture(
+                fixtures.TempDir()).path]))
+        novaclient.client.discover_extensions(version, only_contrib=True)
+        self.assertEqual(2, mock_discover_via_contrib_path.call_count)
+
+    def test_discover_with_cache_file(self):
+        cache_path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'extensions.json')
+        version = novaclient.api_versions.APIVersion("2.0")
+        found = novaclient.client.discover_extensions(
+            version, only_contrib=True, cache_path=cache_path)
+        self.assertTrue(os.path.exists(cache_path))
+
+        novaclient.client._DISCOVERED_EXTENSIONS.clear()
+        with mock.patch("novaclient.client._discover_via_contrib_path",
+                        side_effect=AssertionError):
+            extensions = novaclient.client.discover_extensions(
+                version, only_contrib=True, cache_path=cache_path)
+
+        self.assertEqual(sorted(e.name for e in found),
+                         sorted(e.name for e in extensions))
+        cells = [e for e in extensions if e.name == 'cells'][0]
+        self.assertFalse(cells.loaded)
+        self.assertEqual(['cell-capacities', 'cell-show'], cells.commands)
+        self.assertEqual('CellsManager', cells.manager_class.__name__)
+        self.assertTrue(cells.loaded)
+        self.assertTrue(hasattr(cells.module, 'do_cell_show'))
+        deferred = [e for e in extensions if e.name == 'deferred_delete'][0]
+        self.assertIsNone(deferred.manager_class)
+        self.assertFalse(deferred.loaded)
+
+    @mock.patch("novaclient.client._discover_via_contrib_path")
+    @mock.patch("novaclient.extension.Extension")
+    def test_discover_with_malformed_cache_file(
+            self, mock_extension, mock_discover_via_contrib_path):
+        mock_discover_via_contrib_path.return_value = [("name", "module")]
+        cache_path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'extensions.json')
+        version = novaclient.api_versions.APIVersion("2.0")
+        fingerprint = novaclient.client._extensions_fingerprint(version)
+        for entry in ({'fingerprint': fingerprint,
+                       'extensions': [{'name': 'cells'}]},
+                      {'fingerprint': fingerprint, 'extensions': None},
+                      {'fingerprint': fingerprint, 'extensions': [None]},
+                      ['not', 'a', 'dict']):
+            novaclient.client._DISCOVERED_EXTENSIONS.clear()
+            with open(cache_path, 'w') as f:
+                json.dump({'v2-contrib': entry}, f)
+            result = novaclient.client.discover_extensions(
+                version, only_contrib=True, cache_path=cache_path)
+            self.assertEqual([mock_extension.return_value], result)
+        self.assertEqual(4, mock_discover_via_contrib_path.call_count)
+
+    def test_lazy_extension_manager(self):
+        loader = mock.Mock(return_value=list_extensions)
+        extension = novaclient.extension.Extension(
+            'list_extensions', loader=loader, commands=['list-extensions'])
+        cs = fakes.FakeClient(novaclient.api_versions.APIVersion("2.0"),
+                              extensions=[extension])
+        self.assertFalse(loader.called)
+        self.assertIsInstance(cs.list_extensions,
+                              list_extensions.ListExtManager)
+        self.assertIs(cs.list_extensions, cs.list_extensions)
+        loader.assert_called_once_with()
+        self.assertRaises(AttributeError, getattr, cs, 'cells')
@@ -46,3 +46,19 @@ class ExceptionsTestCase(test_utils.TestCase):
         # are in the response body.
         message = "Flavor test could not be found."
         self._test_from_response({"message": message, "code": 404}, message)
+
+    def test_from_response_retry_after_in_body(self):
+        response = test_utils.TestResponse({'status_code': 413,
+                                            'headers': {}})
+        body = {"overLimit": {"message": "This request was rate-limited.",
+                              "code": 413, "retryAfter": "7"}}
+        error = exceptions.from_response(response, body, 'http://fake', 'GET')
+        self.assertIsInstance(error, exceptions.OverLimit)
+        self.assertEqual(7, error.retry_after)
+
+    def test_from_response_retry_after_header_wins(self):
+        response = test_utils.TestResponse({'status_code': 429,
+                                            'headers': {'retry-after': '3'}})
+        body = {"overLimit": {"message": "msg", "retryAfter": "7"}}
+        error = exceptions.from_response(response, body, 'http://fake', 'GET')
+        self.assertEqual(3, error.retry_after)
@@ -11,9 +11,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+import sys
+import threading
+
+import fixtures
+from keystoneauth1 import session
 import mock
 import requests
+import requests_mock
 import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+import urllib3
 
 from novaclient import client
 from novaclient import exceptions
@@ -218,3 +228,381 @@ class ClientTest(utils.TestCase):
         cl = get_client()
 
         self.assertRaises(exceptions.Forbidden, cl.get, "/hi")
+
+
+@mock.patch('time.sleep')
+class RetryPolicyTest(utils.TestCase):
+
+    def _get_client(self, responses, **policy_kwargs):
+        policy_kwargs.setdefault('jitter', 0)
+        cl = get_authed_client(
+            retry_policy=client.RetryPolicy(**policy_kwargs), timings=True)
+        request = mock.Mock(side_effect=responses)
+        self.useFixture(fixtures.MockPatchObject(requests, 'request',
+                                                 request))
+        return cl, request
+
+    def test_retry_after_header(self, mock_sleep):
+        cl, request = self._get_client([retry_after_response, fake_response])
+        resp, body = cl.get('/hi')
+        self.assertEqual({"hi": "there"}, body)
+        self.assertEqual(2, request.call_count)
+        mock_sleep.assert_called_once_with(5.0)
+        self.assertEqual(['GET http://example.com/hi',
+                          'GET http://example.com/hi (retry 1 backoff)',
+                          'GET http://example.com/hi'],
+                         [t[0] for t in cl.get_timings()])
+
+    def test_exponential_backoff(self, mock_sleep):
+        cl, request = self._get_client([unknown_error_response] * 3 +
+                                       [fake_response], backoff=1)
+        cl.get('/hi')
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(4)],
+                         mock_sleep.call_args_list)
+
+    def test_max_retries(self, mock_sleep):
+        cl, request = self._get_client([unknown_error_response] * 3,
+                                       max_retries=2)
+        self.assertRaises(exceptions.ClientException, cl.get, '/hi')
+        self.assertEqual(3, request.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+
+    def test_deadline(self, mock_sleep):
+        cl, request = self._get_client([retry_after_response, fake_response],
+                                       deadline=1)
+        self.assertRaises(exceptions.OverLimit, cl.get, '/hi')
+        self.assertEqual(1, request.call_count)
+        self.assertFalse(mock_sleep.called)
+
+    def test_post_is_not_retried(self, mock_sleep):
+        cl, request = self._get_client([unknown_error_response,
+                                        fake_response])
+        self.assertRaises(exceptions.ClientException, cl.post, '/hi',
+                          body={})
+        self.assertEqual(1, request.call_count)
+
+    def test_other_errors_are_not_retried(self, mock_sleep):
+        cl, request = self._get_client([bad_req_response, fake_response])
+        self.assertRaises(exceptions.BadRequest, cl.get, '/hi')
+        self.assertEqual(1, request.call_count)
+
+
+class RetryPolicyDelayTest(utils.TestCase):
+
+    def test_jitter(self):
+        policy = client.RetryPolicy(backoff=10, jitter=0.5)
+        for _i in range(20):
+            self.assertTrue(5 <= policy.get_delay('GET', 503, 0, 0) <= 15)
+
+    def test_max_backoff(self):
+        policy = client.RetryPolicy(backoff=10, max_backoff=15, jitter=0,
+                                    max_retries=10)
+        self.assertEqual(15, policy.get_delay('GET', 503, 5, 0))
+
+    def test_invalid_retry_after(self):
+        policy = client.RetryPolicy(backoff=1, jitter=0)
+        self.assertEqual(1, policy.get_delay('GET', 429, 0, 0,
+                                             'Wed, 21 Oct 2015 07:28:00 GMT'))
+
+
+class FakeRateLimit(object):
+
+    def __init__(self, verb, regex, value, unit, remain=None):
+        self.verb = verb
+        self.regex = regex
+        self.value = value
+        self.unit = unit
+        self.remain = remain
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTest(utils.TestCase):
+
+    def setUp(self):
+        super(RateLimiterTest, self).setUp()
+        self.clock = FakeClock()
+
+    def test_reserve(self):
+        limiter = client.RateLimiter(
+            [FakeRateLimit('POST', '.*', 2, 'MINUTE')], clock=self.clock)
+        self.assertEqual(0, limiter.reserve('POST', '/servers'))
+        self.assertEqual(0, limiter.reserve('POST', '/servers'))
+        self.assertEqual(30, limiter.reserve('POST', '/servers'))
+        self.assertEqual(60, limiter.reserve('POST', '/servers'))
+        self.clock.now = 60
+        self.assertEqual(30, limiter.reserve('POST', '/servers'))
+
+    def test_refill_is_capped(self):
+        limiter = client.RateLimiter(
+            [FakeRateLimit('GET', '.*', 1, 'SECOND')], clock=self.clock)
+        self.clock.now = 100
+        self.assertEqual(0, limiter.reserve('GET', '/servers'))
+        self.assertEqual(1, limiter.reserve('GET', '/servers'))
+
+    def test_remaining(self):
+        limiter = client.RateLimiter(
+            [FakeRateLimit('PUT', '.*', 10, 'MINUTE', remain=0)],
+            clock=self.clock)
+        self.assertEqual(6, limiter.reserve('PUT', '/servers/1234'))
+
+    def test_matching(self):
+        limiter = client.RateLimiter(
+            [FakeRateLimit('POST', '^/servers', 1, 'MINUTE'),
+             FakeRateLimit('POST', '.*', 1, 'SECOND'),
+             FakeRateLimit('GET', '.*changes-since.*', 1, 'HOUR')],
+            clock=self.clock)
+        self.assertEqual(0, limiter.reserve('post', '/servers'))
+        # both POST limits apply, the longest wait wins
+        self.assertEqual(60, limiter.reserve('POST', '/servers?a=b'))
+        self.assertEqual(2, limiter.reserve('POST', '/flavors'))
+        self.assertEqual(0, limiter.reserve('GET', '/servers'))
+        # the query string is matched against as well
+        self.assertEqual(0, limiter.reserve('GET',
+                                            '/servers?changes-since=x'))
+        self.assertEqual(3600, limiter.reserve('GET',
+                                               '/servers?changes-since=x'))
+        self.assertEqual(0, limiter.reserve('DELETE', '/servers/1234'))
+
+    def test_unknown_unit_is_ignored(self):
+        limiter = client.RateLimiter(
+            [FakeRateLimit('GET', '.*', 1, 'FORTNIGHT')], clock=self.clock)
+        self.assertEqual(0, limiter.reserve('GET', '/servers'))
+        self.assertEqual(0, limiter.reserve('GET', '/servers'))
+
+    @mock.patch('time.sleep')
+    def test_requests_are_throttled(self, mock_sleep):
+        limiter = client.RateLimiter(
+            [FakeRateLimit('GET', '^/hi', 1, 'MINUTE')], clock=self.clock)
+        cl = get_authed_client(rate_limiter=limiter, timings=True)
+        self.useFixture(fixtures.MockPatchObject(requests, 'request',
+                                                 mock_request))
+        cl.get('/hi')
+        cl.get('/hi')
+        cl.get('/other')
+        mock_sleep.assert_called_once_with(60)
+        self.assertEqual(['GET http://example.com/hi',
+                          'GET /hi (throttled)',
+                          'GET http://example.com/hi',
+                          'GET http://example.com/other'],
+                         [t[0] for t in cl.get_timings()])
+
+
+class _StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Compute API stand-in answering GET /servers/<id>."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server_id = self.path.rsplit('/', 1)[-1]
+        body = json.dumps({'server': {'id': server_id}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('x-openstack-request-id', 'req-%s' % server_id)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StandInServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class _StandInServerTestCase(utils.TestCase):
+
+    def setUp(self):
+        super(_StandInServerTestCase, self).setUp()
+        server = _StandInServer(('127.0.0.1', 0), _StandInHandler)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        thread = threading.Thread(target=server.serve_forever,
+                                  args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.url = 'http://127.0.0.1:%s/v2.1' % server.server_address[1]
+        self.requests_mock.register_uri(requests_mock.ANY,
+                                        requests_mock.ANY, real_http=True)
+
+
+class ThreadSafeClientTest(_StandInServerTestCase):
+
+    THREADS = 8
+    REQUESTS = 25
+
+    def _hammer(self, nova, worker):
+        errors = []
+
+        def run(n):
+            try:
+                for i in range(self.REQUESTS):
+                    worker(nova, '%s-%s' % (n, i))
+            except Exception as e:
+                errors.append(e)
+
+        if hasattr(sys, 'setswitchinterval'):
+            # NOTE: switch threads often to make races likely to show up.
+            self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+            sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=run, args=(n,))
+                   for n in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+
+    def test_shared_client(self):
+        nova = client.Client('2', auth_token='token', bypass_url=self.url,
+                             connection_pool=True, thread_safe=True,
+                             timings=True)
+
+        def worker(nova, server_id):
+            server = nova.servers.get(server_id)
+            assert server.id == server_id, (server.id, server_id)
+            request_id = nova.client.last_request_id
+            assert request_id == 'req-%s' % server_id, request_id
+
+        self._hammer(nova, worker)
+        self.assertEqual(self.THREADS * self.REQUESTS,
+                         len(nova.get_timings()))
+
+    def test_service_type_override_is_thread_local(self):
+        nova = client.Client('2', auth_token='token', bypass_url=self.url,
+                             connection_pool=True, thread_safe=True)
+
+        def worker(nova, server_id):
+            with nova.servers.alternate_service_type('image'):
+                assert nova.client.service_type == 'image'
+                nova.servers.get(server_id)
+            assert nova.client.service_type == 'compute'
+
+        self._hammer(nova, worker)
+        self.assertEqual('compute', nova.client.service_type)
+
+    def test_sessions_per_thread(self):
+        cl = client.HTTPClient(None, None, auth_token='token',
+                               bypass_url=self.url, thread_safe=True)
+        cl.open_session()
+        sessions = []
+
+        def get_session():
+            sessions.append(cl._get_session(self.url))
+
+        thread = threading.Thread(target=get_session)
+        thread.start()
+        thread.join()
+        get_session()
+        self.assertIsNotNone(sessions[0])
+        self.assertIsNot(sessions[0], sessions[1])
+        cl.close_session()
+        self.assertIsNone(cl._get_session(self.url))
+
+    def test_close_session_closes_thread_sessions(self):
+        cl = client.HTTPClient(None, None, auth_token='token',
+                               bypass_url=self.url, thread_safe=True)
+        cl.open_session()
+        sessions = []
+        got_session = threading.Event()
+        closed = threading.Event()
+
+        def get_session():
+            sessions.append(cl._get_session(self.url))
+
+        def worker():
+            get_session()
+            got_session.set()
+            closed.wait()
+            get_session()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        got_session.wait()
+        get_session()
+        with mock.patch.object(requests.Session, 'close',
+                               autospec=True) as mock_close:
+            cl.close_session()
+        closed.set()
+        thread.join()
+        self.assertEqual(sorted(map(id, sessions[:2])),
+                         sorted(id(c[0][0]) for c in
+                                mock_close.call_args_list))
+        # the worker doesn't use its closed session anymore
+        self.assertIsNone(sessions[2])
+
+
+class ConnectionPoolTest(_StandInServerTestCase):
+
+    def _get_servers(self, pool, count=3):
+        nova = client.Client('2', auth_token='token', bypass_url=self.url,
+                             connection_pool=pool)
+        for i in range(count):
+            nova.servers.get(str(i))
+
+    def test_stats(self):
+        pool = client.ConnectionPool(pool_maxsize=2)
+        self._get_servers(pool)
+        self.assertEqual({'hits': 2, 'new_connections': 1, 'waits': 0},
+                         pool.get_stats())
+        pool.reset_stats()
+        self.assertEqual({'hits': 0, 'new_connections': 0, 'waits': 0},
+                         pool.get_stats())
+
+    def test_idle_timeout(self):
+        pool = client.ConnectionPool(idle_timeout=0)
+        self._get_servers(pool)
+        self.assertEqual({'hits': 0, 'new_connections': 3, 'waits': 0},
+                         pool.get_stats())
+
+    def test_without_keepalive(self):
+        pool = client.ConnectionPool(keepalive=False)
+        self._get_servers(pool)
+        self.assertEqual(2, pool.get_stats()['hits'])
+
+    def test_waits(self):
+        pool = client.ConnectionPool(pool_maxsize=1, block=True)
+        adapter = pool.get(self.url)
+        http_pool = adapter.poolmanager.connection_from_url(self.url)
+        conn = http_pool._get_conn()
+        self.assertRaises(urllib3.exceptions.EmptyPoolError,
+                          http_pool._get_conn, timeout=0.01)
+        http_pool._put_conn(conn)
+        self.assertEqual({'hits': 0, 'new_connections': 1, 'waits': 1},
+                         pool.get_stats())
+
+    def test_shared_by_clients(self):
+        pool = client.ConnectionPool()
+        self._get_servers(pool, count=1)
+        self._get_servers(pool, count=1)
+        self.assertEqual({'hits': 1, 'new_connections': 1, 'waits': 0},
+                         pool.get_stats())
+
+    @mock.patch.object(client, '_POOL_STATS_SUPPORTED', False)
+    def test_stats_unsupported(self):
+        pool = client.ConnectionPool()
+        self._get_servers(pool)
+        self.assertEqual({'hits': 0, 'new_connections': 0, 'waits': 0},
+                         pool.get_stats())
+
+    def test_session_client(self):
+        pool = client.ConnectionPool(pool_maxsize=20)
+        sess = session.Session()
+        nova = client.Client('2', session=sess, endpoint_override=self.url,
+                             connection_pool=pool)
+        nova.servers.get('1')
+        nova.servers.get('2')
+        adapter = sess.session.get_adapter(self.url)
+        self.assertIs(pool.get('http://'), adapter)
+        self.assertEqual(20, adapter._pool_maxsize)
+        self.assertEqual({'hits': 1, 'new_connections': 1, 'waits': 0},
+                         pool.get_stats())
@@ -12,13 +12,16 @@
 #    under the License.
 
 import argparse
+import datetime
 import distutils.version as dist_version
 import re
 import sys
+import types
 
 import fixtures
 from keystoneauth1 import fixture
 import mock
+from oslo_serialization import jsonutils
 import prettytable
 import requests_mock
 import six
@@ -27,6 +30,7 @@ from testtools import matchers
 from novaclient import api_versions
 import novaclient.client
 from novaclient import exceptions
+import novaclient.extension
 import novaclient.shell
 from novaclient.tests.unit import fake_actions_module
 from novaclient.tests.unit import utils
@@ -349,6 +353,86 @@ class ParserTest(utils.TestCase):
         self.assertTrue(args.tic_tac)
 
 
+class SecretsHelperTest(utils.TestCase):
+    def setUp(self):
+        super(SecretsHelperTest, self).setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'NOVACLIENT_UUID_CACHE_DIR',
+            self.useFixture(fixtures.TempDir()).path))
+        self.useFixture(fixtures.MonkeyPatch(
+            'novaclient.shell.HAS_KEYRING', True))
+        self.keyring = self.useFixture(fixtures.MockPatch(
+            'novaclient.shell.keyring', create=True)).mock
+        self.keyring.get_password.return_value = None
+        self.args = argparse.Namespace(os_cache=True,
+                                       os_auth_url='http://no.where/v3',
+                                       os_username='username',
+                                       os_project_name='project_name')
+        self.helper = novaclient.shell.SecretsHelper(self.args, None)
+
+    def _set_entry(self, **entry):
+        self.keyring.get_password.return_value = jsonutils.dumps(entry)
+
+    def test_keyring_is_read_once(self):
+        self.keyring.get_password.return_value = 'token|http://nova|tenant'
+        self.assertEqual('token', self.helper.auth_token)
+        self.assertEqual('http://nova', self.helper.management_url)
+        self.assertEqual('tenant', self.helper.tenant_id)
+        self.keyring.get_password.assert_called_once_with(
+            'novaclient_auth',
+            'http://no.where/v3/?/project_name/?/?/?/username/?/?/session')
+
+    def test_token_close_to_expiry_is_ignored(self):
+        self._set_entry(auth_token='token', management_url='http://nova',
+                        tenant_id='tenant',
+                        expires_at='2000-01-01T00:00:00Z')
+        self.assertIsNone(self.helper.auth_token)
+
+    def test_save(self):
+        self.helper.save('token', 'http://nova', 'tenant',
+                         expires_at='2100-01-01T00:00:00Z')
+        key, value = self.keyring.set_password.call_args[0][1:]
+        self.assertEqual({'auth_token': 'token',
+                          'management_url': 'http://nova',
+                          'tenant_id': 'tenant',
+                          'expires_at': '2100-01-01T00:00:00Z'},
+                         jsonutils.loads(value))
+        self.assertEqual('token', self.helper.auth_token)
+
+    def test_save_keeps_longer_lived_token(self):
+        self._set_entry(auth_token='other', management_url='http://nova',
+                        tenant_id='tenant',
+                        expires_at='2100-01-02T00:00:00Z')
+        self.helper._entry = {}
+        self.helper.save('token', 'http://nova', 'tenant',
+                         expires_at='2100-01-01T00:00:00Z')
+        self.assertFalse(self.keyring.set_password.called)
+        self.assertEqual('other', self.helper.auth_token)
+
+    def test_auth_state(self):
+        auth = mock.Mock()
+        self.assertFalse(self.helper.restore_auth_state(auth))
+
+        auth.get_auth_state.return_value = 'state'
+        auth.auth_ref.expires = datetime.datetime(2100, 1, 1)
+        self.helper.save_auth_state(auth)
+        self.keyring.get_password.return_value = (
+            self.keyring.set_password.call_args[0][2])
+
+        helper = novaclient.shell.SecretsHelper(self.args, None)
+        self.assertTrue(helper.restore_auth_state(auth))
+        auth.set_auth_state.assert_called_once_with('state')
+        helper.save_auth_state(auth)
+        self.assertEqual(1, self.keyring.set_password.call_count)
+
+    def test_no_cache(self):
+        self.args.os_cache = False
+        self.helper.save('token', 'http://nova', 'tenant')
+        self.assertIsNone(self.helper.auth_token)
+        self.assertFalse(self.keyring.get_password.called)
+        self.assertFalse(self.keyring.set_password.called)
+
+
 class ShellTest(utils.TestCase):
 
     _msg_no_tenant_project = ("You must provide a project name or project"
@@ -422,6 +506,26 @@ class ShellTest(utils.TestCase):
             for r in required:
                 self.assertIn(r, stderr)
 
+    def test_invalid_resolve_cache_ttl_env(self):
+        self.make_env(fake_env=dict(FAKE_ENV,
+                                    NOVACLIENT_RESOLVE_CACHE_TTL='1h'))
+        stdout, stderr = self.shell('list', exitcodes=[2])
+        self.assertIn("argument --resolve-cache-ttl: invalid int value: '1h'",
+                      stderr)
+
+    def test_invalid_version_cache_ttl_env(self):
+        self.make_env(fake_env=dict(FAKE_ENV,
+                                    NOVACLIENT_VERSION_CACHE_TTL='1d'))
+        stdout, stderr = self.shell('list', exitcodes=[2])
+        self.assertIn("argument --version-cache-ttl: invalid int value: '1d'",
+                      stderr)
+
+    def test_invalid_parallel_env(self):
+        self.make_env(fake_env=dict(FAKE_ENV, NOVACLIENT_PARALLEL='many'))
+        stdout, stderr = self.shell('list', exitcodes=[2])
+        self.assertIn("argument --parallel: invalid int value: 'many'",
+                      stderr)
+
     def _test_help(self, command, required=None):
         if required is None:
             required = [
@@ -675,6 +779,22 @@ class ShellTest(utils.TestCase):
         keyring_saver = mock_client_instance.client.keyring_saver
         self.assertIsInstance(keyring_saver, novaclient.shell.SecretsHelper)
 
+    @mock.patch('novaclient.shell.keyring', create=True)
+    @mock.patch.object(novaclient.shell.SecretsHelper, 'save_auth_state')
+    @mock.patch.object(novaclient.shell.SecretsHelper, 'restore_auth_state')
+    @mock.patch('novaclient.client.Client')
+    @requests_mock.Mocker()
+    def test_os_cache_with_session(self, mock_client, mock_restore,
+                                   mock_save, mock_keyring, m_requests):
+        mock_keyring.get_password.return_value = None
+        self.make_env(fake_env=FAKE_ENV)
+        self.register_keystone_discovery_fixture(m_requests)
+        self.shell('--os-cache list')
+        kwargs = mock_client.call_args[1]
+        self.assertIsNotNone(kwargs['session'])
+        mock_restore.assert_called_once_with(kwargs['auth'])
+        mock_save.assert_called_once_with(kwargs['auth'])
+
     @mock.patch('novaclient.client.Client')
     def test_microversion_with_default_behaviour(self, mock_client):
         self.make_env(fake_env=FAKE_ENV5)
@@ -684,6 +804,27 @@ class ShellTest(utils.TestCase):
         client_args = mock_client.call_args_list[1][0]
         self.assertEqual(api_versions.APIVersion("2.3"), client_args[0])
 
+    @mock.patch('novaclient.client.Client')
+    def test_microversion_range_is_cached(self, mock_client):
+        self.make_env(fake_env=FAKE_ENV5)
+        self.shell('list')
+        cache = self.mock_server_version_range.call_args[0][1]
+        self.assertIsInstance(cache, api_versions.VersionCache)
+        self.assertEqual(api_versions.DEFAULT_VERSION_CACHE_TTL, cache.ttl)
+
+        self.shell('--version-cache-ttl 0 list')
+        self.assertIsNone(self.mock_server_version_range.call_args[0][1])
+
+    @mock.patch.object(api_versions.VersionCache, 'invalidate')
+    @mock.patch('novaclient.client.Client')
+    def test_microversion_range_is_invalidated(self, mock_client,
+                                               mock_invalidate):
+        self.make_env(fake_env=FAKE_ENV5)
+        mock_client.return_value.servers.list.side_effect = (
+            exceptions.NotAcceptable(406))
+        self.assertRaises(exceptions.NotAcceptable, self.shell, 'list')
+        mock_invalidate.assert_called_once_with(mock_client.return_value)
+
     @mock.patch('novaclient.client.Client')
     def test_microversion_with_default_behaviour_with_legacy_server(
             self, mock_client):
@@ -920,6 +1061,60 @@ class TestLoadVersionedActions(utils.TestCase):
                       mock_add_arg.call_args_list)
 
 
+class TestLazySubcommands(utils.TestCase):
+
+    def setUp(self):
+        super(TestLazySubcommands, self).setUp()
+        self.shell = novaclient.shell.OpenStackComputeShell()
+        self.shell.extensions = []
+        self.parser = self.shell.get_subcommand_parser(
+            api_versions.APIVersion("2.37"), argv=[])
+
+    def _built(self):
+        return set(dict.keys(self.shell.subcommands))
+
+    def test_only_used_subcommand_is_built(self):
+        self.assertEqual(set(['bash_completion']), self._built())
+        self.assertIn('list', self.shell.subcommands)
+        args = self.parser.parse_args(['list', '--minimal'])
+        self.assertTrue(args.minimal)
+        self.assertEqual(set(['bash_completion', 'list']), self._built())
+
+    def test_help_lists_subcommands_without_building_them(self):
+        help_text = self.parser.format_help()
+        self.assertIn('    list ', help_text)
+        self.assertIn('    help ', help_text)
+        self.assertEqual(set(['bash_completion']), self._built())
+
+    def test_subcommand_lookup(self):
+        subcommand = self.shell.subcommands['server-group-list']
+        self.assertEqual('nova server-group-list', subcommand.prog)
+        self.assertIs(subcommand, self.shell.subcommands['server-group-list'])
+        self.assertRaises(KeyError, lambda: self.shell.subcommands['foo'])
+        self.assertNotIn('foo', self.shell.subcommands)
+
+    def test_extension_is_loaded_when_its_command_is_used(self):
+        module = types.ModuleType('fake_ext')
+
+        def do_fake_ext(cs, args):
+            """Fake command."""
+        module.do_fake_ext = do_fake_ext
+        loader = mock.Mock(return_value=module)
+        self.shell.extensions = [novaclient.extension.Extension(
+            'fake_ext', loader=loader, commands=['fake-ext'])]
+
+        parser = self.shell.get_subcommand_parser(
+            api_versions.APIVersion("2.37"), argv=['fake-ext'])
+        self.assertFalse(loader.called)
+        self.assertIs(do_fake_ext, parser.parse_args(['fake-ext']).func)
+        loader.assert_called_once_with()
+
+    def test_unknown_subcommand(self):
+        with mock.patch('sys.stderr', six.StringIO()):
+            self.assertRaises(SystemExit, self.parser.parse_args, ['foofoo'])
+            self.assertIn("invalid choice: 'foofoo'", sys.stderr.getvalue())
+
+
 class ShellTestKeystoneV3(ShellTest):
     def make_env(self, exclude=None, fake_env=FAKE_ENV):
         if 'OS_AUTH_URL' in fake_env:
@@ -12,6 +12,7 @@
 #    under the License.
 
 import sys
+import threading
 
 import mock
 from oslo_utils import encodeutils
@@ -422,6 +423,141 @@ class DoActionOnManyTestCase(test_utils.TestCase):
     def test_do_action_on_many_last_fails(self):
         self._test_do_action_on_many([None, Exception()], fail=True)
 
+    def test_do_action_on_many_concurrently(self):
+        action = mock.Mock(side_effect=lambda r: r)
+        with mock.patch('sys.stdout', new_callable=six.StringIO) as stdout:
+            utils.do_action_on_many(action, [1, 2, 3], 'success with %s',
+                                    'error', max_workers=3)
+        self.assertEqual('success with 1\nsuccess with 2\nsuccess with 3\n',
+                         stdout.getvalue())
+        self.assertEqual(3, action.call_count)
+
+    def test_do_action_on_many_concurrently_fails(self):
+        action = mock.Mock(side_effect=[None, Exception(), None])
+        self.assertRaises(exceptions.CommandError,
+                          utils.do_action_on_many,
+                          action, [1, 2, 3], 'success with %s', 'error',
+                          max_workers=3)
+        self.assertEqual(3, action.call_count)
+
+
+class RunConcurrentlyTestCase(test_utils.TestCase):
+
+    def _test_run_concurrently(self, max_workers):
+        error = ValueError()
+
+        def func(item):
+            if item == 2:
+                raise error
+            return item * 10
+
+        results = list(utils.run_concurrently(func, [1, 2, 3], max_workers))
+        self.assertEqual([(1, 10, None), (2, None, error), (3, 30, None)],
+                         results)
+
+    def test_run_sequentially(self):
+        self._test_run_concurrently(None)
+
+    def test_run_concurrently(self):
+        self._test_run_concurrently(5)
+
+    def test_run_concurrently_uses_threads(self):
+        lock = threading.Lock()
+        all_started = threading.Event()
+        started = []
+
+        def func(item):
+            with lock:
+                started.append(item)
+                if len(started) == 3:
+                    all_started.set()
+            # only returns True if all the calls are running at once
+            return all_started.wait(5)
+
+        results = list(utils.run_concurrently(func, range(3), max_workers=3))
+        self.assertEqual([True] * 3, [r for _i, r, _e in results])
+
+
+class PollSchedulerTestCase(test_utils.TestCase):
+
+    def setUp(self):
+        super(PollSchedulerTestCase, self).setUp()
+        self.now = 0
+        self.clock = lambda: self.now
+
+    def test_backoff(self):
+        scheduler = utils.PollScheduler(min_period=1, max_period=5,
+                                        backoff=2, clock=self.clock)
+        self.assertEqual([1, 2, 4, 5, 5],
+                         [scheduler.next_delay() for i in range(5)])
+        self.assertFalse(scheduler.expired)
+
+    def test_progress_eta(self):
+        scheduler = utils.PollScheduler(min_period=1, max_period=30,
+                                        clock=self.clock)
+        delays = []
+        for self.now, progress in ((0, 10), (1, 20), (5, 60), (9, 95)):
+            delays.append(scheduler.next_delay(progress))
+        self.assertEqual([1, 4, 2.25, 1], delays)
+        self.assertEqual(None, scheduler.eta(100))
+
+    def test_fixed_with_deadline(self):
+        scheduler = utils.PollScheduler.fixed("10", deadline=15,
+                                              clock=self.clock)
+        self.assertEqual(10, scheduler.next_delay(50))
+        self.now = 10
+        self.assertEqual(5, scheduler.next_delay(60))
+        self.assertFalse(scheduler.expired)
+        self.now = 15
+        self.assertTrue(scheduler.expired)
+        self.assertEqual(0, scheduler.next_delay())
+
+
+class IterJsonListTestCase(test_utils.TestCase):
+
+    def _chunks(self, data, size=1):
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    def test_items(self):
+        data = (b'{"servers_links": [{"rel": "next"}], "servers": '
+                b'[{"id": 1, "name": "\xe2\x82\xac"}, {"id": 23}, {}], '
+                b'"total": 1.5e3}')
+        for size in (1, 2, 7, len(data)):
+            extra = {}
+            items = list(utils.iter_json_list(self._chunks(data, size),
+                                              'servers', extra))
+            self.assertEqual([{'id': 1, 'name': u'\u20ac'}, {'id': 23}, {}],
+                             items)
+            self.assertEqual({'servers_links': [{'rel': 'next'}],
+                              'total': 1500.0}, extra)
+
+    def test_items_are_yielded_as_they_are_received(self):
+        chunks = iter([b'{"servers": [{"id": 1},', b' {"id": 2}]}'])
+        items = utils.iter_json_list(chunks, 'servers')
+        self.assertEqual({'id': 1}, next(items))
+        self.assertEqual([b' {"id": 2}]}'], list(chunks))
+
+    def test_empty(self):
+        self.assertEqual([], list(utils.iter_json_list([b'{}'], 'servers')))
+        self.assertEqual([], list(utils.iter_json_list(
+            [b' { "servers" : [ ] } '], 'servers')))
+
+    def test_fields(self):
+        data = (b'{"servers": [{"id": 1, "addresses": {"a": [{"b": "]}\\""}],'
+                b' "c": [[], {}]}, "name": "x"}, {"links": [], "id": 2}]}')
+        for size in (1, 3, len(data)):
+            items = list(utils.iter_json_list(self._chunks(data, size),
+                                              'servers',
+                                              fields=['id', 'name']))
+            self.assertEqual([{'id': 1, 'name': 'x'}, {'id': 2}], items)
+
+    def test_invalid(self):
+        for data in (b'', b'[]', b'{"servers": [{"id": 1}', b'{"servers" 1}',
+                     b'{"servers": [1 2]}'):
+            self.assertRaises(ValueError, list,
+                              utils.iter_json_list(self._chunks(data),
+                                                   'servers'))
+
 
 class RecordTimeTestCase(test_utils.TestCase):
 
@@ -441,6 +577,17 @@ class RecordTimeTestCase(test_utils.TestCase):
             pass
         self.assertEqual(0, len(times))
 
+    def test_record_time_on_error(self):
+        times = []
+
+        def fail():
+            with utils.record_time(times, True, 'a'):
+                raise ValueError()
+
+        self.assertRaises(ValueError, fail)
+        self.assertEqual(1, len(times))
+        self.assertEqual('a', times[0][0])
+
 
 class PrepareQueryStringTestCase(test_utils.TestCase):
     def test_convert_dict_to_string(self):
@@ -67,6 +67,9 @@ class TestCase(testtools.TestCase):
             self.useFixture(fixtures.MonkeyPatch('sys.stderr', stderr))
 
         self.requests_mock = self.useFixture(requests_mock_fixture.Fixture())
+        # NOTE: extensions are discovered once per process.
+        self.useFixture(fixtures.MonkeyPatch(
+            'novaclient.client._DISCOVERED_EXTENSIONS', {}))
 
     def assert_request_id(self, request_id_mixin, request_id_list):
         self.assertEqual(request_id_list, request_id_mixin.request_ids)
@@ -121,6 +124,8 @@ class TestResponse(requests.Response):
             self.headers = data.get('headers')
             # Fake the text attribute to streamline Response creation
             self._text = data.get('text')
+            if isinstance(self._text, six.string_types):
+                self._content = self._text.encode('utf-8')
         else:
             self.status_code = data
 
@@ -384,7 +384,7 @@ class FakeHTTPClient(base_client.HTTPClient):
         ]})
 
     def get_servers_detail(self, **kw):
-        return (200, {}, {"servers": [
+        servers = [
             {
                 "id": 1234,
                 "name": "sample-server",
@@ -511,7 +511,11 @@ class FakeHTTPClient(base_client.HTTPClient):
                 "hostId": "9e107d9d372bb6826bd81d3542a419d6",
                 "status": "ACTIVE",
             },
-        ]})
+        ]
+        if kw.get('marker') == str(servers[-1]['id']):
+            # The last page of a listing
+            servers = []
+        return (200, {}, {"servers": servers})
 
     def post_servers(self, body, **kw):
         assert set(body.keys()) <= set(['server', 'os:scheduler_hints'])
@@ -782,6 +786,9 @@ class FakeHTTPClient(base_client.HTTPClient):
     def post_servers_5678_action(self, body, **kw):
         return self.post_servers_1234_action(body, **kw)
 
+    def post_servers_9012_action(self, body, **kw):
+        return self.post_servers_1234_action(body, **kw)
+
     #
     # Cloudpipe
     #
@@ -12,10 +12,14 @@
 #    under the License.
 
 import copy
+import datetime
 import json
+import threading
 
+import fixtures
 from keystoneauth1 import fixture
 import mock
+from oslo_utils import timeutils
 import requests
 
 from novaclient import exceptions
@@ -391,3 +395,133 @@ class AuthenticationTests(utils.TestCase):
             self.assertTrue(m.called)
 
         test_auth_call()
+
+
+class TokenRefreshTests(utils.TestCase):
+
+    def setUp(self):
+        super(TokenRefreshTests, self).setUp()
+        self.cs = client.Client("username", "password", "project_id",
+                                utils.AUTH_URL_V2, service_type='compute',
+                                direct_use=False)
+        self.http_client = self.cs.client
+        self.tokens = []
+        self.mock_request = self.useFixture(fixtures.MockPatchObject(
+            requests, 'request', side_effect=self._request)).mock
+
+    def _request(self, method, url, **kwargs):
+        if url.endswith('/tokens'):
+            resp = fixture.V2Token(
+                token_id='token-%d' % len(self.tokens),
+                expires=timeutils.utcnow() + datetime.timedelta(hours=1))
+            resp.set_scope()
+            resp.add_service('compute').add_endpoint(
+                'http://localhost:8774/v2.1', region='RegionOne')
+            self.tokens.append(resp)
+            return utils.TestResponse({"status_code": 200,
+                                       "text": json.dumps(resp)})
+        return utils.TestResponse({"status_code": 200, "text": '{}'})
+
+    def _authenticate(self, expires_in):
+        self.http_client.authenticate()
+        self.http_client.token_expires = (
+            timeutils.utcnow() + datetime.timedelta(seconds=expires_in))
+
+    def _tokens_sent(self):
+        return [kwargs['headers']['X-Auth-Token']
+                for (method, url), kwargs in self.mock_request.call_args_list
+                if not url.endswith('/tokens')]
+
+    def test_token_expiry_is_tracked(self):
+        self.http_client.authenticate()
+        self.assertEqual(self.tokens[0].expires,
+                         self.http_client.token_expires)
+
+    def test_valid_token_is_kept(self):
+        self._authenticate(3600)
+        self.http_client.get('/servers')
+        self.assertEqual(['token-0'], self._tokens_sent())
+        self.assertIsNone(self.http_client._refresh_thread)
+
+    def test_token_is_refreshed_before_expiry(self):
+        self._authenticate(60)
+        self.http_client.get('/servers')
+        self.assertEqual(['token-1'], self._tokens_sent())
+        self.assertEqual(self.tokens[1].expires,
+                         self.http_client.token_expires)
+        body = json.loads(self.mock_request.call_args_list[1][1]['data'])
+        self.assertIn('passwordCredentials', body['auth'])
+
+    def test_token_is_refreshed_before_request(self):
+        self._authenticate(200)
+        self.http_client.get('/servers')
+        self.assertIsNone(self.http_client._refresh_thread)
+        self.assertEqual(['token-1'], self._tokens_sent())
+
+    def test_token_is_refreshed_in_background(self):
+        self.cs = client.Client("username", "password", "project_id",
+                                utils.AUTH_URL_V2, service_type='compute',
+                                timings=True, thread_safe=True,
+                                direct_use=False)
+        self.http_client = self.cs.client
+        refreshing = threading.Event()
+        requested = threading.Event()
+
+        def _request(method, url, **kwargs):
+            if url.endswith('/tokens') and self.tokens:
+                refreshing.set()
+                requested.wait(5)
+            return self._request(method, url, **kwargs)
+        self.mock_request.side_effect = _request
+
+        self._authenticate(200)
+        self.http_client.reset_timings()
+        self.http_client.get('/servers')
+        self.assertTrue(refreshing.wait(5))
+        # Sent while the token is being refreshed.
+        self.http_client.get('/servers')
+        requested.set()
+        self.http_client._refresh_thread.join()
+        self.http_client.get('/servers')
+
+        self.assertEqual(['token-0', 'token-0', 'token-1'],
+                         self._tokens_sent())
+        self.assertEqual(self.tokens[1].expires,
+                         self.http_client.token_expires)
+        self.assertEqual(['GET http://localhost:8774/v2.1/servers'] * 3,
+                         [t[0] for t in self.http_client.get_timings()])
+
+    def test_token_is_not_refreshed_without_password(self):
+        self._authenticate(60)
+        self.http_client.password = None
+        self.http_client.get('/servers')
+        self.assertEqual(['token-0'], self._tokens_sent())
+
+    def test_refreshed_token_keeps_bypass_url(self):
+        self.cs = client.Client("username", "password", "project_id",
+                                utils.AUTH_URL_V2, service_type='compute',
+                                bypass_url='http://bypass:8774/v2.1',
+                                direct_use=False)
+        self.http_client = self.cs.client
+        self._authenticate(60)
+        self.http_client.get('/servers')
+        self.assertEqual(['token-1'], self._tokens_sent())
+        self.assertEqual('http://bypass:8774/v2.1/servers',
+                         self.mock_request.call_args_list[-1][0][1])
+        self.assertEqual('http://bypass:8774/v2.1',
+                         self.http_client.management_url)
+
+    def test_token_is_not_refreshed_without_v2_auth(self):
+        self._authenticate(60)
+        self.http_client.version = 'v1.1'
+        self.http_client.get('/servers')
+        self.assertEqual(['token-0'], self._tokens_sent())
+
+    def test_rejected_token_is_replaced_once(self):
+        self._authenticate(3600)
+        with mock.patch.object(self.http_client,
+                               'authenticate') as mock_authenticate:
+            self.http_client._reauthenticate('token-old')
+            self.assertFalse(mock_authenticate.called)
+            self.http_client._reauthenticate('token-0')
+            mock_authenticate.assert_called_once_with()
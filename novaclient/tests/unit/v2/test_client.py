@@ -10,12 +10,18 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import subprocess
+import sys
 import uuid
 
 from keystoneauth1 import session
 
+from novaclient import api_versions
+from novaclient import client as base_client
 from novaclient.tests.unit import utils
+from novaclient.tests.unit.v2 import fakes
 from novaclient.v2 import client
+from novaclient.v2 import servers
 
 
 class ClientTest(utils.TestCase):
@@ -45,3 +51,48 @@ class ClientTest(utils.TestCase):
                           direct_use=False)
 
         self.assertEqual(interface, c.client.interface)
+
+    def test_enable_rate_limiting(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        limiter = cs.enable_rate_limiting()
+        cs.assert_called('GET', '/limits')
+        self.assertIsInstance(limiter, base_client.RateLimiter)
+        self.assertIs(limiter, cs.client.rate_limiter)
+        # 2 of the 10 POST per minute are remaining
+        self.assertEqual(0, limiter.reserve('POST', '/servers'))
+        self.assertEqual(0, limiter.reserve('POST', '/servers'))
+        self.assertTrue(limiter.reserve('POST', '/servers') > 0)
+        self.assertEqual(0, limiter.reserve('GET', '/servers'))
+
+    def test_enable_rate_limiting_shared(self):
+        cs = fakes.FakeClient(api_versions.APIVersion("2.0"))
+        limiter = base_client.RateLimiter([])
+        self.assertIs(limiter, cs.enable_rate_limiting(limiter))
+        self.assertEqual([], cs.client.callstack)
+
+    def test_managers_are_created_on_first_access(self):
+        s = session.Session()
+        c = client.Client(session=s, direct_use=False)
+        self.assertNotIn('servers', vars(c))
+        self.assertIsInstance(c.servers, servers.ServerManager)
+        self.assertIs(c.servers, c.servers)
+        self.assertIs(c, c.servers.api)
+        self.assertIn('servers', vars(c))
+        self.assertIsNot(c.servers,
+                         client.Client(session=s, direct_use=False).servers)
+
+    def test_manager_modules_are_imported_on_first_access(self):
+        code = """if True:
+            import sys
+            from keystoneauth1 import session
+            from novaclient import client
+            c = client.Client('2', session=session.Session())
+            print(sorted(m for m in sys.modules
+                         if m.startswith('novaclient.v2.')))
+            c.servers
+            print('novaclient.v2.servers' in sys.modules)
+        """
+        output = subprocess.check_output([sys.executable, '-c', code])
+        modules, servers_imported = output.decode().splitlines()
+        self.assertEqual("['novaclient.v2.client']", modules)
+        self.assertEqual("True", servers_imported)
@@ -51,6 +51,14 @@ class FlavorsTest(utils.TestCase):
         self.assert_request_id(fl, fakes.FAKE_REQUEST_ID_LIST)
         self.cs.assert_called('GET', '/flavors/detail?limit=4&marker=1234')
 
+    def test_iter_list_flavors(self):
+        it = self.cs.flavors.iter_list(marker=1234, page_size=10)
+        fl = list(it)
+        self.assert_request_id(it, fakes.FAKE_REQUEST_ID_LIST)
+        self.cs.assert_called('GET', '/flavors/detail?limit=10&marker=1234')
+        for flavor in fl:
+            self.assertIsInstance(flavor, self.flavor_type)
+
     def test_list_flavors_with_sort_key_dir(self):
         fl = self.cs.flavors.list(sort_key='id', sort_dir='asc')
         self.assert_request_id(fl, fakes.FAKE_REQUEST_ID_LIST)
@@ -198,3 +198,10 @@ class HypervisorsV233Test(HypervisorsTest):
         self.cs.hypervisors.list(**params)
         for k, v in params.items():
             self.assertEqual([v], self.requests_mock.last_request.qs[k])
+
+    def test_iter_list_use_limit_marker_params(self):
+        list(self.cs.hypervisors.iter_list(marker='fake-marker',
+                                           page_size=10))
+        self.assertEqual(['10'], self.requests_mock.last_request.qs['limit'])
+        self.assertEqual(['fake-marker'],
+                         self.requests_mock.last_request.qs['marker'])
@@ -75,6 +75,14 @@ class KeypairsV2TestCase(KeypairsTest):
                            body={'keypair': {'name': name}})
         self.assertIsInstance(kp, keypairs.Keypair)
 
+    def test_iter_list_keypairs(self):
+        it = self.cs.keypairs.iter_list()
+        kps = list(it)
+        self.assert_request_id(it, fakes.FAKE_REQUEST_ID_LIST)
+        self.assert_called('GET', '/%s' % self.keypair_prefix)
+        for kp in kps:
+            self.assertIsInstance(kp, keypairs.Keypair)
+
     def test_import_keypair(self):
         name = "foo"
         pub_key = "fake-public-key"
@@ -127,3 +135,12 @@ class KeypairsV35TestCase(KeypairsTest):
                            % self.keypair_prefix)
         for kp in kps:
             self.assertIsInstance(kp, keypairs.Keypair)
+
+    def test_iter_list_keypairs(self):
+        kps = list(self.cs.keypairs.iter_list(user_id='test_user',
+                                              marker='test_kp', page_size=3))
+        self.assert_called('GET',
+                           '/%s?limit=3&marker=test_kp&user_id=test_user'
+                           % self.keypair_prefix)
+        for kp in kps:
+            self.assertIsInstance(kp, keypairs.Keypair)
@@ -20,6 +20,7 @@ import mock
 import six
 
 from novaclient import api_versions
+from novaclient import base
 from novaclient import exceptions
 from novaclient.tests.unit.fixture_data import client
 from novaclient.tests.unit.fixture_data import floatingips
@@ -75,6 +76,55 @@ class ServersTest(utils.FixturedTestCase):
         for s in sl:
             self.assertIsInstance(s, servers.Server)
 
+    def test_list_servers_stream(self):
+        sl = self.cs.servers.list(stream=True)
+        self.assertIsInstance(sl, base.ResourceStream)
+        self.assert_request_id(sl, fakes.FAKE_REQUEST_ID_LIST)
+        self.assert_called('GET', '/servers/detail')
+        servers_list = list(sl)
+        self.assertEqual([1234, 5678, 9012],
+                         [s.id for s in servers_list])
+        for s in servers_list:
+            self.assertIsInstance(s, servers.Server)
+            self.assertTrue(s.is_loaded())
+
+    def test_list_all_servers_stream(self):
+        sl = list(self.cs.servers.list(limit=-1, marker=1234, stream=True))
+        self.assertEqual([1234, 5678], [s.id for s in sl])
+        self.assertEqual(['/servers/detail?marker=1234',
+                          '/servers/detail?marker=5678'],
+                         [r.path_url for r in
+                          self.requests_mock.request_history[-2:]])
+
+    def test_list_servers_fields(self):
+        sl = self.cs.servers.list(fields=['name'])
+        self.assertEqual([1234, 5678, 9012], [s.id for s in sl])
+        for s in sl:
+            self.assertEqual({'id', 'name'}, set(s.to_dict()))
+
+    def test_list_servers_stream_fields(self):
+        sl = list(self.cs.servers.list(stream=True, fields=['status']))
+        self.assertEqual([1234, 5678, 9012], [s.id for s in sl])
+        self.assertEqual({'id', 'status'}, set(sl[0].to_dict()))
+        self.assertFalse(hasattr(sl[0], 'addresses'))
+
+    def test_iter_list_servers(self):
+        it = self.cs.servers.iter_list(marker=1234)
+        sl = list(it)
+        self.assertEqual([1234, 5678], [s.id for s in sl])
+        self.assert_request_id(it, fakes.FAKE_REQUEST_ID_LIST)
+        self.assertEqual(['/servers/detail?marker=1234',
+                          '/servers/detail?marker=5678'],
+                         sorted(r.path_url for r in
+                                self.requests_mock.request_history[-2:]))
+        for s in sl:
+            self.assertIsInstance(s, servers.Server)
+
+    def test_iter_list_servers_limit(self):
+        sl = list(self.cs.servers.iter_list(marker=1234, limit=1))
+        self.assertEqual([1234], [s.id for s in sl])
+        self.assert_called('GET', '/servers/detail?limit=1&marker=1234')
+
     def test_list_servers_undetailed(self):
         sl = self.cs.servers.list(detailed=False)
         self.assert_request_id(sl, fakes.FAKE_REQUEST_ID_LIST)
@@ -424,7 +474,8 @@ class ServersTest(utils.FixturedTestCase):
     def test_find(self):
         server = self.cs.servers.find(name='sample-server')
         self.assert_request_id(server, fakes.FAKE_REQUEST_ID_LIST)
-        self.assert_called('GET', '/servers/1234')
+        self.assert_called('GET', '/servers/detail?name=sample-server')
+        self.assertEqual(1234, server.id)
         self.assertEqual('sample-server', server.name)
 
         self.assertRaises(exceptions.NoUniqueMatch, self.cs.servers.find,
@@ -434,6 +485,21 @@ class ServersTest(utils.FixturedTestCase):
         self.assert_request_id(sl, fakes.FAKE_REQUEST_ID_LIST)
         self.assertEqual([1234, 5678, 9012], [s.id for s in sl])
 
+    def test_findall_pushes_down_filters(self):
+        sl = self.cs.servers.findall(status='ACTIVE', host='computenode2',
+                                     flavor=1, all_tenants=1)
+        self.assert_called('GET', '/servers/detail?all_tenants=1&flavor=1&'
+                                  'host=computenode2&status=ACTIVE')
+        # the fake ignores the filters, which are checked on the client side
+        self.assertEqual([5678], [s.id for s in sl])
+
+    def test_find_with_ignored_filters(self):
+        # e.g. the admin-only host filter is ignored for other users
+        self.assertRaises(exceptions.NotFound, self.cs.servers.find,
+                          host='computenode3')
+        self.assertEqual([], self.cs.servers.findall(tenant_id='other'))
+        self.assert_called('GET', '/servers/detail?tenant_id=other')
+
     def test_reboot_server(self):
         s = self.cs.servers.get(1234)
         ret = s.reboot()
@@ -443,6 +509,128 @@ class ServersTest(utils.FixturedTestCase):
         self.assert_request_id(ret, fakes.FAKE_REQUEST_ID_LIST)
         self.assert_called('POST', '/servers/1234/action')
 
+    def _servers(self, *rows):
+        return [servers.Server(self.cs.servers, dict(zip(
+            ('id', 'status', 'updated', 'fault'), row)), loaded=True)
+            for row in rows]
+
+    def _get_servers(self, *rows):
+        servers_by_id = dict((server.id, server)
+                             for server in self._servers(*rows))
+
+        def get(server_id):
+            if server_id not in servers_by_id:
+                raise exceptions.NotFound(404)
+            return servers_by_id[server_id]
+        return get
+
+    def test_server_waiter(self):
+        sleep = mock.Mock()
+        waiter = servers.ServerWaiter(self.cs.servers, poll_period=3,
+                                      search_opts={'reservation_id': 'r-1'},
+                                      sleep=sleep)
+        callback = mock.Mock()
+        ok, error, deleted, missing = [
+            waiter.add(server_id, callback=callback)
+            for server_id in ('1', '2', '3', '4')]
+        with mock.patch.object(self.cs.servers, 'list') as mock_list:
+            mock_list.side_effect = [
+                self._servers(('2', 'ERROR', '2016-01-01T00:00:05Z',
+                               {'message': 'boom'}),
+                              ('5', 'BUILD', '2016-01-01T00:00:04Z')),
+                self._servers(),
+                self._servers(('1', 'ACTIVE', '2016-01-01T00:00:09Z'),
+                              ('3', 'DELETED', '2016-01-01T00:00:08Z',
+                               {'message': 'gone'}))]
+            with mock.patch.object(self.cs.servers, 'get') as mock_get:
+                mock_get.side_effect = self._get_servers(
+                    ('1', 'BUILD', '2016-01-01T00:00:01Z'),
+                    ('2', 'BUILD', '2016-01-01T00:00:03Z'),
+                    ('3', 'BUILD', '2016-01-01T00:00:02Z'))
+                waiter.wait()
+            self.assertEqual(['1', '2', '3', '4'],
+                             sorted(c[0][0] for c in mock_get.call_args_list))
+
+        self.assertEqual([
+            mock.call(search_opts={'reservation_id': 'r-1',
+                                   'changes-since': '2016-01-01T00:00:01Z'},
+                      limit=-1),
+            mock.call(search_opts={'reservation_id': 'r-1',
+                                   'changes-since': '2016-01-01T00:00:05Z'},
+                      limit=-1),
+            mock.call(search_opts={'reservation_id': 'r-1',
+                                   'changes-since': '2016-01-01T00:00:05Z'},
+                      limit=-1)],
+            mock_list.call_args_list)
+        self.assertEqual([mock.call(3)] * 3, sleep.call_args_list)
+        self.assertEqual(['1', '2', '3'],
+                         [c[0][0].id for c in callback.call_args_list])
+        self.assertEqual('1', ok.result().id)
+        self.assertRaises(exceptions.ResourceInErrorState, error.result)
+        self.assertRaises(exceptions.InstanceInDeletedState, deleted.result)
+        self.assertRaises(exceptions.NotFound, missing.result)
+        self.assertEqual(0, waiter.pending)
+
+    def test_server_waiter_gets_added_servers(self):
+        waiter = servers.ServerWaiter(self.cs.servers, sleep=mock.Mock())
+        waiter.add('1', final_ok_states=['shutoff'])
+        with mock.patch.object(self.cs.servers, 'list') as mock_list:
+            mock_list.side_effect = [
+                self._servers(('1', 'SHUTOFF', '2016-01-01T00:00:02Z'),
+                              ('2', 'BUILD', '2016-01-01T00:00:02Z'))]
+            with mock.patch.object(self.cs.servers, 'get') as mock_get:
+                mock_get.side_effect = self._get_servers(
+                    ('1', 'ACTIVE', '2016-01-01T00:00:01Z'),
+                    ('2', 'ACTIVE', '2016-01-01T00:00:03Z'))
+                self.assertEqual(1, waiter.poll())
+                future = waiter.add('2')
+                self.assertIs(future, waiter.add('2'))
+                self.assertEqual(0, waiter.poll())
+        self.assertEqual([mock.call('1'), mock.call('2')],
+                         mock_get.call_args_list)
+        self.assertEqual([mock.call(search_opts={
+            'changes-since': '2016-01-01T00:00:01Z'}, limit=-1)],
+            mock_list.call_args_list)
+        self.assertEqual('2', future.result().id)
+
+    def test_server_waiter_first_poll_does_not_list(self):
+        waiter = servers.ServerWaiter(self.cs.servers, sleep=mock.Mock())
+        waiter.add(5678)
+        waiter.add(9012)
+        waiter.poll()
+        paths = [r.path_url for r in self.requests_mock.request_history]
+        self.assertIn('/servers/5678', paths)
+        self.assertIn('/servers/9012', paths)
+        self.assertFalse([p for p in paths if p.startswith('/servers/detail')])
+
+    def test_server_waiter_reads_all_pages(self):
+        waiter = servers.ServerWaiter(self.cs.servers, sleep=mock.Mock())
+        waiter.add('1')
+        waiter._added.clear()
+        waiter._since = '2016-01-01T00:00:00Z'
+        pages = [
+            base.ListWithMeta(self._servers(
+                ('1', 'BUILD', '2016-01-01T00:00:02Z')), None),
+            base.ListWithMeta(self._servers(
+                ('1', 'ACTIVE', '2016-01-01T00:00:01Z')), None),
+            base.ListWithMeta([], None)]
+        with mock.patch.object(self.cs.servers, '_list',
+                               side_effect=pages) as mock_list:
+            self.assertEqual(0, waiter.poll())
+        self.assertEqual(
+            ['/servers/detail?changes-since=2016-01-01T00%3A00%3A00Z',
+             '/servers/detail?changes-since=2016-01-01T00%3A00%3A00Z'
+             '&marker=1',
+             '/servers/detail?changes-since=2016-01-01T00%3A00%3A00Z'
+             '&marker=1'],
+            [c[0][0] for c in mock_list.call_args_list])
+
+    def test_wait_for_status(self):
+        results = self.cs.servers.wait_for_status([5678, 9012])
+        self.assertEqual([5678, 9012], [r.result().id for r in results])
+        self.assertEqual(['/servers/5678', '/servers/9012'], sorted(
+            r.path_url for r in self.requests_mock.request_history[-2:]))
+
     def test_rebuild_server(self):
         s = self.cs.servers.get(1234)
         ret = s.rebuild(image=1)
@@ -1335,55 +1335,67 @@ class ShellTest(utils.TestCase):
         self.assert_called('POST', '/servers/5678/action',
                            {'reboot': {'type': 'SOFT'}}, pos=-1)
 
+    def test_reboot_many_with_poll(self):
+        output, _ = self.run_command(
+            'reboot sample-server2 sample-server3 --poll')
+        self.assert_called('POST', '/servers/9012/action',
+                           {'reboot': {'type': 'SOFT'}}, pos=-3)
+        self.assertEqual([('GET', '/servers/5678'), ('GET', '/servers/9012')],
+                         sorted(self._get_called()[-2:]))
+        self.assertIn('Wait for server <Server: sample-server2> reboot.',
+                      output)
+        self.assertIn('Wait for server <Server: sample-server3> reboot.',
+                      output)
+
     def test_rebuild(self):
         output, _ = self.run_command('rebuild sample-server %s' % FAKE_UUID_1)
-        self.assert_called('GET', '/servers?name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=2)
+        self.assert_called('GET', '/servers/detail?name=sample-server',
+                           pos=0)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=1)
         self.assert_called('POST', '/servers/1234/action',
-                           {'rebuild': {'imageRef': FAKE_UUID_1}}, pos=3)
-        self.assert_called('GET', '/flavors/1', pos=4)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=5)
+                           {'rebuild': {'imageRef': FAKE_UUID_1}}, pos=2)
+        self.assert_called('GET', '/flavors/1', pos=3)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=4)
         self.assertIn('adminPass', output)
 
     def test_rebuild_password(self):
         output, _ = self.run_command('rebuild sample-server %s'
                                      ' --rebuild-password asdf'
                                      % FAKE_UUID_1)
-        self.assert_called('GET', '/servers?name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=2)
+        self.assert_called('GET', '/servers/detail?name=sample-server',
+                           pos=0)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=1)
         self.assert_called('POST', '/servers/1234/action',
                            {'rebuild': {'imageRef': FAKE_UUID_1,
-                            'adminPass': 'asdf'}}, pos=3)
-        self.assert_called('GET', '/flavors/1', pos=4)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=5)
+                            'adminPass': 'asdf'}}, pos=2)
+        self.assert_called('GET', '/flavors/1', pos=3)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=4)
         self.assertIn('adminPass', output)
 
     def test_rebuild_preserve_ephemeral(self):
         self.run_command('rebuild sample-server %s --preserve-ephemeral'
                          % FAKE_UUID_1)
-        self.assert_called('GET', '/servers?name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=2)
+        self.assert_called('GET', '/servers/detail?name=sample-server',
+                           pos=0)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=1)
         self.assert_called('POST', '/servers/1234/action',
                            {'rebuild': {'imageRef': FAKE_UUID_1,
-                                        'preserve_ephemeral': True}}, pos=3)
-        self.assert_called('GET', '/flavors/1', pos=4)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=5)
+                                        'preserve_ephemeral': True}}, pos=2)
+        self.assert_called('GET', '/flavors/1', pos=3)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=4)
 
     def test_rebuild_name_meta(self):
         self.run_command('rebuild sample-server %s --name asdf --meta '
                          'foo=bar' % FAKE_UUID_1)
-        self.assert_called('GET', '/servers?name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=2)
+        self.assert_called('GET', '/servers/detail?name=sample-server',
+                           pos=0)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_1, pos=1)
         self.assert_called('POST', '/servers/1234/action',
                            {'rebuild': {'imageRef': FAKE_UUID_1,
                                         'name': 'asdf',
-                                        'metadata': {'foo': 'bar'}}}, pos=3)
-        self.assert_called('GET', '/flavors/1', pos=4)
-        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=5)
+                                        'metadata': {'foo': 'bar'}}}, pos=2)
+        self.assert_called('GET', '/flavors/1', pos=3)
+        self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=4)
 
     def test_start(self):
         self.run_command('start sample-server')
@@ -1392,8 +1404,8 @@ class ShellTest(utils.TestCase):
     def test_start_with_all_tenants(self):
         self.run_command('start sample-server --all-tenants')
         self.assert_called('GET',
-                           '/servers?all_tenants=1&name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
+                           '/servers/detail?all_tenants=1&name=sample-server',
+                           pos=0)
         self.assert_called('POST', '/servers/1234/action', {'os-start': None})
 
     def test_stop(self):
@@ -1403,8 +1415,8 @@ class ShellTest(utils.TestCase):
     def test_stop_with_all_tenants(self):
         self.run_command('stop sample-server --all-tenants')
         self.assert_called('GET',
-                           '/servers?all_tenants=1&name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
+                           '/servers/detail?all_tenants=1&name=sample-server',
+                           pos=0)
         self.assert_called('POST', '/servers/1234/action', {'os-stop': None})
 
     def test_pause(self):
@@ -1498,8 +1510,8 @@ class ShellTest(utils.TestCase):
 
     def test_show(self):
         self.run_command('show 1234')
-        self.assert_called('GET', '/servers?name=1234', pos=0)
-        self.assert_called('GET', '/servers?name=1234', pos=1)
+        self.assert_called('GET', '/servers/detail?name=1234', pos=0)
+        self.assert_called('GET', '/servers/detail?name=1234', pos=1)
         self.assert_called('GET', '/servers/1234', pos=2)
         self.assert_called('GET', '/flavors/1', pos=3)
         self.assert_called('GET', '/v2/images/%s' % FAKE_UUID_2, pos=4)
@@ -1556,10 +1568,10 @@ class ShellTest(utils.TestCase):
     def test_restore_withname(self):
         self.run_command('restore sample-server')
         self.assert_called('GET',
-                           '/servers?deleted=True&name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
+                           '/servers/detail?deleted=True&name=sample-server',
+                           pos=0)
         self.assert_called('POST', '/servers/1234/action', {'restore': None},
-                           pos=2)
+                           pos=1)
 
     def test_delete_two_with_two_existent(self):
         self.run_command('delete 1234 5678')
@@ -1567,26 +1579,80 @@ class ShellTest(utils.TestCase):
         self.assert_called('DELETE', '/servers/5678', pos=-1)
         self.run_command('delete sample-server sample-server2')
         self.assert_called('GET',
-                           '/servers?name=sample-server', pos=-6)
-        self.assert_called('GET', '/servers/1234', pos=-5)
-        self.assert_called('DELETE', '/servers/1234', pos=-4)
+                           '/servers/detail?name=sample-server', pos=-4)
+        self.assert_called('DELETE', '/servers/1234', pos=-3)
         self.assert_called('GET',
-                           '/servers?name=sample-server2',
-                           pos=-3)
-        self.assert_called('GET', '/servers/5678', pos=-2)
+                           '/servers/detail?name=sample-server2',
+                           pos=-2)
         self.assert_called('DELETE', '/servers/5678', pos=-1)
 
+    def _get_called(self):
+        return [call[:2] for call in self.shell.cs.client.callstack]
+
+    def test_delete_parallel(self):
+        self.run_command('--parallel 2 delete 1234 5678')
+        calls = self._get_called()
+        self.assertIn(('DELETE', '/servers/1234'), calls)
+        self.assertIn(('DELETE', '/servers/5678'), calls)
+
+    def test_resolve_cache(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'NOVACLIENT_UUID_CACHE_DIR', cache_dir))
+        self.run_command('--resolve-cache-ttl 60 '
+                         'reboot sample-server sample-server2')
+        self.assertEqual([('GET', '/servers/detail'),
+                          ('POST', '/servers/1234/action'),
+                          ('POST', '/servers/5678/action')],
+                         self._get_called())
+        self.assertEqual(1, len([f for f in os.listdir(cache_dir)
+                                 if f.startswith('name-index-')]))
+
+    def test_resolve_cache_per_region(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'NOVACLIENT_UUID_CACHE_DIR', cache_dir))
+        for region, listed in (('RegionOne', True), ('RegionTwo', True),
+                               ('RegionOne', False)):
+            self.run_command('--os-region-name %s --resolve-cache-ttl 60 '
+                             'reboot sample-server' % region)
+            self.assertEqual(listed, ('GET', '/servers/detail') in
+                             self._get_called())
+        self.assertEqual(2, len([f for f in os.listdir(cache_dir)
+                                 if f.startswith('name-index-')]))
+
+    def test_completion_cache(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'NOVACLIENT_UUID_CACHE_DIR', cache_dir))
+        self.run_command('list')
+        cache = self.shell.cs.completion_cache
+        self.assertIsInstance(cache, base.CompletionCache)
+        self.assertEqual(os.path.join(cache_dir, 'completion-cache.sqlite'),
+                         cache.path)
+        self.assertIn('sample-server', cache.complete('sample'))
+
+    def test_reboot_parallel(self):
+        output, _ = self.run_command(
+            '--parallel 3 reboot sample-server sample-server2')
+        calls = self._get_called()
+        self.assertEqual(2, calls.count(('POST', '/servers/1234/action')) +
+                         calls.count(('POST', '/servers/5678/action')))
+        self.assertEqual(
+            'Request to reboot server <Server: sample-server> has been '
+            'accepted.\nRequest to reboot server <Server: sample-server2> has '
+            'been accepted.\n', output)
+
     def test_delete_two_with_two_existent_all_tenants(self):
         self.run_command('delete sample-server sample-server2 --all-tenants')
         self.assert_called('GET',
-                           '/servers?all_tenants=1&name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
-        self.assert_called('DELETE', '/servers/1234', pos=2)
+                           '/servers/detail?all_tenants=1&name=sample-server',
+                           pos=0)
+        self.assert_called('DELETE', '/servers/1234', pos=1)
         self.assert_called('GET',
-                           '/servers?all_tenants=1&name=sample-server2',
-                           pos=3)
-        self.assert_called('GET', '/servers/5678', pos=4)
-        self.assert_called('DELETE', '/servers/5678', pos=5)
+                           '/servers/detail?all_tenants=1&name=sample-server2',
+                           pos=2)
+        self.assert_called('DELETE', '/servers/5678', pos=3)
 
     def test_delete_two_with_one_nonexistent(self):
         cmd = 'delete 1234 123456789'
@@ -2090,22 +2156,22 @@ class ShellTest(utils.TestCase):
     def test_reset_state_with_all_tenants(self):
         self.run_command('reset-state sample-server --all-tenants')
         self.assert_called('GET',
-                           '/servers?all_tenants=1&name=sample-server', pos=0)
-        self.assert_called('GET', '/servers/1234', pos=1)
+                           '/servers/detail?all_tenants=1&name=sample-server',
+                           pos=0)
         self.assert_called('POST', '/servers/1234/action',
                            {'os-resetState': {'state': 'error'}})
 
     def test_reset_state_multiple(self):
         self.run_command('reset-state sample-server sample-server2')
         self.assert_called('POST', '/servers/1234/action',
-                           {'os-resetState': {'state': 'error'}}, pos=-4)
+                           {'os-resetState': {'state': 'error'}}, pos=-3)
         self.assert_called('POST', '/servers/5678/action',
                            {'os-resetState': {'state': 'error'}}, pos=-1)
 
     def test_reset_state_active_multiple(self):
         self.run_command('reset-state --active sample-server sample-server2')
         self.assert_called('POST', '/servers/1234/action',
-                           {'os-resetState': {'state': 'active'}}, pos=-4)
+                           {'os-resetState': {'state': 'active'}}, pos=-3)
         self.assert_called('POST', '/servers/5678/action',
                            {'os-resetState': {'state': 'active'}}, pos=-1)
 
@@ -3254,6 +3320,43 @@ class PollForStatusTestCase(utils.TestCase):
             mock_stdout.write.call_args_list
         )
 
+    @mock.patch("novaclient.v2.shell.time")
+    def test_adaptive_poll_period(self, mock_time):
+        updated_objects = (
+            base.Resource(None, info={"status": "BUILD"}),
+            base.Resource(None, info={"status": "BUILD"}),
+            base.Resource(None, info={"status": "ACTIVE"}))
+        poll_fn = mock.MagicMock(side_effect=updated_objects)
+
+        novaclient.v2.shell._poll_for_status(
+            poll_fn=poll_fn,
+            obj_id="uuuuuuuuuuuiiiiiiiii",
+            final_ok_states=["active"],
+            action="some",
+            silent=True,
+            min_poll_period=2,
+            max_poll_period=3)
+
+        self.assertEqual([mock.call(2), mock.call(3)],
+                         mock_time.sleep.call_args_list)
+
+    @mock.patch("novaclient.v2.shell.time")
+    @mock.patch("novaclient.utils.PollScheduler.expired",
+                new_callable=mock.PropertyMock, side_effect=[False, True])
+    def test_deadline(self, mock_expired, mock_time):
+        poll_fn = mock.MagicMock(return_value=base.Resource(
+            None, info={"status": "BUILD"}))
+
+        self.assertRaises(exceptions.CommandError,
+                          novaclient.v2.shell._poll_for_status,
+                          poll_fn=poll_fn,
+                          obj_id="uuuuuuuuuuuiiiiiiiii",
+                          final_ok_states=["active"],
+                          action="some",
+                          silent=True,
+                          deadline=5)
+        self.assertEqual(2, poll_fn.call_count)
+
     @mock.patch("novaclient.v2.shell.time")
     def test_error_state(self, mock_time):
         fault_msg = "Oops"
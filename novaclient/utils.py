@@ -11,6 +11,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import codecs
+from concurrent import futures
 import contextlib
 import json
 import os
@@ -21,7 +23,6 @@ import uuid
 
 from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
-import pkg_resources
 import prettytable
 import six
 from six.moves.urllib import parse
@@ -276,11 +277,22 @@ def print_dict(d, dict_property="Property", dict_value="Value", wrap=0):
 
 def find_resource(manager, name_or_id, wrap_exception=True, **find_args):
     """Helper for the _find_* methods."""
+    # resolve the name or ID without any request if the client indexes
+    # resources (see novaclient.base.ResourceIndex)
+    index = getattr(getattr(manager, 'api', None), 'resource_index', None)
+    if index is not None:
+        matches = index.find(manager, name_or_id, find_args)
+        if matches and len(matches) == 1:
+            return matches[0]
+
     # for str id which is not uuid (for Flavor, Keypair and hypervsior in cells
     # environments search currently)
     if getattr(manager, 'is_alphanum_id_allowed', False):
         try:
-            return manager.get(name_or_id)
+            resource = manager.get(name_or_id)
+            if index is not None:
+                index.add(manager, resource, find_args)
+            return resource
         except exceptions.NotFound:
             pass
 
@@ -292,26 +304,38 @@ def find_resource(manager, name_or_id, wrap_exception=True, **find_args):
             tmp_id = tmp_id.decode()
 
         uuid.UUID(tmp_id)
-        return manager.get(tmp_id)
+        resource = manager.get(tmp_id)
+        if index is not None:
+            index.add(manager, resource, find_args)
+        return resource
     except (TypeError, ValueError, exceptions.NotFound):
         pass
 
     # then try to get entity as name
     try:
-        try:
-            resource = getattr(manager, 'resource_class', None)
-            name_attr = resource.NAME_ATTR if resource else 'name'
-            kwargs = {name_attr: name_or_id}
-            kwargs.update(find_args)
-            return manager.find(**kwargs)
-        except exceptions.NotFound:
-            pass
+        if index is not None:
+            # a single listing resolves names and human ids, and fills the
+            # index for the next resolutions
+            matches = index.refresh(manager, name_or_id, find_args)
+            if len(matches) > 1:
+                raise exceptions.NoUniqueMatch()
+            elif matches:
+                return matches[0]
+        else:
+            try:
+                resource = getattr(manager, 'resource_class', None)
+                name_attr = resource.NAME_ATTR if resource else 'name'
+                kwargs = {name_attr: name_or_id}
+                kwargs.update(find_args)
+                return manager.find(**kwargs)
+            except exceptions.NotFound:
+                pass
 
-        # then try to find entity by human_id
-        try:
-            return manager.find(human_id=name_or_id, **find_args)
-        except exceptions.NotFound:
-            pass
+            # then try to find entity by human_id
+            try:
+                return manager.find(human_id=name_or_id, **find_args)
+            except exceptions.NotFound:
+                pass
     except exceptions.NoUniqueMatch:
         msg = (_("Multiple %(class)s matches found for '%(name)s', use an ID "
                  "to be more specific.") %
@@ -397,15 +421,55 @@ def safe_issubclass(*args):
     return False
 
 
-def do_action_on_many(action, resources, success_msg, error_msg):
-    """Helper to run an action on many resources."""
-    failure_flag = False
+def run_concurrently(func, items, max_workers=None):
+    """Call ``func`` for every item using at most ``max_workers`` threads.
+
+    Yields ``(item, result, exception)`` tuples in the order of ``items``,
+    as soon as the result for the item is available. Exceptions raised by
+    ``func`` are returned, not raised, so one failure does not prevent the
+    remaining items from being processed.
 
-    for resource in resources:
+    :param func: callable taking a single item
+    :param items: iterable of items
+    :param max_workers: maximum number of concurrent calls; ``None`` or 1
+                        runs the calls sequentially in the calling thread
+    """
+    def _call(item):
         try:
-            action(resource)
-            print(success_msg % resource)
+            return item, func(item), None
         except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    if not max_workers or max_workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield _call(item)
+        return
+
+    executor = futures.ThreadPoolExecutor(min(max_workers, len(items)))
+    try:
+        pending = [executor.submit(_call, item) for item in items]
+        for future in pending:
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True)
+
+
+def do_action_on_many(action, resources, success_msg, error_msg,
+                      max_workers=None):
+    """Helper to run an action on many resources.
+
+    :param max_workers: maximum number of resources processed concurrently.
+                        Messages are printed in the order of ``resources``
+                        regardless of this value.
+    """
+    failure_flag = False
+
+    for resource, _result, e in run_concurrently(action, resources,
+                                                 max_workers):
+        if e is None:
+            print(success_msg % resource)
+        else:
             failure_flag = True
             print(encodeutils.safe_encode(six.text_type(e)))
 
@@ -413,8 +477,85 @@ def do_action_on_many(action, resources, success_msg, error_msg):
         raise exceptions.CommandError(error_msg)
 
 
+class PollScheduler(object):
+    """Compute the delays between the polls of a long running action.
+
+    Polls start every ``min_period`` seconds and back off by ``backoff``
+    up to ``max_period``. Once a ``progress`` percentage is reported and
+    increasing, the next poll is scheduled close to the completion time
+    predicted from its rate of change, within the same bounds.
+
+    :param min_period: shortest delay between two polls, in seconds
+    :param max_period: longest delay between two polls, in seconds
+    :param backoff: factor applied to the delay after each poll
+    :param deadline: seconds after which :attr:`expired` is true
+                     (optional)
+    """
+
+    def __init__(self, min_period=1, max_period=30, backoff=1.5,
+                 deadline=None, clock=time.time):
+        self.min_period = float(min_period)
+        self.max_period = max(float(max_period), self.min_period)
+        self.backoff = backoff
+        self._clock = clock
+        self._start = clock()
+        self._deadline = (self._start + deadline
+                          if deadline is not None else None)
+        self._period = self.min_period
+        self._first_progress = None
+
+    @classmethod
+    def fixed(cls, period, **kwargs):
+        """Return a scheduler polling every ``period`` seconds."""
+        return cls(min_period=period, max_period=period, backoff=1,
+                   **kwargs)
+
+    @property
+    def expired(self):
+        """Whether the deadline is reached."""
+        return (self._deadline is not None and
+                self._clock() >= self._deadline)
+
+    def eta(self, progress):
+        """Seconds left until ``progress`` reaches 100, or None."""
+        now = self._clock()
+        if progress is None or not 0 < progress < 100:
+            return None
+        if self._first_progress is None:
+            self._first_progress = (now, progress)
+            return None
+        start, first = self._first_progress
+        if progress <= first or now <= start:
+            return None
+        return (100 - progress) * (now - start) / (progress - first)
+
+    def next_delay(self, progress=None):
+        """Return the number of seconds to wait before the next poll.
+
+        :param progress: completion percentage reported by the last poll
+                         (optional)
+        """
+        delay = self._period
+        self._period = min(self._period * self.backoff, self.max_period)
+
+        eta = self.eta(progress)
+        if eta is not None:
+            # Poll right after the predicted completion when it's close,
+            # otherwise halfway to it.
+            delay = eta if eta <= delay else max(delay, eta / 2)
+        delay = min(max(delay, self.min_period), self.max_period)
+
+        if self._deadline is not None:
+            delay = max(0, min(delay, self._deadline - self._clock()))
+        return delay
+
+
 def load_entry_point(ep_name, name=None):
     """Try to load the entry point ep_name that matches name."""
+    # NOTE: importing pkg_resources scans all the installed distributions,
+    # only pay for it when entry points are needed.
+    import pkg_resources
+
     for ep in pkg_resources.iter_entry_points(ep_name, name=name):
         try:
             # FIXME(dhellmann): It would be better to use stevedore
@@ -463,12 +604,166 @@ def record_time(times, enabled, *args):
         yield
     else:
         start = time.time()
-        yield
-        end = time.time()
-        times.append((' '.join(args), start, end))
+        try:
+            yield
+        finally:
+            end = time.time()
+            times.append((' '.join(args), start, end))
 
 
 def prepare_query_string(params):
     """Convert dict params to query string"""
     params = sorted(params.items(), key=lambda x: x[0])
     return '?%s' % parse.urlencode(params) if params else ''
+
+
+class _JSONStream(object):
+    """Decode JSON values one by one from an iterable of byte chunks."""
+
+    _whitespace = re.compile(r'[ \t\n\r]*')
+    _delimiters = ' \t\n\r,:]}'
+    # Strings, a lone quote starting an incomplete string, and brackets.
+    _tokens = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{}]')
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buf = u''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self):
+        """Append the next chunk to the buffer, returning False at the end."""
+        while not self._eof:
+            try:
+                text = self._utf8.decode(next(self._chunks))
+            except StopIteration:
+                self._eof = True
+                text = self._utf8.decode(b'', True)
+            if text:
+                # Drop what was consumed already to bound memory usage.
+                self._buf = self._buf[self._pos:] + text
+                self._pos = 0
+                return True
+        return False
+
+    def peek(self):
+        """Return the next non-whitespace character, or '' at the end."""
+        while True:
+            self._pos = self._whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read():
+                return ''
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of ``chars``."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(_("Expected one of %(chars)r at %(pos)s, "
+                               "got %(char)r") % {'chars': chars,
+                                                  'pos': self._pos,
+                                                  'char': char})
+        self._pos += 1
+        return char
+
+    def value(self):
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                # The value may be incomplete.
+                if not self._read():
+                    raise
+                continue
+            # Values are followed by a delimiter, otherwise (e.g. for "1"
+            # or "1." instead of "1.5") the value continues in the next chunk.
+            if ((end < len(self._buf) and self._buf[end] in self._delimiters)
+                    or not self._read()):
+                self._pos = end
+                return value
+
+    def skip(self):
+        """Skip the next value without decoding it."""
+        if self.peek() not in '{[':
+            self.value()
+            return
+        depth = 0
+        while True:
+            for match in self._tokens.finditer(self._buf, self._pos):
+                token = match.group()
+                if token == '"':
+                    break
+                if token in '{[':
+                    depth += 1
+                elif token in ']}':
+                    depth -= 1
+                self._pos = match.end()
+                if not depth:
+                    return
+            if not self._read():
+                raise ValueError(_("Unterminated JSON value at %s")
+                                 % self._pos)
+
+    def select(self, fields):
+        """Decode the next object, skipping the keys not in ``fields``."""
+        if self.peek() != '{':
+            return self.value()
+        self.expect('{')
+        obj = {}
+        if self.peek() == '}':
+            self.expect('}')
+            return obj
+        while True:
+            name = self.value()
+            self.expect(':')
+            if name in fields:
+                obj[name] = self.value()
+            else:
+                self.skip()
+            if self.expect(',}') == '}':
+                return obj
+
+
+def iter_json_list(chunks, key, extra=None, fields=None):
+    """Iterate over the items of a list in a JSON object being received.
+
+    Items of ``{"<key>": [...]}`` are yielded as soon as they are complete,
+    so only one of them is decoded at a time.
+
+    :param chunks: iterable of bytes, e.g. ``response.iter_content()``
+    :param key: key of the list in the JSON object
+    :param extra: dict updated with the other keys of the object once
+                  the iteration ends (optional)
+    :param fields: keys to keep in the items, the values of the other keys
+                   are skipped without being decoded (optional)
+    :raises ValueError: if the data isn't such a JSON object
+    """
+    stream = _JSONStream(chunks)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        name = stream.value()
+        stream.expect(':')
+        if name == key:
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    if fields is None:
+                        yield stream.value()
+                    else:
+                        yield stream.select(fields)
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            value = stream.value()
+            if extra is not None:
+                extra[name] = value
+        if stream.expect(',}') == '}':
+            return
@@ -16,42 +16,39 @@
 import logging
 
 from keystoneauth1.exceptions import catalog as key_ex
+from oslo_utils import importutils
 
+from novaclient import base
 from novaclient import client
 from novaclient import exceptions
 from novaclient.i18n import _LE
-from novaclient.v2 import agents
-from novaclient.v2 import aggregates
-from novaclient.v2 import availability_zones
-from novaclient.v2 import certs
-from novaclient.v2 import cloudpipe
-from novaclient.v2 import fixed_ips
-from novaclient.v2 import flavor_access
-from novaclient.v2 import flavors
-from novaclient.v2 import floating_ip_dns
-from novaclient.v2 import floating_ip_pools
-from novaclient.v2 import floating_ips
-from novaclient.v2 import floating_ips_bulk
-from novaclient.v2 import fping
-from novaclient.v2 import hosts
-from novaclient.v2 import hypervisors
-from novaclient.v2 import images
-from novaclient.v2 import keypairs
-from novaclient.v2 import limits
-from novaclient.v2 import networks
-from novaclient.v2 import quota_classes
-from novaclient.v2 import quotas
-from novaclient.v2 import security_group_default_rules
-from novaclient.v2 import security_group_rules
-from novaclient.v2 import security_groups
-from novaclient.v2 import server_groups
-from novaclient.v2 import server_migrations
-from novaclient.v2 import servers
-from novaclient.v2 import services
-from novaclient.v2 import usage
-from novaclient.v2 import versions
-from novaclient.v2 import virtual_interfaces
-from novaclient.v2 import volumes
+
+
+class _LazyManager(object):
+    """Manager of a client, created on first access.
+
+    The module defining the manager is only imported at that point, and the
+    manager is then stored on the client, so next accesses are plain
+    attribute lookups.
+    """
+
+    def __init__(self, manager_class):
+        self.name = None
+        self.manager_class = "novaclient.v2.%s" % manager_class
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.name is None:
+            # NOTE: Python < 3.6 doesn't call __set_name__.
+            self.name = next(name for cls in owner.__mro__
+                             for name, attr in vars(cls).items()
+                             if attr is self)
+        manager = importutils.import_class(self.manager_class)(instance)
+        return instance.__dict__.setdefault(self.name, manager)
 
 
 class Client(object):
@@ -61,6 +58,50 @@ class Client(object):
       directly. It should be done via `novaclient.client.Client` interface.
     """
 
+    flavors = _LazyManager("flavors.FlavorManager")
+    flavor_access = _LazyManager("flavor_access.FlavorAccessManager")
+    images = _LazyManager("images.ImageManager")
+    glance = _LazyManager("images.GlanceManager")
+    limits = _LazyManager("limits.LimitsManager")
+    servers = _LazyManager("servers.ServerManager")
+    versions = _LazyManager("versions.VersionManager")
+
+    # extensions
+    agents = _LazyManager("agents.AgentsManager")
+    dns_domains = _LazyManager("floating_ip_dns.FloatingIPDNSDomainManager")
+    dns_entries = _LazyManager("floating_ip_dns.FloatingIPDNSEntryManager")
+    cloudpipe = _LazyManager("cloudpipe.CloudpipeManager")
+    certs = _LazyManager("certs.CertificateManager")
+    floating_ips = _LazyManager("floating_ips.FloatingIPManager")
+    floating_ip_pools = _LazyManager("floating_ip_pools.FloatingIPPoolManager")
+    fping = _LazyManager("fping.FpingManager")
+    volumes = _LazyManager("volumes.VolumeManager")
+    keypairs = _LazyManager("keypairs.KeypairManager")
+    networks = _LazyManager("networks.NetworkManager")
+    neutron = _LazyManager("networks.NeutronManager")
+    quota_classes = _LazyManager("quota_classes.QuotaClassSetManager")
+    quotas = _LazyManager("quotas.QuotaSetManager")
+    security_groups = _LazyManager("security_groups.SecurityGroupManager")
+    security_group_rules = _LazyManager(
+        "security_group_rules.SecurityGroupRuleManager")
+    security_group_default_rules = _LazyManager(
+        "security_group_default_rules.SecurityGroupDefaultRuleManager")
+    usage = _LazyManager("usage.UsageManager")
+    virtual_interfaces = _LazyManager(
+        "virtual_interfaces.VirtualInterfaceManager")
+    aggregates = _LazyManager("aggregates.AggregateManager")
+    hosts = _LazyManager("hosts.HostManager")
+    hypervisors = _LazyManager("hypervisors.HypervisorManager")
+    hypervisor_stats = _LazyManager("hypervisors.HypervisorStatsManager")
+    services = _LazyManager("services.ServiceManager")
+    fixed_ips = _LazyManager("fixed_ips.FixedIPsManager")
+    floating_ips_bulk = _LazyManager("floating_ips_bulk.FloatingIPBulkManager")
+    availability_zones = _LazyManager(
+        "availability_zones.AvailabilityZoneManager")
+    server_groups = _LazyManager("server_groups.ServerGroupsManager")
+    server_migrations = _LazyManager(
+        "server_migrations.ServerMigrationsManager")
+
     def __init__(self, username=None, api_key=None, project_id=None,
                  auth_url=None, insecure=False, timeout=None,
                  proxy_tenant_id=None, proxy_token=None, region_name=None,
@@ -97,7 +138,8 @@ class Client(object):
         :param str cacert: cacert
         :param str tenant_id: Tenant ID
         :param str user_id: User ID
-        :param bool connection_pool: Use a connection pool
+        :param connection_pool: Use a connection pool, either True or a
+            novaclient.client.ConnectionPool with its own settings
         :param str session: Session
         :param str auth: Auth
         :param api_version: Compute API version
@@ -127,57 +169,23 @@ class Client(object):
         self.projectid = project_id
         self.tenant_id = tenant_id
         self.user_id = user_id
-        self.flavors = flavors.FlavorManager(self)
-        self.flavor_access = flavor_access.FlavorAccessManager(self)
-        self.images = images.ImageManager(self)
-        self.glance = images.GlanceManager(self)
-        self.limits = limits.LimitsManager(self)
-        self.servers = servers.ServerManager(self)
-        self.versions = versions.VersionManager(self)
-
-        # extensions
-        self.agents = agents.AgentsManager(self)
-        self.dns_domains = floating_ip_dns.FloatingIPDNSDomainManager(self)
-        self.dns_entries = floating_ip_dns.FloatingIPDNSEntryManager(self)
-        self.cloudpipe = cloudpipe.CloudpipeManager(self)
-        self.certs = certs.CertificateManager(self)
-        self.floating_ips = floating_ips.FloatingIPManager(self)
-        self.floating_ip_pools = floating_ip_pools.FloatingIPPoolManager(self)
-        self.fping = fping.FpingManager(self)
-        self.volumes = volumes.VolumeManager(self)
-        self.keypairs = keypairs.KeypairManager(self)
-        self.networks = networks.NetworkManager(self)
-        self.neutron = networks.NeutronManager(self)
-        self.quota_classes = quota_classes.QuotaClassSetManager(self)
-        self.quotas = quotas.QuotaSetManager(self)
-        self.security_groups = security_groups.SecurityGroupManager(self)
-        self.security_group_rules = \
-            security_group_rules.SecurityGroupRuleManager(self)
-        self.security_group_default_rules = \
-            security_group_default_rules.SecurityGroupDefaultRuleManager(self)
-        self.usage = usage.UsageManager(self)
-        self.virtual_interfaces = \
-            virtual_interfaces.VirtualInterfaceManager(self)
-        self.aggregates = aggregates.AggregateManager(self)
-        self.hosts = hosts.HostManager(self)
-        self.hypervisors = hypervisors.HypervisorManager(self)
-        self.hypervisor_stats = hypervisors.HypervisorStatsManager(self)
-        self.services = services.ServiceManager(self)
-        self.fixed_ips = fixed_ips.FixedIPsManager(self)
-        self.floating_ips_bulk = floating_ips_bulk.FloatingIPBulkManager(self)
+        self.resource_index = None
+        # NOTE: the bash completion cache is only written by the shell, see
+        # novaclient.base.CompletionCache
+        self.completion_cache = None
         self.os_cache = os_cache or not no_cache
-        self.availability_zones = \
-            availability_zones.AvailabilityZoneManager(self)
-        self.server_groups = server_groups.ServerGroupsManager(self)
-        self.server_migrations = \
-            server_migrations.ServerMigrationsManager(self)
-
-        # Add in any extensions...
-        if extensions:
-            for extension in extensions:
+
+        # Add in any extensions... Their managers are created, and their
+        # modules imported, on first access as well (see __getattr__).
+        self._extensions = {}
+        for extension in extensions or ():
+            if hasattr(type(self), extension.name):
+                # NOTE: __getattr__ isn't called for class attributes.
                 if extension.manager_class:
                     setattr(self, extension.name,
                             extension.manager_class(self))
+            else:
+                self._extensions[extension.name] = extension
 
         if not logger:
             logger = logging.getLogger(__name__)
@@ -211,6 +219,13 @@ class Client(object):
             logger=logger,
             **kwargs)
 
+    def __getattr__(self, name):
+        extension = self.__dict__.get('_extensions', {}).get(name)
+        if extension is None or extension.manager_class is None:
+            raise AttributeError("'%s' object has no attribute '%s'"
+                                 % (type(self).__name__, name))
+        return self.__dict__.setdefault(name, extension.manager_class(self))
+
     @property
     def api_version(self):
         return self.client.api_version
@@ -238,6 +253,36 @@ class Client(object):
     def reset_timings(self):
         self.client.reset_timings()
 
+    def enable_resource_index(self, ttl=300, path=None):
+        """Resolve resource names without listing them each time.
+
+        Names resolved by ``utils.find_resource`` (used by the shell) are
+        indexed per manager, so that a name costs at most one listing and
+        no request at all once indexed.
+
+        :param ttl: time after which the index of a manager expires, in
+                    seconds
+        :param path: JSON file persisting the index between processes
+                     (optional)
+        :returns: the :class:`novaclient.base.ResourceIndex` in use
+        """
+        self.resource_index = base.ResourceIndex(ttl=ttl, path=path)
+        return self.resource_index
+
+    def enable_rate_limiting(self, limiter=None):
+        """Throttle requests to stay under the rate limits of the cloud.
+
+        :param limiter: :class:`novaclient.client.RateLimiter` to use. By
+                        default one is built from the rate limits returned by
+                        ``limits.get()``. Passing the same limiter to several
+                        clients makes them share the limits.
+        :returns: the limiter in use
+        """
+        if limiter is None:
+            limiter = client.RateLimiter(self.limits.get().rate)
+        self.client.rate_limiter = limiter
+        return limiter
+
     def has_neutron(self):
         """Check the service catalog to figure out if we have neutron.
 
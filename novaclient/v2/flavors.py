@@ -131,6 +131,34 @@ class FlavorManager(base.ManagerWithFind):
 
         return self._list("/flavors%s%s" % (detail, query_string), "flavors")
 
+    def iter_list(self, detailed=True, is_public=True, marker=None,
+                  limit=None, sort_key=None, sort_dir=None, page_size=None,
+                  prefetch=True):
+        """Iterate over flavors, fetching them page by page.
+
+        :param detailed: Whether flavor needs to be return with details
+                         (optional).
+        :param is_public: Filter flavors with provided access type (optional).
+        :param marker: Begin returning flavors that appear later in the flavor
+                       list than that represented by this flavor id (optional).
+        :param limit: maximum number of flavors to return (optional).
+        :param sort_key: Flavors list sort key (optional).
+        :param sort_dir: Flavors list sort direction (optional).
+        :param page_size: number of flavors requested per page (optional).
+                          By default the maximum page size of the server is
+                          used.
+        :param prefetch: whether to fetch the next page in the background
+                         while the current one is consumed.
+        :returns: :class:`novaclient.base.PageIterator` of :class:`Flavor`
+        """
+        def list_page(marker, limit):
+            return self.list(detailed=detailed, is_public=is_public,
+                             marker=marker, limit=limit, sort_key=sort_key,
+                             sort_dir=sort_dir)
+
+        return base.PageIterator(list_page, marker=marker, limit=limit,
+                                 page_size=page_size, prefetch=prefetch)
+
     def get(self, flavor):
         """Get a specific flavor.
 
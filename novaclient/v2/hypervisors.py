@@ -65,6 +65,43 @@ class HypervisorManager(base.ManagerWithFind):
         """
         return self._list_base(detailed=detailed, marker=marker, limit=limit)
 
+    @api_versions.wraps("2.0", "2.32")
+    def iter_list(self, detailed=True):
+        """
+        Iterate over hypervisors.
+
+        Hypervisors are not paginated before microversion 2.33, so they are
+        fetched in a single request.
+        """
+        return base.PageIterator(lambda: self._list_base(detailed=detailed),
+                                 paginated=False)
+
+    @api_versions.wraps("2.33")
+    def iter_list(self, detailed=True, marker=None, limit=None,
+                  page_size=None, prefetch=True):
+        """
+        Iterate over hypervisors, fetching them page by page.
+
+        :param detailed: Whether to return detailed hypervisor info
+                         (optional).
+        :param marker: Begin returning hypervisors that appear later in the
+                       hypervisor list than that represented by this
+                       hypervisor id (optional).
+        :param limit: maximum number of hypervisors to return (optional).
+        :param page_size: number of hypervisors requested per page (optional).
+                          By default the maximum page size of the server is
+                          used.
+        :param prefetch: whether to fetch the next page in the background
+                         while the current one is consumed.
+        :returns: :class:`novaclient.base.PageIterator` of :class:`Hypervisor`
+        """
+        def list_page(marker, limit):
+            return self._list_base(detailed=detailed, marker=marker,
+                                   limit=limit)
+
+        return base.PageIterator(list_page, marker=marker, limit=limit,
+                                 page_size=page_size, prefetch=prefetch)
+
     def search(self, hypervisor_match, servers=False):
         """
         Get a list of matching hypervisors.
@@ -139,6 +139,28 @@ class ImageManager(base.ManagerWithFind):
         query = '?%s' % parse.urlencode(params) if params else ''
         return self._list('/images%s%s' % (detail, query), 'images')
 
+    def iter_list(self, detailed=True, marker=None, limit=None,
+                  page_size=None, prefetch=True):
+        """
+        DEPRECATED: Iterate over images, fetching them page by page.
+
+        :param detailed: Whether to return detailed image info (optional).
+        :param marker: Begin returning images that appear later in the image
+                       list than that represented by this image id (optional).
+        :param limit: maximum number of images to return (optional).
+        :param page_size: number of images requested per page (optional).
+                          By default the maximum page size of the server is
+                          used.
+        :param prefetch: whether to fetch the next page in the background
+                         while the current one is consumed.
+        :returns: :class:`novaclient.base.PageIterator` of :class:`Image`
+        """
+        def list_page(marker, limit):
+            return self.list(detailed=detailed, marker=marker, limit=limit)
+
+        return base.PageIterator(list_page, marker=marker, limit=limit,
+                                 page_size=page_size, prefetch=prefetch)
+
     @api_versions.wraps('2.0', '2.35')
     def delete(self, image):
         """
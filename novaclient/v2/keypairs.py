@@ -195,3 +195,39 @@ class KeypairManager(base.ManagerWithFind):
         query_string = utils.prepare_query_string(params)
         url = '/%s%s' % (self.keypair_prefix, query_string)
         return self._list(url, 'keypairs')
+
+    @api_versions.wraps("2.0", "2.34")
+    def iter_list(self, **kwargs):
+        """
+        Iterate over keypairs.
+
+        Keypairs are not paginated before microversion 2.35, so they are
+        fetched in a single request. Keyword arguments are passed to
+        :meth:`list`.
+        """
+        return base.PageIterator(lambda: self.list(**kwargs),
+                                 paginated=False)
+
+    @api_versions.wraps("2.35")
+    def iter_list(self, user_id=None, marker=None, limit=None,
+                  page_size=None, prefetch=True):
+        """
+        Iterate over keypairs, fetching them page by page.
+
+        :param user_id: Id of key-pairs owner (Admin only).
+        :param marker: Begin returning keypairs that appear later in the
+                       keypair list than that represented by this keypair name
+                       (optional).
+        :param limit: maximum number of keypairs to return (optional).
+        :param page_size: number of keypairs requested per page (optional).
+                          By default the maximum page size of the server is
+                          used.
+        :param prefetch: whether to fetch the next page in the background
+                         while the current one is consumed.
+        :returns: :class:`novaclient.base.PageIterator` of :class:`Keypair`
+        """
+        def list_page(marker, limit):
+            return self.list(user_id=user_id, marker=marker, limit=limit)
+
+        return base.PageIterator(list_page, marker=marker, limit=limit,
+                                 page_size=page_size, prefetch=prefetch)
@@ -20,7 +20,9 @@ Server interface.
 """
 
 import base64
+import time
 
+from concurrent import futures
 from oslo_utils import encodeutils
 import six
 from six.moves.urllib import parse
@@ -30,6 +32,7 @@ from novaclient import base
 from novaclient import crypto
 from novaclient import exceptions
 from novaclient.i18n import _
+from novaclient import utils
 from novaclient.v2 import security_groups
 
 
@@ -606,8 +609,155 @@ class NetworkInterface(base.Resource):
         return '<NetworkInterface: %s>' % self.id
 
 
+class ServerWaiter(object):
+    """Wait for many servers to reach a status with one listing per poll.
+
+    Each poll lists the servers changed since the previous one, using the
+    ``changes-since`` filter, instead of getting every watched server. The
+    servers are got directly the first time they are polled, so that the
+    first poll doesn't list every server of the tenant, and the listings
+    start from the earliest update of the servers still waited for.
+
+    :param manager: :class:`ServerManager` used to list servers
+    :param poll_period: seconds to sleep between two polls
+    :param search_opts: additional filters of the listings, for example
+                        ``{'reservation_id': ...}`` or
+                        ``{'all_tenants': 1}`` (optional).
+    :param max_workers: maximum number of servers got concurrently when
+                        they are first polled.
+    """
+
+    def __init__(self, manager, poll_period=5, search_opts=None,
+                 sleep=time.sleep, max_workers=10):
+        self.manager = manager
+        self.poll_period = poll_period
+        self.search_opts = dict(search_opts or {})
+        self.max_workers = max_workers
+        self._sleep = sleep
+        self._watched = {}
+        self._added = set()
+        self._since = None
+
+    def add(self, server, final_ok_states=('active',),
+            status_field='status', callback=None):
+        """Watch a server.
+
+        :param server: The :class:`Server` (or its ID) to watch.
+        :param final_ok_states: statuses (lower case) ending the wait.
+        :param status_field: attribute of the server holding its status.
+        :param callback: called with the :class:`Server` each time it is
+                         listed while it is still being waited for.
+        :returns: a ``concurrent.futures.Future`` set to the server once
+                  it reaches one of ``final_ok_states``, or to
+                  :class:`novaclient.exceptions.ResourceInErrorState`,
+                  :class:`novaclient.exceptions.InstanceInDeletedState` or
+                  :class:`novaclient.exceptions.NotFound`.
+        """
+        server_id = str(base.getid(server))
+        if server_id in self._watched:
+            return self._watched[server_id][0]
+        future = futures.Future()
+        self._watched[server_id] = (
+            future, final_ok_states, status_field, callback)
+        self._added.add(server_id)
+        return future
+
+    @property
+    def pending(self):
+        """Number of servers still waited for."""
+        return len(self._watched)
+
+    def _check(self, server_id, server):
+        future, final_ok_states, status_field, callback = \
+            self._watched[server_id]
+        status = getattr(server, status_field, None)
+        if status:
+            status = status.lower()
+
+        if status in final_ok_states:
+            future.set_result(server)
+        elif status == "error":
+            future.set_exception(exceptions.ResourceInErrorState(server))
+        elif status == "deleted":
+            fault = getattr(server, "fault", None) or {}
+            future.set_exception(exceptions.InstanceInDeletedState(
+                fault.get("message")))
+        else:
+            if callback:
+                callback(server)
+            return
+        del self._watched[server_id]
+
+    def poll(self):
+        """Poll the watched servers once and resolve the finished ones.
+
+        :returns: the number of servers still waited for.
+        """
+        for server_id, (future, _s, _f, _c) in list(self._watched.items()):
+            if future.cancelled():
+                del self._watched[server_id]
+        self._added &= set(self._watched)
+        if not self._watched:
+            return 0
+
+        since = self._since
+        if since is None:
+            added = set(self._watched)
+        else:
+            added = set(self._added)
+            search_opts = dict(self.search_opts)
+            search_opts['changes-since'] = since
+            # NOTE: all the pages are read, so that servers changed beyond
+            # the first one aren't skipped when the next poll starts after
+            # them.
+            for server in self.manager.list(search_opts=search_opts,
+                                            limit=-1):
+                updated = getattr(server, 'updated', None)
+                if updated and updated > since:
+                    since = updated
+                server_id = str(server.id)
+                if server_id in self._watched and server_id not in added:
+                    self._check(server_id, server)
+
+        pending = []
+        for server_id, server, error in utils.run_concurrently(
+                self.manager.get, sorted(added), self.max_workers):
+            if isinstance(error, exceptions.NotFound):
+                self._watched.pop(server_id)[0].set_exception(error)
+            elif error is not None:
+                raise error
+            else:
+                self._check(server_id, server)
+                if server_id in self._watched:
+                    pending.append(server)
+        self._added.clear()
+
+        # The next listing starts from the earliest update of the servers
+        # got directly, as they may have changed since. Without their
+        # update time, they are got again by the next poll.
+        updates = [getattr(server, 'updated', None) for server in pending]
+        if not all(updates):
+            since = None
+        elif updates:
+            since = min(updates + [since]) if since else min(updates)
+        self._since = since
+        return len(self._watched)
+
+    def wait(self):
+        """Poll until all the watched servers are resolved."""
+        while self.poll():
+            self._sleep(self.poll_period)
+
+
 class ServerManager(base.BootingManagerWithFind):
     resource_class = Server
+    search_opts_filters = ('all_tenants', 'deleted', 'status', 'host',
+                           'flavor', 'image', 'tenant_id', 'changes-since')
+    # NOTE: the servers hold the flavor and the image as dicts, and have no
+    # changes-since attribute.
+    search_opts_unchecked = ('all_tenants', 'deleted', 'flavor', 'image',
+                             'changes-since')
+    search_opts_attributes = {'host': 'OS-EXT-SRV-ATTR:host'}
 
     def _boot(self, resource_url, response_key, name, image, flavor,
               meta=None, files=None, userdata=None,
@@ -762,7 +912,8 @@ class ServerManager(base.BootingManagerWithFind):
         return self._get("/servers/%s" % base.getid(server), "server")
 
     def list(self, detailed=True, search_opts=None, marker=None, limit=None,
-             sort_keys=None, sort_dirs=None):
+             sort_keys=None, sort_dirs=None, hydrate=False, stream=False,
+             fields=None):
         """
         Get a list of servers.
 
@@ -777,6 +928,16 @@ class ServerManager(base.BootingManagerWithFind):
         :param limit: Maximum number of servers to return (optional).
         :param sort_keys: List of sort keys
         :param sort_dirs: List of sort directions
+        :param hydrate: When listing servers without details, load the details
+                        of all servers with a single detailed listing the
+                        first time a missing attribute of any of them is
+                        accessed (optional).
+        :param stream: Return a :class:`novaclient.base.ResourceStream`
+                       building the servers while the response is received
+                       instead of a list (optional). ``hydrate`` is ignored.
+        :param fields: Attributes to keep in the returned servers, ``id`` is
+                       always kept (optional). The other attributes are
+                       dropped, and with ``stream`` they are not even decoded.
 
         :rtype: list of :class:`Server`
 
@@ -789,6 +950,9 @@ class ServerManager(base.BootingManagerWithFind):
 
         client.servers.list(limit=10) - returns only 10 servers
 
+        client.servers.list(fields=['name', 'status']) - returns servers
+        with only their id, name and status.
+
         """
         if search_opts is None:
             search_opts = {}
@@ -805,8 +969,7 @@ class ServerManager(base.BootingManagerWithFind):
         if detailed:
             detail = "/detail"
 
-        result = base.ListWithMeta([], None)
-        while True:
+        def list_url(marker):
             if marker:
                 qparams['marker'] = marker
 
@@ -830,17 +993,92 @@ class ServerManager(base.BootingManagerWithFind):
                 query_string = "?%s" % parse.urlencode(new_qparams)
             else:
                 query_string = ""
+            return "/servers%s%s" % (detail, query_string)
+
+        if stream:
+            def next_url(last):
+                return list_url(last.id)
 
-            servers = self._list("/servers%s%s" % (detail, query_string),
-                                 "servers")
+            return base.ResourceStream(
+                self, list_url(marker), "servers",
+                next_url=next_url if limit == -1 else None, fields=fields)
+
+        first_marker = marker
+        result = base.ListWithMeta([], None)
+        while True:
+            servers = self._list(list_url(marker), "servers", fields=fields)
             result.extend(servers)
             result.append_request_ids(servers.request_ids)
 
             if not servers or limit != -1:
                 break
             marker = result[-1].id
+
+        if hydrate and not detailed:
+            result.enable_hydration(
+                lambda resources: self.list(
+                    search_opts=search_opts, marker=first_marker,
+                    limit=limit, sort_keys=sort_keys, sort_dirs=sort_dirs))
         return result
 
+    def iter_list(self, detailed=True, search_opts=None, marker=None,
+                  limit=None, sort_keys=None, sort_dirs=None, page_size=None,
+                  prefetch=True):
+        """
+        Iterate over servers, fetching them page by page.
+
+        Unlike :meth:`list` with ``limit=-1``, servers are returned as soon as
+        their page is received and only two pages are held in memory.
+
+        :param detailed: Whether to return detailed server info (optional).
+        :param search_opts: Search options to filter out servers which don't
+            match the search_opts (optional). See :meth:`list`.
+        :param marker: Begin returning servers that appear later in the server
+                       list than that represented by this server id (optional).
+        :param limit: Maximum number of servers to return (optional).
+        :param sort_keys: List of sort keys
+        :param sort_dirs: List of sort directions
+        :param page_size: number of servers requested per page (optional).
+                          By default the maximum page size of the server is
+                          used.
+        :param prefetch: whether to fetch the next page in the background
+                         while the current one is consumed.
+        :returns: :class:`novaclient.base.PageIterator` of :class:`Server`
+
+        Example:
+
+        for server in client.servers.iter_list(search_opts={'all_tenants': 1}):
+            ...
+        """
+        def list_page(marker, limit):
+            return self.list(detailed=detailed, search_opts=search_opts,
+                             marker=marker, limit=limit, sort_keys=sort_keys,
+                             sort_dirs=sort_dirs)
+
+        return base.PageIterator(list_page, marker=marker, limit=limit,
+                                 page_size=page_size, prefetch=prefetch)
+
+    def wait_for_status(self, servers, final_ok_states=('active',),
+                        poll_period=5, search_opts=None):
+        """
+        Wait for servers to reach one of ``final_ok_states``.
+
+        All the servers are polled together with one listing per
+        ``poll_period``, see :class:`ServerWaiter`.
+
+        :param servers: The :class:`Server` (or IDs) to wait for.
+        :param final_ok_states: statuses (lower case) ending the wait.
+        :param poll_period: seconds to sleep between two polls.
+        :param search_opts: additional filters of the listings (optional).
+        :returns: list of ``concurrent.futures.Future``, in the order of
+                  ``servers``, all of them done.
+        """
+        waiter = ServerWaiter(self, poll_period=poll_period,
+                              search_opts=search_opts)
+        results = [waiter.add(server, final_ok_states) for server in servers]
+        waiter.wait()
+        return results
+
     def add_fixed_ip(self, server, network_id):
         """
         Add an IP address on a network.
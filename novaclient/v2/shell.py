@@ -718,11 +718,24 @@ def do_cloudpipe_configure(cs, args):
 
 
 def _poll_for_status(poll_fn, obj_id, action, final_ok_states,
-                     poll_period=5, show_progress=True,
-                     status_field="status", silent=False):
+                     poll_period=None, show_progress=True,
+                     status_field="status", silent=False,
+                     min_poll_period=1, max_poll_period=30, deadline=None):
     """Block while an action is being performed, periodically printing
     progress.
+
+    Polls back off from ``min_poll_period`` to ``max_poll_period`` seconds
+    and follow the completion time predicted from the ``progress`` of the
+    object, see :class:`novaclient.utils.PollScheduler`. A ``poll_period``
+    polls at a fixed period instead. ``CommandError`` is raised if the
+    action isn't finished after ``deadline`` seconds.
     """
+    if poll_period is not None:
+        scheduler = utils.PollScheduler.fixed(poll_period, deadline=deadline)
+    else:
+        scheduler = utils.PollScheduler(min_poll_period, max_poll_period,
+                                        deadline=deadline)
+
     def print_progress(progress):
         if show_progress:
             msg = (_('\rServer %(action)s... %(progress)s%% complete')
@@ -762,7 +775,47 @@ def _poll_for_status(poll_fn, obj_id, action, final_ok_states,
         if not silent:
             print_progress(progress)
 
-        time.sleep(poll_period)
+        if scheduler.expired:
+            if not silent:
+                print(_("\nTimed out waiting for %s server") % action)
+            raise exceptions.CommandError(
+                _("Timed out after %(deadline)s seconds waiting for "
+                  "%(id)s (%(action)s).") % dict(action=action, id=obj_id,
+                                                 deadline=deadline))
+
+        time.sleep(scheduler.next_delay(progress))
+
+
+def _poll_for_servers_status(cs, servers_to_poll, action, final_ok_states,
+                             success_msg, error_msg, poll_period=5):
+    """Block while an action is being performed on many servers.
+
+    All the servers are polled together, see
+    :class:`novaclient.v2.servers.ServerWaiter`.
+    """
+    def print_progress(server):
+        sys.stdout.write(_('\rServer %(action)s... %(pending)s remaining')
+                         % dict(action=action, pending=waiter.pending))
+        sys.stdout.flush()
+
+    waiter = servers.ServerWaiter(cs.servers, poll_period=poll_period)
+    results = [waiter.add(server, final_ok_states, callback=print_progress)
+               for server in servers_to_poll]
+    print()
+    waiter.wait()
+    print()
+
+    failure_flag = False
+    for server, result in zip(servers_to_poll, results):
+        error = result.exception()
+        if error is None:
+            print(success_msg % server)
+        else:
+            failure_flag = True
+            print(encodeutils.safe_encode(six.text_type(error)))
+
+    if failure_flag:
+        raise exceptions.CommandError(error_msg)
 
 
 def _translate_keys(collection, convert):
@@ -1779,20 +1832,18 @@ def _get_list_table_columns_and_formatters(fields, objs, exclude_fields=(),
     help=_('Poll until reboot is complete.'))
 def do_reboot(cs, args):
     """Reboot a server."""
-    servers = [_find_server(cs, s) for s in args.server]
+    servers = _find_servers(cs, args.server, max_workers=args.parallel)
     utils.do_action_on_many(
         lambda s: s.reboot(args.reboot_type),
         servers,
         _("Request to reboot server %s has been accepted."),
-        _("Unable to reboot the specified server(s)."))
+        _("Unable to reboot the specified server(s)."),
+        max_workers=args.parallel)
 
     if args.poll:
-        utils.do_action_on_many(
-            lambda s: _poll_for_status(cs.servers.get, s.id, 'rebooting',
-                                       ['active'], show_progress=False),
-            servers,
-            _("Wait for server %s reboot."),
-            _("Wait for specified server(s) failed."))
+        _poll_for_servers_status(cs, servers, 'rebooting', ['active'],
+                                 _("Wait for server %s reboot."),
+                                 _("Wait for specified server(s) failed."))
 
 
 @utils.arg('server', metavar='<server>', help=_('Name or ID of server.'))
@@ -1998,7 +2049,8 @@ def do_stop(cs, args):
         lambda s: _find_server(cs, s, **find_args).stop(),
         args.server,
         _("Request to stop server %s has been accepted."),
-        _("Unable to stop the specified server(s)."))
+        _("Unable to stop the specified server(s)."),
+        max_workers=args.parallel)
 
 
 @utils.arg(
@@ -2018,7 +2070,8 @@ def do_start(cs, args):
         lambda s: _find_server(cs, s, **find_args).start(),
         args.server,
         _("Request to start server %s has been accepted."),
-        _("Unable to start the specified server(s)."))
+        _("Unable to start the specified server(s)."),
+        max_workers=args.parallel)
 
 
 @utils.arg('server', metavar='<server>', help=_('Name or ID of server.'))
@@ -2305,7 +2358,8 @@ def do_delete(cs, args):
         lambda s: _find_server(cs, s, **find_args).delete(),
         args.server,
         _("Request to delete server %s has been accepted."),
-        _("Unable to delete the specified server(s)."))
+        _("Unable to delete the specified server(s)."),
+        max_workers=args.parallel)
 
 
 def _find_server(cs, server, raise_if_notfound=True, **find_args):
@@ -2329,6 +2383,24 @@ def _find_server(cs, server, raise_if_notfound=True, **find_args):
             return server
 
 
+def _find_servers(cs, servers, max_workers=None, **find_args):
+    """Get several servers by name or ID, resolving them concurrently.
+
+    :param cs: NovaClient's instance
+    :param servers: identifiers of servers
+    :param max_workers: maximum number of concurrent lookups
+    :param find_args: argument to search server
+    :returns: list of servers in the order of ``servers``
+    """
+    found = []
+    for _server, result, e in utils.run_concurrently(
+            lambda s: _find_server(cs, s, **find_args), servers, max_workers):
+        if e is not None:
+            raise e
+        found.append(result)
+    return found
+
+
 def _find_image(cs, image):
     """Get an image by name or ID."""
     try:
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the import time of novaclient and the cost of building clients.
+
+Usage: python tools/client_startup_benchmark.py [COUNT]
+
+Imports are measured in a fresh process, so that modules imported by the
+benchmark itself are not counted.
+"""
+
+from __future__ import print_function
+
+import subprocess
+import sys
+import timeit
+
+IMPORT = """
+import sys, timeit
+start = timeit.default_timer()
+import novaclient.client
+end = timeit.default_timer()
+print(end - start)
+print(len([m for m in sys.modules if m.startswith('novaclient.v2.')]))
+"""
+
+
+def measure_import():
+    output = subprocess.check_output([sys.executable, "-c", IMPORT])
+    elapsed, modules = output.split()
+    return float(elapsed), int(modules)
+
+
+def measure_clients(count):
+    from keystoneauth1 import session
+
+    from novaclient import client
+
+    sess = session.Session()
+
+    def build():
+        client.Client("2", session=sess)
+
+    return timeit.timeit(build, number=count) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    elapsed, modules = measure_import()
+    print("import novaclient.client: %7.1f ms, %d novaclient.v2 modules"
+          % (elapsed * 1000, modules))
+    print("client.Client('2'):       %7.1f us per client"
+          % (measure_clients(count) * 10 ** 6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the memory used by server resources, with and without COMPACT.
+
+Usage: python tools/resource_memory_benchmark.py [COUNT]
+
+Each mode is measured in its own process, since the layout of instance
+dictionaries depends on the instances created before.
+"""
+
+from __future__ import print_function
+
+import gc
+import subprocess
+import sys
+import tracemalloc
+
+from novaclient.v2 import servers
+
+
+def server_info(i):
+    return {
+        "id": "4bd7f5e0-6f87-4b35-9d4b-%012d" % i,
+        "name": "server-%d" % i,
+        "status": "ACTIVE",
+        "tenant_id": "8b6e2a8d1e6c4ee3b6c6e0e6a5a3c0b1",
+        "user_id": "e1b9f5c7d2a34f0a8f3b9c6d7e8f9a0b",
+        "metadata": {},
+        "hostId": "e4d909c290d0fb1ca068ffaddf22cbd0",
+        "image": {"id": "c0b2f3a1-0f6c-4b8a-9d3e-1f2a3b4c5d6e", "links": []},
+        "flavor": {"id": "1", "links": []},
+        "created": "2016-01-01T00:00:00Z",
+        "updated": "2016-01-01T00:00:00Z",
+        "addresses": {"private": [{"version": 4, "addr": "10.0.0.%d"
+                                   % (i % 256)}]},
+        "accessIPv4": "",
+        "accessIPv6": "",
+        "links": [],
+        "OS-DCF:diskConfig": "MANUAL",
+        "OS-EXT-AZ:availability_zone": "nova",
+        "OS-EXT-STS:power_state": 1,
+        "OS-EXT-STS:task_state": None,
+        "OS-EXT-STS:vm_state": "active",
+        "config_drive": "",
+        "key_name": None,
+        "security_groups": [{"name": "default"}],
+        "os-extended-volumes:volumes_attached": [],
+    }
+
+
+def measure(count, compact):
+    infos = [server_info(i) for i in range(count)]
+    servers.Server.COMPACT = compact
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        resources = [servers.Server(None, info, loaded=True)
+                     for info in infos]
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        assert resources[-1].name == "server-%d" % (count - 1)
+    finally:
+        tracemalloc.stop()
+        servers.Server.COMPACT = False
+    return used
+
+
+def run(count, compact):
+    output = subprocess.check_output(
+        [sys.executable, __file__, str(count), "compact" if compact else ""])
+    return int(output)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    if len(sys.argv) > 2:
+        print(measure(count, sys.argv[2] == "compact"))
+        return
+    default = run(count, False)
+    compact = run(count, True)
+    print("%d servers (excluding the parsed JSON):" % count)
+    print("  default: %8.1f MiB, %5d bytes per server"
+          % (default / 2.0 ** 20, default // count))
+    print("  compact: %8.1f MiB, %5d bytes per server"
+          % (compact / 2.0 ** 20, compact // count))
+    print("  saved:   %7.1f%%" % (100.0 * (default - compact) / default))
+
+
+if __name__ == "__main__":
+    main()